@@ -0,0 +1,168 @@
+"""
+Agregados materializados do dashboard.
+
+O pipeline de dados.py calcula aqui, uma vez por ingestão, as tabelas pequenas que o app.py
+exibe (por Pokémon, por tipo, lendários, correlação). O dashboard só lê essas tabelas, então o
+tempo de abertura não cresce com o número de combates.
+
+Uso avulso (recalcula a partir dos arquivos já salvos):
+    python agregados.py
+"""
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import armazenamento
+import confrontos
+import janelas
+import modelo
+import motor
+
+PASTA_AGREGADOS = "agregados"
+TABELAS = ["pokemon", "tipos", "vitorias_lendarios", "correlacao", "tipos_comuns", "proporcao_lendarios",
+           "confrontos", "forca"]
+
+
+def _ids(df_combates: pd.DataFrame, coluna: str) -> np.ndarray:
+    return df_combates[coluna].dropna().to_numpy(dtype=np.int64)
+
+
+def calcular_correlacao(df_combates: pd.DataFrame, df_atributos: pd.DataFrame,
+                        indice: Optional[motor.IndiceAtributos] = None) -> pd.DataFrame:
+    """
+    Correlação entre as diferenças de atributos (P1 - P2) e a vitória do P1, com gathers no
+    índice de atributos em vez de dois merges.
+    """
+    indice = indice if indice is not None else motor.IndiceAtributos(df_atributos)
+    ids = df_combates[armazenamento.COLUNAS_ID].dropna().astype(np.int64)
+    momentos = motor.momentos_correlacao(
+        ids['first_pokemon'].to_numpy(), ids['second_pokemon'].to_numpy(), ids['winner'].to_numpy(), indice,
+    )
+    return motor.correlacao_de_momentos(*momentos)
+
+
+def calcular_taxa_vitoria_tipo(df_combates: pd.DataFrame, df_atributos: pd.DataFrame,
+                               indice: Optional[motor.IndiceAtributos] = None) -> pd.DataFrame:
+    indice = indice if indice is not None else motor.IndiceAtributos(df_atributos)
+    # Vitórias e participações por id (só ids com atributos), somadas depois por tipo
+    vitorias = indice.contar(_ids(df_combates, 'winner'))
+    participacoes = indice.contar(_ids(df_combates, 'first_pokemon')) + indice.contar(_ids(df_combates, 'second_pokemon'))
+    return motor.tipos_de_contagens(vitorias, participacoes, indice)
+
+
+def calcular_tipos_comuns(df_atributos: pd.DataFrame) -> pd.DataFrame:
+    # Soma das colunas da matriz multi-rótulo: cada Pokémon conta uma vez por tipo
+    contagem = armazenamento.matriz_tipos(df_atributos).sum(axis=0)
+    df_tipos_comuns = pd.DataFrame({'Tipo': armazenamento.TIPOS, 'Contagem': contagem})
+    df_tipos_comuns = df_tipos_comuns[df_tipos_comuns['Contagem'] > 0]
+    return df_tipos_comuns.sort_values('Contagem', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def calcular_proporcao_lendarios(df_atributos: pd.DataFrame) -> pd.DataFrame:
+    # 'legendary' já é bool (armazenamento.tipar_atributos)
+    contagem = df_atributos['legendary'].map({True: 'Lendário', False: 'Não Lendário'}).value_counts()
+    df_proporcao = contagem.reset_index()
+    df_proporcao.columns = ['Categoria', 'Contagem']
+    return df_proporcao
+
+
+def calcular_vitorias_lendarios(df_combates: pd.DataFrame, df_atributos: pd.DataFrame,
+                                indice: Optional[motor.IndiceAtributos] = None) -> pd.DataFrame:
+    indice = indice if indice is not None else motor.IndiceAtributos(df_atributos)
+    return motor.vitorias_lendarios_de_contagens(indice.contar(_ids(df_combates, 'winner')), indice)
+
+
+def calcular_agregados(df_combates: pd.DataFrame, df_atributos: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Todas as tabelas do dashboard com uma única passada pelos combates (o kernel de motor.py);
+    as funções calcular_* acima continuam disponíveis para uma análise isolada.
+    """
+    acumulador = motor.AcumuladorCombates(df_atributos)
+    acumulador.atualizar(df_combates)
+    agregados = acumulador.resultado()
+    agregados["tipos_comuns"] = calcular_tipos_comuns(df_atributos)
+    agregados["proporcao_lendarios"] = calcular_proporcao_lendarios(df_atributos)
+    return agregados
+
+
+def salvar_agregados(agregados: Dict[str, pd.DataFrame], n_combates: int, pasta: str = PASTA_AGREGADOS) -> None:
+    os.makedirs(pasta, exist_ok=True)
+    for nome in TABELAS:
+        # A correlação é uma matriz: o índice (nome da feature) faz parte dela
+        agregados[nome].to_csv(os.path.join(pasta, f"{nome}.csv"), index=(nome == "correlacao"))
+    # O manifesto é gravado por último: se existe, as tabelas estão completas
+    with open(os.path.join(pasta, "manifesto.json"), "w", encoding="utf-8") as f:
+        json.dump({"combates": int(n_combates), "gerado_em": time.time(), "tabelas": TABELAS}, f)
+    print(f" Agregados salvos em {pasta}/ ({n_combates} combates)")
+
+
+def agregados_atualizados(pasta: str = PASTA_AGREGADOS, fontes: Optional[list] = None) -> bool:
+    """
+    True se o manifesto existe e é mais novo que os arquivos de origem.
+    """
+    manifesto = os.path.join(pasta, "manifesto.json")
+    if not os.path.exists(manifesto):
+        return False
+    if fontes is None:
+        fontes = [armazenamento.caminho_combates(), armazenamento.ATRIBUTOS_CSV]
+    gerado = os.path.getmtime(manifesto)
+    return all(f is None or not os.path.exists(f) or os.path.getmtime(f) <= gerado for f in fontes)
+
+
+def carregar_agregados(pasta: str = PASTA_AGREGADOS) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Lê as tabelas materializadas, ou None se estiverem ausentes ou mais velhas que os dados.
+    """
+    if not agregados_atualizados(pasta):
+        return None
+    if not all(os.path.exists(os.path.join(pasta, f"{nome}.csv")) for nome in TABELAS):
+        # Materializados por uma versão com menos tabelas
+        return None
+    agregados = {nome: pd.read_csv(os.path.join(pasta, f"{nome}.csv")) for nome in TABELAS if nome != "correlacao"}
+    agregados["correlacao"] = pd.read_csv(os.path.join(pasta, "correlacao.csv"), index_col=0)
+    return agregados
+
+
+def _agregar_arquivo(df_atributos: pd.DataFrame, base: str) -> Tuple[Dict[str, pd.DataFrame], int]:
+    agregados, n_combates = motor.agregar_arquivo(df_atributos, base)
+    agregados["tipos_comuns"] = calcular_tipos_comuns(df_atributos)
+    agregados["proporcao_lendarios"] = calcular_proporcao_lendarios(df_atributos)
+    return agregados, n_combates
+
+
+def calcular_agregados_do_arquivo(df_atributos: pd.DataFrame,
+                                  base: str = armazenamento.BASE_COMBATES) -> Dict[str, pd.DataFrame]:
+    """
+    Mesmas tabelas de `calcular_agregados`, lendo os combates salvos em `base` em lotes pelo motor
+    em fluxo, então o arquivo pode ser maior que a RAM.
+    """
+    return _agregar_arquivo(df_atributos, base)[0]
+
+
+def treinar_modelo(agregados: Dict[str, pd.DataFrame], df_atributos: pd.DataFrame) -> modelo.ModeloVitoria:
+    """
+    Ajusta (ou reaproveita, pelo hash dos dados) o modelo de vitória, para o dashboard já
+    encontrar os coeficientes e a matriz de probabilidades em disco.
+    """
+    matriz = confrontos.MatrizConfrontos.de_tabela(agregados["confrontos"])
+    return modelo.modelo_para(matriz, motor.IndiceAtributos(df_atributos))
+
+
+def materializar(pasta: str = PASTA_AGREGADOS) -> Dict[str, pd.DataFrame]:
+    """
+    Recalcula e grava os agregados a partir dos combates e atributos já salvos em disco.
+    """
+    df_atributos = armazenamento.carregar_atributos()
+    agregados, n_combates = _agregar_arquivo(df_atributos, armazenamento.BASE_COMBATES)
+    salvar_agregados(agregados, n_combates, pasta)
+    treinar_modelo(agregados, df_atributos)
+    return agregados
+
+
+if __name__ == "__main__":
+    materializar()
+    janelas.materializar(reiniciar=True)
@@ -0,0 +1,323 @@
+"""
+Análises do dashboard, sem Streamlit.
+
+Cada análise recebe o handle de dados (`conjunto.ConjuntoDados`) e um filtro (`conjunto.Filtro`,
+ou None para todos os combates) e devolve um DataFrame pronto para exibir; as funções `figura_*`
+montam o gráfico Plotly correspondente. O app.py só chama estas funções e desenha o resultado, e
+um job em lote ou um benchmark pode rodar as mesmas análises sem subir o Streamlit:
+
+    import analises, conjunto
+    dados = conjunto.ConjuntoDados.carregar()
+    analises.dados_mais_vitorias(dados, conjunto.Filtro(tipos=("Fire",)))
+
+pandas, Plotly e o resto do pipeline só são importados quando uma função é chamada, então
+importar este módulo é instantâneo.
+"""
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from plotly.graph_objects import Figure
+
+    import confrontos
+    import conjunto
+
+NOMES_ATRIBUTOS = {
+    'hp_diff': 'Dif. HP', 'attack_diff': 'Dif. Ataque', 'defense_diff': 'Dif. Defesa',
+    'sp_attack_diff': 'Dif. Ataque Especial', 'sp_defense_diff': 'Dif. Defesa Especial',
+    'speed_diff': 'Dif. Velocidade', 'legendary_diff': 'Dif. Lendário'
+}
+
+
+def _filtro(filtro: Optional["conjunto.Filtro"]) -> "conjunto.Filtro":
+    import conjunto
+    return conjunto.Filtro() if filtro is None else filtro
+
+
+def _px():
+    import plotly.express as px
+    return px
+
+
+def tabela(dados: "conjunto.ConjuntoDados", filtro: Optional["conjunto.Filtro"], nome: str) -> "pd.DataFrame":
+    """
+    Tabela `nome` dos agregados: a materializada sem filtro, a reagregada com filtro.
+    """
+    filtro = _filtro(filtro)
+    return dados.tabela(nome) if filtro.vazio() else dados.tabelas_para(filtro)[nome]
+
+
+def rotulos_pokemon(dados: "conjunto.ConjuntoDados") -> Dict[int, str]:
+    """
+    Nome de cada id com atributos, em ordem alfabética (para os seletores).
+    """
+    nomes = dados.atributos.dropna(subset=['name']).sort_values('name')
+    return dict(zip(nomes['id'].astype(int), nomes['name'].astype(str)))
+
+
+# --- Análises ---
+
+def dados_mais_vitorias(dados, filtro=None):
+    df_pokemon = tabela(dados, filtro, 'pokemon')
+    df_top5 = df_pokemon.sort_values(by='vitorias', ascending=False, kind='stable').head(5)
+    df_top5 = df_top5[['name', 'vitorias']].reset_index(drop=True)
+    df_top5.columns = ['Pokémon', 'Vitórias']
+
+    return df_top5
+
+
+def dados_mais_derrotas(dados, filtro=None):
+    df_pokemon = tabela(dados, filtro, 'pokemon')
+    df_top5 = df_pokemon.sort_values(by='derrotas', ascending=False, kind='stable').head(5)
+    df_top5_formatado = df_top5[['name', 'derrotas']].reset_index(drop=True)
+    df_top5_formatado.columns = ['Pokémon', 'Derrotas']
+
+    return df_top5_formatado
+
+
+def dados_modelo(dados, filtro=None) -> Tuple["pd.DataFrame", float]:
+    import pandas as pd
+    modelo_vitoria = dados.modelo_para(_filtro(filtro))
+    if not modelo_vitoria.n_combates:
+        return pd.DataFrame(columns=['Atributo', 'Peso']), float('nan')
+    pesos = pd.Series(modelo_vitoria.coeficientes, index=modelo_vitoria.features)
+    # Só as diferenças de atributo; os tipos entram no modelo mas não no gráfico
+    df_coef = pesos[[f for f in modelo_vitoria.features if f.endswith('_diff')]].reset_index()
+    df_coef.columns = ['Atributo', 'Peso']
+    return df_coef, modelo_vitoria.acuracia
+
+
+def calcular_taxa_vitoria_tipo(dados, filtro=None):
+    # WinRateMin/WinRateMax: intervalo de confiança do bootstrap (intervalos.py)
+    limites = dados.intervalos_para(_filtro(filtro))['tipos']
+    return tabela(dados, filtro, 'tipos').merge(limites, on='Tipo', how='left')
+
+
+def analisar_tipos_comuns(dados, filtro=None):
+    return tabela(dados, filtro, 'tipos_comuns')
+
+
+def analisar_proporcao_lendarios(dados, filtro=None):
+    return tabela(dados, filtro, 'proporcao_lendarios')
+
+
+def analisar_vitorias_lendarios(dados, filtro=None):
+    limites = dados.intervalos_para(_filtro(filtro))['vitorias_lendarios']
+    return tabela(dados, filtro, 'vitorias_lendarios').merge(limites, on='Categoria', how='left')
+
+
+def dados_forca(dados, filtro=None):
+    df_forca = tabela(dados, filtro, 'forca').dropna(subset=['bradley_terry']).head(15)
+    df_forca = df_forca[['name', 'bradley_terry', 'elo', 'combates']].reset_index(drop=True)
+    df_forca.columns = ['Pokémon', 'Bradley-Terry', 'Elo', 'Combates']
+    return df_forca
+
+
+def matriz_confrontos(dados, filtro=None) -> "confrontos.MatrizConfrontos":
+    return dados.confrontos_para(_filtro(filtro))
+
+
+def probabilidade_vitoria(dados, filtro, pokemon_a, pokemon_b) -> float:
+    return float(dados.modelo_para(_filtro(filtro)).prever(pokemon_a, pokemon_b)[0])
+
+
+def dados_confrontos_tipos(dados, filtro=None):
+    df = matriz_confrontos(dados, filtro).por_tipo(dados.indice)
+    return df.pivot(index='Tipo', columns='Adversario', values='WinRate')
+
+
+# Tendências: as janelas cobrem todos os combates; o filtro só escolhe as linhas do gráfico
+
+def dados_tendencia_tipos(dados, filtro=None):
+    filtro = _filtro(filtro)
+    df = dados.janelas.tendencia_tipos(dados.indice)
+    if filtro.tipos:
+        df = df[df['Tipo'].isin(filtro.tipos)].reset_index(drop=True)
+    return df
+
+
+def dados_tendencia_pokemon(dados, filtro=None):
+    filtro = _filtro(filtro)
+    if filtro.pokemon is None:
+        return None
+    return dados.janelas.tendencia_pokemon(filtro.pokemon)
+
+
+def dados_janela_pokemon(dados, filtro=None):
+    filtro = _filtro(filtro)
+    df = dados.janelas.tabela_pokemon(dados.indice)
+    # Como nas tendências, o filtro escolhe as linhas: os Pokémon que passam nos filtros de
+    # atributo e, com Pokémon ou confronto, só eles
+    mascara = dados.ids_permitidos(filtro)
+    if mascara is not None:
+        df = df[mascara[df['id'].to_numpy()]]
+    escolhidos = [pid for pid in (filtro.pokemon, filtro.adversario) if pid is not None]
+    if escolhidos:
+        df = df[df['id'].isin(escolhidos)]
+    df = df.sort_values(['vitorias', 'WinRate'], ascending=False).head(10)
+    df = df[['name', 'vitorias', 'participacoes', 'WinRate']].reset_index(drop=True)
+    df.columns = ['Pokémon', 'Vitórias', 'Combates', 'Taxa de Vitória']
+    return df
+
+
+# --- Figuras ---
+
+def figura_mais_vitorias(df_top_5) -> "Figure":
+    fig_top5 = _px().bar(
+        df_top_5,
+        x='Pokémon',
+        y='Vitórias',
+        title='Top 5 Vencedores',
+        text='Vitórias',
+        color='Pokémon'
+    )
+    fig_top5.update_traces(textposition='outside')
+    return fig_top5
+
+
+def figura_mais_derrotas(df_top_5_derrotas) -> "Figure":
+    fig_top5_derrotas = _px().bar(
+        df_top_5_derrotas,
+        x='Pokémon',
+        y='Derrotas',
+        title='Top 5 Pokémons com Mais Derrotas',
+        text='Derrotas',
+        color='Pokémon'  # Usa cores categóricas, igual ao gráfico de vitórias
+    )
+    fig_top5_derrotas.update_traces(textposition='outside')
+    return fig_top5_derrotas
+
+
+def figura_modelo(df_coef) -> "Figure":
+    df_coef_plot = df_coef.assign(Atributo=df_coef['Atributo'].map(NOMES_ATRIBUTOS))
+    fig_bar = _px().bar(
+        df_coef_plot.sort_values('Peso'),
+        x='Peso',
+        y='Atributo',
+        orientation='h',
+        title='Influência de Cada Atributo na Vitória',
+        text='Peso'
+    )
+    fig_bar.update_traces(texttemplate='%{text:.3f}', textposition='auto')
+    fig_bar.update_layout(xaxis_title="Peso no Modelo de Vitória", yaxis_title="Diferença de Atributo")
+    return fig_bar
+
+
+def figura_taxa_vitoria_tipo(df_tipos_final) -> "Figure":
+    erros = {}
+    if 'WinRateMin' in df_tipos_final.columns:
+        # Barras de erro assimétricas com o intervalo de confiança
+        df_tipos_final = df_tipos_final.assign(
+            ErroMais=df_tipos_final['WinRateMax'] - df_tipos_final['WinRate'],
+            ErroMenos=df_tipos_final['WinRate'] - df_tipos_final['WinRateMin'],
+        )
+        erros = {'error_y': 'ErroMais', 'error_y_minus': 'ErroMenos'}
+    hover = [c for c in ['TotalWins', 'TotalMatches', 'WinRateMin', 'WinRateMax'] if c in df_tipos_final.columns]
+    return _px().bar(
+        df_tipos_final,
+        x='Tipo',
+        y='WinRate',
+        title="Taxa de Vitória por Tipo de Pokémon",
+        labels={'WinRate': 'Taxa de Vitória', 'Tipo': 'Tipo',
+                'WinRateMin': 'IC 95% (mín.)', 'WinRateMax': 'IC 95% (máx.)'},
+        color='WinRate',
+        color_continuous_scale='RdYlGn',
+        hover_data=hover,
+        **erros
+    )
+
+
+def figura_tipos_comuns(df_tipos) -> "Figure":
+    fig_tipos_comuns = _px().bar(
+        df_tipos.sort_values('Contagem', ascending=False),
+        x='Tipo',
+        y='Contagem',
+        title='Contagem de Pokémon por Tipo',
+        color='Tipo',
+        text='Contagem'
+    )
+    fig_tipos_comuns.update_traces(textposition='outside')
+    return fig_tipos_comuns
+
+
+def figura_proporcao_lendarios(df_proporcao) -> "Figure":
+    fig_pie_lendarios = _px().pie(
+        df_proporcao,
+        names='Categoria',
+        values='Contagem',
+        title='Proporção de Pokémon Lendários vs. Não Lendários',
+        hole=0.3  # Cria um gráfico de "rosca"
+    )
+    fig_pie_lendarios.update_traces(textinfo='percent+label', pull=[0, 0.1])  # Destaca Lendários
+    return fig_pie_lendarios
+
+
+def figura_vitorias_lendarios(df_vitorias_lendarios) -> "Figure":
+    com_intervalo = 'Proporção Min (%)' in df_vitorias_lendarios.columns
+    fig_lend_vitorias = _px().pie(
+        df_vitorias_lendarios,
+        names='Categoria',
+        values='Vitórias',
+        title='Proporção de Vitórias: Lendários vs Não Lendários',
+        hole=0.3,
+        hover_data=['Proporção Min (%)', 'Proporção Max (%)'] if com_intervalo else None
+    )
+    fig_lend_vitorias.update_traces(textinfo='percent+label', pull=[0, 0.1])
+    if com_intervalo:
+        # Pizza não tem barra de erro: o intervalo vai no rótulo
+        fig_lend_vitorias.update_traces(
+            texttemplate='%{label}<br>%{percent}<br>(IC 95%: %{customdata[0][0]:.1f}–%{customdata[0][1]:.1f}%)'
+        )
+    return fig_lend_vitorias
+
+
+def figura_confrontos_tipos(df_confrontos_tipos) -> "Figure":
+    return _px().imshow(
+        df_confrontos_tipos,
+        color_continuous_scale='RdYlGn',
+        zmin=0,
+        zmax=1,
+        labels={'x': 'Adversário', 'y': 'Tipo', 'color': 'Taxa de Vitória'},
+        title='Taxa de Vitória de Cada Tipo Contra Cada Tipo'
+    )
+
+
+def figura_forca(df_forca) -> "Figure":
+    fig_forca = _px().bar(
+        df_forca,
+        x='Pokémon',
+        y='Bradley-Terry',
+        title='Pokémons Mais Fortes',
+        hover_data=['Elo', 'Combates'],
+        color='Elo',
+        color_continuous_scale='Viridis'
+    )
+    fig_forca.update_layout(yaxis_title='Força (escala Elo)')
+    return fig_forca
+
+
+def _titulo_janela(tamanho_janela: Optional[int]) -> str:
+    return f'em Janelas de {tamanho_janela} Combates' if tamanho_janela else 'em Janelas de Combates'
+
+
+def figura_tendencia_tipos(df_tendencia, tamanho_janela: Optional[int] = None) -> "Figure":
+    return _px().line(
+        df_tendencia,
+        x='seq',
+        y='WinRate',
+        color='Tipo',
+        title=f'Taxa de Vitória por Tipo {_titulo_janela(tamanho_janela)}',
+        labels={'seq': 'Combate (ordem de chegada)', 'WinRate': 'Taxa de Vitória'},
+        hover_data=['TotalMatches'],
+    )
+
+
+def figura_tendencia_pokemon(df_tendencia, nome: str, tamanho_janela: Optional[int] = None) -> "Figure":
+    return _px().line(
+        df_tendencia,
+        x='seq',
+        y='WinRate',
+        title=f'Taxa de Vitória de {nome} {_titulo_janela(tamanho_janela)}',
+        labels={'seq': 'Combate (ordem de chegada)', 'WinRate': 'Taxa de Vitória'},
+        hover_data=['Combates'],
+    )
@@ -0,0 +1,445 @@
+"""
+Armazenamento e esquema das tabelas de combates e atributos entre dados.py e app.py.
+
+O formato principal é Arrow IPC (Feather v2) sem compressão, lido com memory map: ids como
+inteiros pequenos e nomes como colunas de dicionário (categóricas). O CSV continua disponível
+como exportação e como fallback quando o pyarrow não está instalado ou o .feather não existe.
+
+Na carga, `tipar_combates` e `tipar_atributos` aplicam um esquema compacto: ids em int16/int32,
+atributos em uint8/uint16, `legendary` como bool de verdade e tipos como categoria. Em memória os
+combates só precisam dos ids; os nomes saem dos atributos com `nomes_por_id`.
+
+Na coleta, `EscritorCombates` grava os combates direto no arquivo em lotes de tamanho fixo, à
+medida que as páginas chegam, sem montar a tabela inteira em memória.
+"""
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.ipc as ipc
+except ImportError:  # pyarrow é opcional: sem ele tudo continua em CSV
+    pa = None
+    feather = None
+    ipc = None
+
+BASE_COMBATES = "combates_com_nomes"
+# Linhas por record batch no Feather e por lote na leitura em fluxo
+LINHAS_POR_LOTE = 250_000
+COLUNAS_ID = ["first_pokemon", "second_pokemon", "winner"]
+COLUNAS_NOME = ["first_pokemon_name", "second_pokemon_name", "winner_name"]
+# Posição do combate no log da API (ordem das páginas), gravada pela coleta
+COLUNA_SEQ = "seq"
+ATRIBUTOS_CSV = "atributos_pokemons.csv"
+COLUNAS_STATS = ["hp", "attack", "defense", "sp_attack", "sp_defense", "speed", "forca_total"]
+COLUNAS_CATEGORIA = ["types", "type1", "type2", "type3"]
+# A API já mandou 'true'/'false' como texto e, em poucos registros, 'No'
+MAPA_LENDARIO = {"true": True, "false": False, True: True, False: False, "True": True, "False": False}
+# Vocabulário canônico dos tipos: o bit i de `tipos_mascara` é TIPOS[i]
+TIPOS = ["Normal", "Fire", "Water", "Grass", "Electric", "Ice", "Fighting", "Poison", "Ground",
+         "Flying", "Psychic", "Bug", "Rock", "Ghost", "Dragon", "Dark", "Steel", "Fairy"]
+COLUNAS_TIPO = ["type1", "type2", "type3"]
+COLUNA_MASCARA_TIPOS = "tipos_mascara"
+_CODIGO_TIPO = {t.lower(): i for i, t in enumerate(TIPOS)}
+
+
+def arrow_disponivel() -> bool:
+    return feather is not None
+
+
+def tipar_combates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ids no menor inteiro que comporta os valores (nullable só se houver NA) e nomes como categoria.
+    """
+    out = df.copy()
+    for c in COLUNAS_ID:
+        if c not in out.columns:
+            continue
+        col = pd.to_numeric(out[c], errors="coerce")
+        if col.isna().any():
+            out[c] = col.astype("Int32")
+        else:
+            out[c] = pd.to_numeric(col.astype("int64"), downcast="integer")
+    for c in COLUNAS_NOME:
+        if c in out.columns:
+            out[c] = out[c].astype("category")
+    return out
+
+
+def _menor_inteiro(col: pd.Series, sem_sinal: bool = False) -> pd.Series:
+    """
+    Menor tipo inteiro que comporta a coluna; colunas com NA ou valores fracionários viram float32.
+    """
+    col = pd.to_numeric(col, errors="coerce")
+    if col.isna().any() or not (col == col.round()).all():
+        return col.astype("float32")
+    return pd.to_numeric(col.astype("int64"), downcast="unsigned" if sem_sinal and (col >= 0).all() else "integer")
+
+
+def tipar_atributos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Esquema compacto dos atributos, normalizado uma vez na carga:
+    id inteiro pequeno, atributos uint8/uint16, `legendary` bool (valores fora do mapa contam como
+    não lendário), `generation` numérica e tipos como categoria.
+    """
+    out = df.copy()
+    out["id"] = _menor_inteiro(out["id"])
+    for c in COLUNAS_STATS:
+        if c in out.columns:
+            out[c] = _menor_inteiro(out[c], sem_sinal=True)
+    if "legendary" in out.columns and out["legendary"].dtype != bool:
+        out["legendary"] = out["legendary"].map(MAPA_LENDARIO).fillna(False).astype(bool)
+    if "generation" in out.columns:
+        # Aceita '1' e também variações como 'Gen2'
+        geracao = out["generation"].astype(str).str.extract(r"(\d+)", expand=False)
+        out["generation"] = pd.to_numeric(geracao, errors="coerce").astype("Int8")
+    if COLUNA_MASCARA_TIPOS in out.columns:
+        out[COLUNA_MASCARA_TIPOS] = _menor_inteiro(out[COLUNA_MASCARA_TIPOS], sem_sinal=True)
+    for c in COLUNAS_CATEGORIA:
+        if c in out.columns:
+            out[c] = out[c].astype("category")
+    return out
+
+
+def codificar_tipos(textos: pd.Series) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Normaliza a coluna `types` da API ('Grass, Flying/Flying') uma vez, na coleta: separa em ',' e
+    '/', tira espaços, põe na grafia de TIPOS e remove repetições. Devolve (DataFrame com `types`
+    normalizado como 'Grass/Flying', type1..type3 e `tipos_mascara`, contagem dos tipos fora do
+    vocabulário). Os tipos desconhecidos ficam em `types`/typeN, mas não na máscara.
+    """
+    partes = textos.reset_index(drop=True).astype(object).str.split(r"[,/]").explode().str.strip()
+    partes = partes[partes.notna() & (partes != "")]
+    codigos = partes.str.lower().map(_CODIGO_TIPO)
+    desconhecidos = partes[codigos.isna()].value_counts()
+    canonicos = np.array(TIPOS, dtype=object)[codigos.fillna(0).to_numpy(dtype=np.int64)]
+    longo = pd.DataFrame({"linha": partes.index, "tipo": np.where(codigos.notna(), canonicos, partes),
+                          "codigo": codigos.to_numpy()})
+    longo = longo.drop_duplicates(["linha", "tipo"])
+    longo["ordem"] = longo.groupby("linha").cumcount()
+
+    n = len(textos)
+    mascara = np.zeros(n, dtype=np.uint32)
+    conhecidos = longo[longo["codigo"].notna()]
+    np.bitwise_or.at(mascara, conhecidos["linha"].to_numpy(),
+                     np.left_shift(np.uint32(1), conhecidos["codigo"].to_numpy(dtype=np.uint32)))
+    largo = longo.pivot(index="linha", columns="ordem", values="tipo").reindex(range(n))
+    juntos = largo[0] if len(largo.columns) else pd.Series(None, index=range(n), dtype=object)
+    for j in largo.columns[1:]:
+        juntos = juntos.where(largo[j].isna(), juntos + "/" + largo[j])
+    out = pd.DataFrame({"types": juntos.to_numpy(dtype=object)}, index=textos.index)
+    for j, col in enumerate(COLUNAS_TIPO):
+        out[col] = largo[j].to_numpy(dtype=object) if j in largo.columns else None
+    out[COLUNA_MASCARA_TIPOS] = mascara
+    return out, desconhecidos
+
+
+def matriz_tipos(df_atributos: pd.DataFrame) -> np.ndarray:
+    """
+    Matriz bool (linha × TIPOS) dos tipos de cada Pokémon. Usa `tipos_mascara` quando a coleta já
+    gravou; atributos antigos, sem a máscara, são codificados aqui a partir de `types` ou type1..type3.
+    """
+    if COLUNA_MASCARA_TIPOS in df_atributos.columns and df_atributos[COLUNA_MASCARA_TIPOS].notna().all():
+        mascara = df_atributos[COLUNA_MASCARA_TIPOS].to_numpy(dtype=np.uint32)
+    else:
+        if "types" in df_atributos.columns:
+            textos = df_atributos["types"].astype(object)
+        else:
+            colunas = [df_atributos[c].astype(object) for c in COLUNAS_TIPO if c in df_atributos.columns]
+            textos = pd.concat(colunas, axis=1).apply(lambda linha: "/".join(linha.dropna()), axis=1)
+        mascara = codificar_tipos(textos)[0][COLUNA_MASCARA_TIPOS].to_numpy()
+    return ((mascara[:, None] >> np.arange(len(TIPOS), dtype=np.uint32)) & 1) == 1
+
+
+def carregar_atributos(caminho: str = ATRIBUTOS_CSV) -> pd.DataFrame:
+    return tipar_atributos(pd.read_csv(caminho))
+
+
+def nomes_por_id(ids: pd.Series, df_atributos: pd.DataFrame) -> pd.Categorical:
+    """
+    Nomes dos ids como categórico cujas categorias são os nomes dos atributos: só códigos por linha.
+    """
+    posicao = pd.Index(df_atributos["id"]).get_indexer(ids.astype("int64"))
+    return pd.Categorical.from_codes(posicao, categories=pd.Index(df_atributos["name"].astype(str)))
+
+
+def salvar_combates(df: pd.DataFrame, base: str = BASE_COMBATES, csv: bool = False) -> str:
+    """
+    Grava `base.feather` (ou `base.csv`, se o pyarrow faltar). Com `csv=True` exporta o CSV também.
+    Devolve o caminho do arquivo principal.
+    """
+    caminho_csv = f"{base}.csv"
+    if not arrow_disponivel():
+        print(" pyarrow não instalado: salvando só em CSV.")
+        df.to_csv(caminho_csv, index=False)
+        return caminho_csv
+    caminho = f"{base}.feather"
+    tabela = pa.Table.from_pandas(tipar_combates(df), preserve_index=False)
+    # Sem compressão para o memory map na leitura não precisar descomprimir
+    feather.write_feather(tabela, caminho, compression="uncompressed", chunksize=LINHAS_POR_LOTE)
+    if csv:
+        df.to_csv(caminho_csv, index=False)
+    return caminho
+
+
+def caminho_combates(base: str = BASE_COMBATES) -> Optional[str]:
+    """
+    Arquivo que `carregar_combates` vai ler: o .feather se existir e der para lê-lo, senão o .csv.
+    """
+    if arrow_disponivel() and os.path.exists(f"{base}.feather"):
+        return f"{base}.feather"
+    if os.path.exists(f"{base}.csv"):
+        return f"{base}.csv"
+    return None
+
+
+def carregar_combates(base: str = BASE_COMBATES, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê a tabela de combates tipada. Com `colunas=COLUNAS_ID` não carrega os nomes por linha.
+    """
+    caminho = caminho_combates(base)
+    if caminho is None:
+        raise FileNotFoundError(f"Nem {base}.feather nem {base}.csv foram encontrados.")
+    if caminho.endswith(".feather"):
+        return feather.read_table(caminho, columns=colunas, memory_map=True).to_pandas()
+    return tipar_combates(pd.read_csv(caminho, usecols=colunas))
+
+
+def colunas_combates(base: str = BASE_COMBATES) -> List[str]:
+    """
+    Colunas gravadas no arquivo de combates, sem ler os dados.
+    """
+    caminho = caminho_combates(base)
+    if caminho is None:
+        raise FileNotFoundError(f"Nem {base}.feather nem {base}.csv foram encontrados.")
+    if caminho.endswith(".feather"):
+        with pa.memory_map(caminho) as fonte:
+            return ipc.open_file(fonte).schema.names
+    return list(pd.read_csv(caminho, nrows=0).columns)
+
+
+def linhas_combates(base: str = BASE_COMBATES) -> int:
+    """
+    Número de combates gravados. No Feather vem dos record batches (memory map, sem ler os dados);
+    no CSV é uma contagem de linhas.
+    """
+    caminho = caminho_combates(base)
+    if caminho is None:
+        raise FileNotFoundError(f"Nem {base}.feather nem {base}.csv foram encontrados.")
+    if caminho.endswith(".feather"):
+        with pa.memory_map(caminho) as fonte:
+            leitor = ipc.open_file(fonte)
+            return sum(leitor.get_batch(i).num_rows for i in range(leitor.num_record_batches))
+    with open(caminho, "rb") as arq:
+        return max(sum(bloco.count(b"\n") for bloco in iter(lambda: arq.read(1 << 20), b"")) - 1, 0)
+
+
+def iterar_combates(
+    base: str = BASE_COMBATES,
+    colunas: Optional[List[str]] = None,
+    linhas_por_lote: int = LINHAS_POR_LOTE,
+    a_partir_de: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """
+    Lê a tabela de combates em lotes de tamanho limitado, sem nunca materializá-la inteira.
+    No Feather cada lote é um record batch (o tamanho foi fixado na escrita); no CSV, `linhas_por_lote`.
+    Com `a_partir_de`, pula as primeiras linhas (no Feather, sem ler os lotes pulados).
+    """
+    caminho = caminho_combates(base)
+    if caminho is None:
+        raise FileNotFoundError(f"Nem {base}.feather nem {base}.csv foram encontrados.")
+    if caminho.endswith(".feather"):
+        with pa.memory_map(caminho) as fonte:
+            leitor = ipc.open_file(fonte)
+            linha = 0
+            for i in range(leitor.num_record_batches):
+                lote = leitor.get_batch(i)
+                inicio, linha = linha, linha + lote.num_rows
+                if linha <= a_partir_de:
+                    continue
+                if a_partir_de > inicio:
+                    lote = lote.slice(a_partir_de - inicio)
+                if colunas is not None:
+                    lote = lote.select(colunas)
+                yield lote.to_pandas()
+    else:
+        pular = range(1, a_partir_de + 1) if a_partir_de else None
+        yield from pd.read_csv(caminho, usecols=colunas, chunksize=linhas_por_lote, skiprows=pular)
+
+
+def exportar_csv(base: str = BASE_COMBATES) -> str:
+    """
+    Exporta `base.feather` para `base.csv` lote a lote (memória limitada ao lote).
+    """
+    caminho_csv = f"{base}.csv"
+    primeiro = True
+    for lote in iterar_combates(base):
+        lote.to_csv(caminho_csv, mode="w" if primeiro else "a", header=primeiro, index=False)
+        primeiro = False
+    return caminho_csv
+
+
+def gravar_lotes(lotes: Iterable[pd.DataFrame], base: str = BASE_COMBATES, principal: bool = True,
+                 csv: bool = False) -> List[str]:
+    """
+    Grava `lotes` (mesmas colunas em todos) numa passada só: no arquivo principal de `base` e, com
+    `csv=True`, também em `base.csv`. Cada destino é escrito num temporário que só substitui o
+    anterior no fim, sem erro. Devolve os caminhos gravados.
+    """
+    destinos = []
+    if principal:
+        destinos.append(f"{base}.feather" if arrow_disponivel() else f"{base}.csv")
+    if csv and f"{base}.csv" not in destinos:
+        destinos.append(f"{base}.csv")
+    escritor = None
+    iniciados = set()
+    try:
+        for lote in lotes:
+            # Ids sempre em Int32, como no EscritorCombates: o esquema não varia de um lote para outro
+            lote = lote.astype({c: "Int32" for c in COLUNAS_ID if c in lote.columns})
+            for destino in destinos:
+                if destino.endswith(".feather"):
+                    tabela = pa.Table.from_pandas(lote, preserve_index=False)
+                    if escritor is None:
+                        escritor = ipc.new_file(destino + ".tmp", tabela.schema)
+                    escritor.write_table(tabela)
+                else:
+                    lote.to_csv(destino + ".tmp", mode="a" if destino in iniciados else "w",
+                                header=destino not in iniciados, index=False)
+                iniciados.add(destino)
+    except BaseException:
+        if escritor is not None:
+            escritor.close()
+        for destino in destinos:
+            if os.path.exists(destino + ".tmp"):
+                os.remove(destino + ".tmp")
+        raise
+    if escritor is not None:
+        escritor.close()
+    gravados = [d for d in destinos if d in iniciados]
+    for destino in gravados:
+        os.replace(destino + ".tmp", destino)
+    return gravados
+
+
+class EscritorCombates:
+    """
+    Grava combates no arquivo de `base` em lotes de `linhas_por_lote` linhas: os ids entram em
+    buffers int32 pré-alocados e cada lote cheio vira um record batch do Feather (ou um pedaço do
+    CSV, sem pyarrow). A memória fica no tamanho de um lote, qualquer que seja o total de combates.
+
+    Cada combate leva o seu `seq`, a posição na ordem em que chegou (a ordem das páginas da API).
+    Com `nomes` (Série id -> nome), grava também as colunas de nome como dicionário com as mesmas
+    categorias em todos os lotes. O arquivo é escrito num temporário e só substitui o anterior em
+    `fechar()` sem erro; use como context manager.
+    """
+
+    def __init__(self, base: str = BASE_COMBATES, nomes: Optional[pd.Series] = None,
+                 linhas_por_lote: int = LINHAS_POR_LOTE):
+        self.caminho = f"{base}.feather" if arrow_disponivel() else f"{base}.csv"
+        self._temporario = self.caminho + ".tmp"
+        self.linhas_por_lote = linhas_por_lote
+        self.linhas = 0
+        self.nulos = 0
+        self._buffer = np.empty((len(COLUNAS_ID), linhas_por_lote), dtype=np.int32)
+        self._n = 0
+        self._vistos = np.zeros(0, dtype=bool)
+        self._escritor = None
+        self._csv_iniciado = False
+        self._fechado = False
+        self._nomes_por_posicao = None
+        if nomes is not None:
+            nomes = nomes[~nomes.index.duplicated()].dropna().astype(str)
+            self._categorias = pd.Index(sorted(set(nomes)))
+            self._indice_nomes = pd.Index(nomes.index.astype("int64"))
+            # Código da categoria de cada posição de `_indice_nomes`, e -1 para id sem nome
+            self._nomes_por_posicao = np.append(self._categorias.get_indexer(nomes.to_numpy()), -1).astype(np.int32)
+
+    def __enter__(self) -> "EscritorCombates":
+        return self
+
+    def __exit__(self, tipo, valor, traceback) -> None:
+        self.fechar(ok=tipo is None)
+
+    def adicionar(self, first: np.ndarray, second: np.ndarray, winner: np.ndarray) -> None:
+        """
+        Acrescenta combates (ids; valores negativos contam como ausentes).
+        """
+        colunas = np.vstack([first, second, winner]).astype(np.int32, copy=False)
+        validos = colunas[colunas >= 0]
+        if len(validos):
+            maior = int(validos.max()) + 1
+            if maior > len(self._vistos):
+                self._vistos = np.pad(self._vistos, (0, maior - len(self._vistos)))
+            self._vistos[validos] = True
+        self.nulos += int((colunas < 0).any(axis=0).sum())
+
+        inicio = 0
+        while inicio < colunas.shape[1]:
+            cabe = min(self.linhas_por_lote - self._n, colunas.shape[1] - inicio)
+            self._buffer[:, self._n:self._n + cabe] = colunas[:, inicio:inicio + cabe]
+            self._n += cabe
+            inicio += cabe
+            if self._n == self.linhas_por_lote:
+                self._descarregar()
+
+    def ids_vistos(self) -> np.ndarray:
+        """
+        Ids que apareceram em qualquer coluna, em ordem crescente.
+        """
+        return np.flatnonzero(self._vistos)
+
+    def _codigos_nome(self, ids: np.ndarray) -> np.ndarray:
+        posicao = self._indice_nomes.get_indexer(ids)
+        return self._nomes_por_posicao[posicao]
+
+    def _descarregar(self) -> None:
+        ids = self._buffer[:, :self._n]
+        if arrow_disponivel():
+            colunas = {c: pa.array(v, type=pa.int32(), mask=v < 0) for c, v in zip(COLUNAS_ID, ids)}
+            colunas[COLUNA_SEQ] = pa.array(np.arange(self.linhas, self.linhas + self._n, dtype=np.int64))
+            if self._nomes_por_posicao is not None:
+                dicionario = pa.array(self._categorias.to_numpy(dtype=object), type=pa.string())
+                for c, v in zip(COLUNAS_NOME, ids):
+                    codigos = self._codigos_nome(v)
+                    colunas[c] = pa.DictionaryArray.from_arrays(pa.array(codigos, mask=codigos < 0), dicionario)
+            lote = pa.RecordBatch.from_pydict(colunas)
+            if self._escritor is None:
+                self._escritor = ipc.new_file(self._temporario, lote.schema)
+            self._escritor.write_batch(lote)
+        else:
+            df = pd.DataFrame({c: pd.array(np.where(v < 0, None, v), dtype="Int32") for c, v in zip(COLUNAS_ID, ids)})
+            df[COLUNA_SEQ] = np.arange(self.linhas, self.linhas + self._n, dtype=np.int64)
+            if self._nomes_por_posicao is not None:
+                for c, v in zip(COLUNAS_NOME, ids):
+                    df[c] = pd.Categorical.from_codes(self._codigos_nome(v), categories=self._categorias)
+            df.to_csv(self._temporario, mode="a" if self._csv_iniciado else "w", header=not self._csv_iniciado,
+                      index=False)
+            self._csv_iniciado = True
+        self.linhas += self._n
+        self._n = 0
+
+    def fechar(self, ok: bool = True) -> Optional[str]:
+        """
+        Grava o lote pendente e publica o arquivo (ou descarta tudo, com `ok=False`).
+        Devolve o caminho gravado.
+        """
+        if self._fechado:
+            return self.caminho if ok else None
+        self._fechado = True
+        if ok and (self._n or (self._escritor is None and not self._csv_iniciado)):
+            # Sem nenhum combate ainda grava o arquivo vazio, com o esquema
+            self._descarregar()
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+        if not ok:
+            if os.path.exists(self._temporario):
+                os.remove(self._temporario)
+            return None
+        os.replace(self._temporario, self.caminho)
+        return self.caminho
@@ -0,0 +1,232 @@
+"""
+Tempo e memória de cada análise do dashboard e das etapas de enriquecimento do dados.py, sobre
+conjuntos sintéticos de vários tamanhos (veja `benchmarks.sintetico`).
+
+As análises de analises.py (as que o app.py exibe) só leem tabelas prontas; o que custa é o
+cálculo de cada uma a partir dos combates (na materialização ou quando há filtro). Cada caso mede
+esse cálculo, com o nome da análise que o usa. O tempo é o melhor de `--repeticoes`; a memória
+é o pico alocado (tracemalloc, que vê os arrays do NumPy e do pandas) numa execução à parte,
+para o tracemalloc não pesar no tempo.
+
+O resultado vai para um JSON com o commit e as versões das bibliotecas; `--comparar` mostra a
+razão de tempo entre dois arquivos, para achar regressões entre commits.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.analises --tamanhos 10000 1000000 10000000
+    python -m benchmarks.analises --comparar benchmarks/resultados/analises-abc123.json benchmarks/resultados/analises-def456.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import agregados
+import armazenamento
+import confrontos
+import conjunto
+import dados
+import forca
+import intervalos
+import janelas
+import modelo
+import motor
+from benchmarks import sintetico
+
+PASTA_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+
+def _medir(funcao: Callable[[], Any], repeticoes: int) -> Tuple[float, float]:
+    """
+    (melhor tempo em segundos, pico de memória alocada em MB) de `funcao`.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(tempos), pico / 2**20
+
+
+def _sem_print(funcao: Callable[..., Any]) -> Callable[..., Any]:
+    # As etapas do dados.py imprimem contagens por coluna; não interessam aqui
+    def silenciosa(*args: Any, **kwargs: Any) -> Any:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return funcao(*args, **kwargs)
+    return silenciosa
+
+
+def casos_analises(dados_: conjunto.ConjuntoDados) -> List[Tuple[str, Callable[[], Any]]]:
+    """
+    Cálculo por trás de cada análise de analises.py, a partir dos combates do conjunto.
+    """
+    combates = dados_.combates
+    ids = (combates["first_pokemon"].astype(np.int64), combates["second_pokemon"].astype(np.int64),
+           combates["winner"].astype(np.int64))
+    df_ids = pd.DataFrame(dict(zip(armazenamento.COLUNAS_ID, ids)))
+    atributos, indice = dados_.atributos, dados_.indice
+    matriz = confrontos.MatrizConfrontos.de_combates(*ids, indice.tamanho)
+    elo = forca.Elo(indice.tamanho)
+    elo.atualizar(*ids)
+    por_pokemon = motor.contar_combates(*ids, indice).tabelas(indice)["pokemon"]
+    filtro = conjunto.Filtro(tipos=("Fire",))
+    seq = np.arange(len(ids[0]))
+    janela = janelas.JanelaCombates()
+    janela.atualizar(seq, *ids)
+
+    def lote_novo() -> int:
+        # Atualização incremental: cada chamada acrescenta 1000 combates depois dos já vistos
+        return janela.atualizar(seq[-1000:] + janela.ultimo_seq + 1, *(v[-1000:] for v in ids))
+
+    def top5(coluna: str) -> pd.DataFrame:
+        df = motor.contar_combates(*ids, indice).tabelas(indice)["pokemon"]
+        return df.sort_values(coluna, ascending=False, kind="stable").head(5)
+
+    return [
+        ("dados_mais_vitorias", lambda: top5("vitorias")),
+        ("dados_mais_derrotas", lambda: top5("derrotas")),
+        ("dados_modelo", lambda: modelo.ajustar(matriz, indice)),
+        ("calcular_taxa_vitoria_tipo", lambda: agregados.calcular_taxa_vitoria_tipo(df_ids, atributos, indice)),
+        ("analisar_tipos_comuns", lambda: agregados.calcular_tipos_comuns(atributos)),
+        ("analisar_proporcao_lendarios", lambda: agregados.calcular_proporcao_lendarios(atributos)),
+        ("analisar_vitorias_lendarios", lambda: agregados.calcular_vitorias_lendarios(df_ids, atributos, indice)),
+        ("dados_forca", lambda: forca.tabela_forca(elo, matriz, por_pokemon)),
+        ("intervalos (bootstrap, 2000 reamostras)", lambda: intervalos.calcular(matriz, indice)),
+        ("janelas (todos os combates)", lambda: janelas.JanelaCombates().atualizar(seq, *ids)),
+        ("janelas (lote de 1000 novos)", lote_novo),
+        ("dados_tendencia_tipos", lambda: janela.tendencia_tipos(indice)),
+        ("matriz_confrontos", lambda: confrontos.MatrizConfrontos.de_combates(*ids, indice.tamanho)),
+        ("dados_confrontos_tipos", lambda: matriz.por_tipo(indice)),
+        # Sem passar pelo cache de filtros do handle, que responderia as repetições de memória
+        ("tabelas_para (tipo Fire)", lambda: dados_._reagregar(filtro)),
+        ("agregados (passada completa)", lambda: agregados.calcular_agregados_do_arquivo(atributos)),
+    ]
+
+
+def casos_enriquecimento(n: int, atributos: pd.DataFrame, seed: int) -> List[Tuple[str, Callable[[], Any]]]:
+    """
+    Etapas do dados.py sobre combates como a API devolve (só ids) e atributos antes do add_col.
+    """
+    combates = sintetico.gerar_combates(n, atributos, seed=seed, com_nomes=False)
+    pokemons = atributos[["id", "name"]]
+    crus = atributos.drop(columns=["forca_total", "type1", "type2", "type3", armazenamento.COLUNA_MASCARA_TIPOS])
+    nomes = atributos.set_index("id")["name"]
+    pasta = tempfile.mkdtemp(prefix="bench-escritor-")
+
+    def escrever() -> None:
+        with armazenamento.EscritorCombates(os.path.join(pasta, "combates"), nomes=nomes) as escritor:
+            escritor.adicionar(*(combates[c].to_numpy() for c in armazenamento.COLUNAS_ID))
+
+    return [
+        ("dados.enriquecer_combates", lambda: dados.enriquecer_combates(combates, pokemons, atributos)),
+        ("dados.enriquecer_combates (compacto)",
+         lambda: dados.enriquecer_combates(combates, pokemons, atributos, compacto=True)),
+        ("dados.add_col", lambda: _sem_print(dados.add_col)(crus.copy())),
+        ("armazenamento.EscritorCombates", escrever),
+    ]
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def rodar(tamanhos: List[int], n_pokemons: int, assimetria: float, repeticoes: int, seed: int,
+          max_enriquecimento: int) -> Dict[str, Any]:
+    resultados = []
+    raiz = os.getcwd()
+    for n in tamanhos:
+        with tempfile.TemporaryDirectory(prefix="bench-analises-") as pasta:
+            sintetico.gravar_conjunto(pasta, n, n_pokemons, seed, assimetria)
+            # O conjunto e os agregados usam caminhos relativos (como o app.py)
+            os.chdir(pasta)
+            try:
+                dados_ = conjunto.ConjuntoDados.carregar()
+                # O primeiro acesso a `combates` é o que lê o arquivo (carga preguiçosa)
+                inicio = time.perf_counter()
+                _ = dados_.combates
+                resultados.append({"grupo": "carga", "caso": "ConjuntoDados.combates", "combates": n,
+                                   "segundos": time.perf_counter() - inicio, "pico_mb": None})
+                casos = [("analises", c) for c in casos_analises(dados_)]
+                if n <= max_enriquecimento:
+                    casos += [("enriquecimento", c) for c in casos_enriquecimento(n, dados_.atributos, seed)]
+                for grupo, (nome, funcao) in casos:
+                    segundos, pico = _medir(funcao, repeticoes)
+                    resultados.append({"grupo": grupo, "caso": nome, "combates": n,
+                                       "segundos": segundos, "pico_mb": pico})
+                    print(f"{n:>11} {grupo:>14} {nome:<45} {segundos:>9.4f} s {pico:>9.1f} MB")
+            finally:
+                os.chdir(raiz)
+    return {
+        "commit": _commit(),
+        "data": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "parametros": {"tamanhos": tamanhos, "pokemons": n_pokemons, "assimetria": assimetria,
+                       "repeticoes": repeticoes, "seed": seed},
+        "resultados": resultados,
+    }
+
+
+def comparar(antes: str, depois: str, limite: float = 1.2) -> None:
+    """
+    Razão de tempo (depois / antes) por caso e tamanho; marca as que passam de `limite`.
+    """
+    chave = ["grupo", "caso", "combates"]
+    tabelas = []
+    for caminho in (antes, depois):
+        with open(caminho, encoding="utf-8") as f:
+            tabelas.append(pd.DataFrame(json.load(f)["resultados"]).set_index(chave)["segundos"])
+    df = pd.concat(tabelas, axis=1, keys=["antes", "depois"]).dropna()
+    df["razao"] = df["depois"] / df["antes"]
+    df["regressao"] = np.where(df["razao"] > limite, "<<", "")
+    print(df.round(4).to_string())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--pokemons", type=int, default=800)
+    parser.add_argument("--assimetria", type=float, default=1.0)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-enriquecimento", type=int, default=10_000_000,
+                        help="maior tamanho em que as etapas do dados.py (em memória, com nomes) são medidas")
+    parser.add_argument("--saida", default=None, help="JSON de resultados (padrão: benchmarks/resultados/analises-<commit>.json)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"))
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+    relatorio = rodar(args.tamanhos, args.pokemons, args.assimetria, args.repeticoes, args.seed,
+                      args.max_enriquecimento)
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"analises-{relatorio['commit']}.json")
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"Resultados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Tempo do Elo e do Bradley-Terry sobre logs sintéticos de combates, e quanto cada um recupera da
+força "verdadeira" usada para sortear os vencedores (correlação de postos de Spearman).
+
+Mede também a atualização incremental: 1% de combates novos somados à matriz e ao Elo já
+calculados, com o Bradley-Terry partindo do ajuste anterior. Antes das medidas, `conferir` compara
+o Newton do `forca.bradley_terry` com o MM clássico e a partida quente com o ajuste do zero, num
+log pequeno com semente fixa.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.forca --tamanhos 1000000 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import confrontos
+import forca
+
+
+def gerar_log(n: int, ids: np.ndarray, forcas: np.ndarray, rng: np.random.Generator):
+    """
+    Ids dos combates (sem nomes), com P(first vence) = p_first / (p_first + p_second).
+    """
+    posicao_a = rng.integers(0, len(ids), size=n)
+    posicao_b = rng.integers(0, len(ids), size=n)
+    chance = forcas[posicao_a] / (forcas[posicao_a] + forcas[posicao_b])
+    first, second = ids[posicao_a], ids[posicao_b]
+    return first, second, np.where(rng.random(n) < chance, first, second)
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ok = np.isfinite(a) & np.isfinite(b)
+    return float(pd.Series(a[ok]).rank().corr(pd.Series(b[ok]).rank()))
+
+
+def bradley_terry_mm(matriz: confrontos.MatrizConfrontos, prior: float = 1.0, tol: float = 1e-12,
+                     max_iter: int = 100_000) -> np.ndarray:
+    """
+    Referência densa do Bradley-Terry pelo MM clássico (Hunter, 2004), com o mesmo prior de
+    `forca.bradley_terry`: cada id ganha e perde prior/2 combates contra um adversário de força 1.
+    Lento (muitas iterações), só para conferir o Newton em logs pequenos.
+    """
+    tamanho = max(matriz.tamanho, 1)
+    vencedor, perdedor = matriz.chaves // tamanho, matriz.chaves % tamanho
+    diferentes = vencedor != perdedor
+    vitorias = np.zeros((tamanho, tamanho))
+    np.add.at(vitorias, (vencedor[diferentes], perdedor[diferentes]), matriz.vitorias[diferentes])
+    ids = np.flatnonzero(vitorias.sum(axis=0) + vitorias.sum(axis=1))
+    vitorias = vitorias[np.ix_(ids, ids)]
+    encontros = vitorias + vitorias.T
+    ganhos = vitorias.sum(axis=1) + prior / 2
+    p = np.ones(len(ids))
+    for _ in range(max_iter):
+        novo = ganhos / ((encontros / (p[:, None] + p[None, :])).sum(axis=1) + prior / (p + 1.0))
+        if np.abs(np.log(novo / p)).max() < tol:
+            p = novo
+            break
+        p = novo
+    forcas = np.full(tamanho, np.nan)
+    forcas[ids] = p
+    return forcas
+
+
+def conferir(rng: np.random.Generator, n_ids: int = 40, n: int = 20_000) -> None:
+    """
+    Confere, num log pequeno com semente fixa, o Newton contra o MM e o ajuste com partida quente
+    (matriz somada a combates novos) contra o ajuste do zero. Levanta AssertionError se divergirem.
+    """
+    ids = np.arange(1, n_ids + 1)
+    forcas = np.exp(rng.normal(0.0, 1.0, size=n_ids))
+    first, second, winner = gerar_log(n, ids, forcas, rng)
+    matriz = confrontos.MatrizConfrontos.de_combates(first, second, winner)
+    p, _ = forca.bradley_terry(matriz, tol=1e-12)
+    referencia = bradley_terry_mm(matriz)
+    diferenca = np.nanmax(np.abs(np.log(p) - np.log(referencia)))
+    assert diferenca < 1e-6, f"Newton e MM divergem: {diferenca:.2e} em log p"
+
+    matriz.atualizar(*gerar_log(n // 10, ids, forcas, rng))
+    quente, _ = forca.bradley_terry(matriz, inicial=p, tol=1e-12)
+    frio, _ = forca.bradley_terry(matriz, tol=1e-12)
+    diferenca_quente = np.nanmax(np.abs(np.log(quente) - np.log(frio)))
+    assert diferenca_quente < 1e-6, f"partida quente diverge do ajuste do zero: {diferenca_quente:.2e} em log p"
+    print(f"Conferência ({n_ids} ids, {n} combates): Newton × MM {diferenca:.1e}, "
+          f"quente × do zero {diferenca_quente:.1e} (máx. |Δ log p|)")
+
+
+def _medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--ids", type=int, default=800)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ids = np.arange(1, args.ids + 1)
+    # Forças log-normais, como a dispersão de atributos dos Pokémon reais
+    forcas = np.exp(rng.normal(0.0, 1.0, size=len(ids)))
+    verdade = np.full(len(ids) + 1, np.nan)
+    verdade[ids] = forcas
+
+    conferir(np.random.default_rng(args.seed))
+    print(f"{'combates':>12} {'etapa':>22} {'segundos':>9} {'spearman':>9}")
+    for n in args.tamanhos:
+        first, second, winner = gerar_log(n, ids, forcas, rng)
+        novos = gerar_log(max(n // 100, 1), ids, forcas, rng)
+
+        matriz, t = _medir(lambda: confrontos.MatrizConfrontos.de_combates(first, second, winner))
+        print(f"{n:>12} {'matriz de confrontos':>22} {t:>9.3f} {'':>9}")
+
+        elo = forca.Elo()
+        _, t = _medir(lambda: elo.atualizar(first, second, winner))
+        print(f"{n:>12} {'elo':>22} {t:>9.3f} {_spearman(elo.ratings, verdade):>9.3f}")
+
+        (p, iteracoes), t = _medir(lambda: forca.bradley_terry(matriz))
+        print(f"{n:>12} {f'bradley-terry ({iteracoes} it)':>22} {t:>9.3f} {_spearman(p, verdade):>9.3f}")
+
+        _, t = _medir(lambda: (matriz.atualizar(*novos), elo.atualizar(*novos)))
+        print(f"{n:>12} {'+1% matriz e elo':>22} {t:>9.3f} {_spearman(elo.ratings, verdade):>9.3f}")
+        (p, iteracoes), t = _medir(lambda: forca.bradley_terry(matriz, inicial=p))
+        print(f"{n:>12} {f'+1% bradley-terry ({iteracoes} it)':>22} {t:>9.3f} {_spearman(p, verdade):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
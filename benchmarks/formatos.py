@@ -0,0 +1,85 @@
+"""
+Tempo de carga e memória residente da tabela de combates em CSV, em Feather (memory map) e em
+Feather só com os ids (o esquema compacto que o dashboard usa; nomes derivados dos atributos).
+
+Cada carga roda num processo novo, para o pico de memória de uma não contaminar a outra.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.formatos --tamanhos 50000 10000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import armazenamento
+from benchmarks.sintetico import gerar_combates
+
+
+def _rss_mb() -> float:
+    # Memória residente atual (Linux); fora dele, o pico do processo via getrusage
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _carregar(base: str, formato: str) -> None:
+    antes = _rss_mb()
+    inicio = time.perf_counter()
+    if formato == "csv":
+        df = pd.read_csv(f"{base}.csv")
+    elif formato == "compacto":
+        df = armazenamento.carregar_combates(base, colunas=armazenamento.COLUNAS_ID)
+    else:
+        df = armazenamento.carregar_combates(base)
+    segundos = time.perf_counter() - inicio
+    print(json.dumps({"linhas": len(df), "segundos": segundos, "rss_mb": _rss_mb() - antes}))
+
+
+def _medir(base: str, formato: str) -> dict:
+    saida = subprocess.run(
+        [sys.executable, "-m", "benchmarks.formatos", "--carregar", base, "--formato", formato],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[50_000, 10_000_000])
+    parser.add_argument("--atributos", default="atributos_pokemons.csv")
+    parser.add_argument("--carregar", help=argparse.SUPPRESS)
+    parser.add_argument("--formato", choices=["csv", "feather", "compacto"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.carregar:
+        _carregar(args.carregar, args.formato)
+        return
+    if not armazenamento.arrow_disponivel():
+        raise SystemExit("pyarrow não instalado: não há Feather para comparar.")
+
+    atributos = pd.read_csv(args.atributos)
+    print(f"{'combates':>12} {'formato':>8} {'arquivo MB':>11} {'carga s':>9} {'RSS MB':>9}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in args.tamanhos:
+            base = os.path.join(pasta, f"combates_{n}")
+            df = gerar_combates(n, atributos)
+            df.to_csv(f"{base}.csv", index=False)
+            armazenamento.salvar_combates(df, base)
+            del df
+            for formato in ("csv", "feather", "compacto"):
+                r = _medir(base, formato)
+                tamanho = os.path.getsize(f"{base}.{'csv' if formato == 'csv' else 'feather'}") / 2**20
+                print(f"{n:>12} {formato:>8} {tamanho:>11.1f} {r['segundos']:>9.3f} {r['rss_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Speedup do índice de atributos por id (gathers NumPy) sobre o caminho antigo com pd.merge,
+nas três análises que faziam merge: correlação, taxa de vitória por tipo e vitórias de lendários.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.indice --tamanhos 50000 10000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+import agregados
+import armazenamento
+import motor
+from benchmarks.sintetico import gerar_combates
+
+
+# Caminho antigo (antes do índice), mantido aqui só como referência de medida
+def _correlacao_merge(df_combates, df_atributos):
+    stats_cols = ['id', 'hp', 'attack', 'defense', 'sp_attack', 'sp_defense', 'speed', 'legendary']
+    df_atributos_stats = df_atributos[stats_cols].copy()
+    legendary_map = {'true': 1, 'false': 0, True: 1, False: 0}
+    df_atributos_stats['legendary'] = df_atributos_stats['legendary'].map(legendary_map).fillna(0).astype(int)
+    base = df_combates[['first_pokemon', 'second_pokemon', 'winner']]
+    merge1 = pd.merge(base, df_atributos_stats, left_on='first_pokemon', right_on='id')
+    full = pd.merge(merge1, df_atributos_stats, left_on='second_pokemon', right_on='id', suffixes=('_p1', '_p2'))
+    full['p1_wins'] = (full['winner'] == full['first_pokemon']).astype(int)
+    for c in ['hp', 'attack', 'defense', 'sp_attack', 'sp_defense', 'speed', 'legendary']:
+        full[f'{c}_diff'] = full[f'{c}_p1'] - full[f'{c}_p2']
+    return full[motor.FEATURES].corr()
+
+
+def _tipos_merge(df_combates, df_atributos):
+    slim = df_atributos[['id', 'type1', 'type2', 'type3']]
+    win = pd.merge(df_combates[['winner']], slim, left_on='winner', right_on='id')
+    first = pd.merge(df_combates[['first_pokemon']], slim, left_on='first_pokemon', right_on='id')
+    second = pd.merge(df_combates[['second_pokemon']], slim, left_on='second_pokemon', right_on='id')
+    wins = win['type1'].value_counts()
+    for c in armazenamento.COLUNAS_TIPO[1:]:
+        wins = wins.add(win[c].value_counts(), fill_value=0)
+    matches = first['type1'].value_counts()
+    for df, cols in ((first, armazenamento.COLUNAS_TIPO[1:]), (second, armazenamento.COLUNAS_TIPO)):
+        for c in cols:
+            matches = matches.add(df[c].value_counts(), fill_value=0)
+    return wins, matches
+
+
+def _lendarios_merge(df_combates, df_atributos):
+    legendary_map = {'true': True, 'false': False, True: True, False: False}
+    df_leg = df_atributos[['id', 'legendary']].copy()
+    df_leg['legendary'] = df_leg['legendary'].map(legendary_map).fillna(False)
+    return pd.merge(df_combates[['winner']], df_leg, left_on='winner', right_on='id')['legendary'].value_counts()
+
+
+def _melhor_tempo(funcao, *args, repeticoes: int = 3) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[50_000, 10_000_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    # O caminho com merge recebe os atributos crus, como o app.py antigo lia do CSV
+    df_atributos_csv = pd.read_csv(armazenamento.ATRIBUTOS_CSV)
+    df_atributos = armazenamento.tipar_atributos(df_atributos_csv)
+    indice = motor.IndiceAtributos(df_atributos)
+    casos = [
+        ("correlação", _correlacao_merge, agregados.calcular_correlacao),
+        ("vitória por tipo", _tipos_merge, agregados.calcular_taxa_vitoria_tipo),
+        ("vitórias lendários", _lendarios_merge, agregados.calcular_vitorias_lendarios),
+    ]
+    print(f"{'combates':>12} {'análise':>20} {'merge s':>9} {'índice s':>9} {'speedup':>8}")
+    for n in args.tamanhos:
+        df = armazenamento.tipar_combates(gerar_combates(n, df_atributos))
+        for nome, com_merge, com_indice in casos:
+            t_merge = _melhor_tempo(com_merge, df, df_atributos_csv, repeticoes=args.repeticoes)
+            t_indice = _melhor_tempo(com_indice, df, df_atributos, indice, repeticoes=args.repeticoes)
+            print(f"{n:>12} {nome:>20} {t_merge:>9.4f} {t_indice:>9.4f} {t_merge / t_indice:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Teste de carga da coleta contra o mock local da API, sob perfis de falha.
+
+Cada perfil sobe um mock com falhas injetadas (429 com Retry-After, 5xx, limite de requisições/s)
+e roda as etapas de rede do dados.py: login, listagem de pokémons, listagem de combates e download
+dos atributos. Para cada etapa saem o tempo, as linhas por segundo e, das métricas do cliente, as
+requisições, repetições, 429 e erros; do lado do servidor, as falhas que ele injetou. O resultado
+de cada perfil é comparado com o do perfil "limpo": o retry não pode perder nem reordenar dados.
+
+As falhas são sorteadas por hash (semente, requisição, ocorrência), então rodar de novo com a
+mesma `--semente` injeta as mesmas falhas nas mesmas requisições, com qualquer número de workers.
+Só o perfil com `limite_rps` depende do relógio.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.ingestao --per-page 50 200 --workers 8 --taxa 200
+    python -m benchmarks.ingestao --perfis limpo instavel --latencia 0.01 --saida ingestao.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import pandas as pd
+
+import dados
+import mock_api
+
+PERFIS: Dict[str, Dict[str, Any]] = {
+    "limpo": {},
+    "429_ocasional": {"taxa_429": 0.02},
+    "5xx_ocasional": {"taxa_5xx": 0.02},
+    "instavel": {"taxa_429": 0.03, "taxa_5xx": 0.05},
+    "limite_rps": {"limite_rps": 150},
+}
+
+
+def _etapa(cliente: dados.ClienteAPI, funcao: Callable[[], Any]) -> Tuple[Any, float, Dict[str, float]]:
+    # (resultado, segundos, contadores do cliente só desta etapa)
+    antes = cliente.metricas.totais()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao()
+    segundos = time.perf_counter() - inicio
+    depois = cliente.metricas.totais()
+    return resultado, segundos, {c: depois[c] - antes[c] for c in dados.MetricasEndpoints.CAMPOS}
+
+
+def rodar_perfil(perfil: Dict[str, Any], per_page: int, workers: int, taxa: float, latencia: float,
+                 retry_after: float, base_sleep: float, semente: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Roda a coleta contra um mock com `perfil`. Devolve (uma linha por etapa, dados coletados).
+    """
+    servidor = mock_api.criar_servidor(latencia_s=latencia, retry_after_s=retry_after, semente=semente, **perfil)
+    url = mock_api.iniciar_em_thread(servidor)
+    estado = mock_api.estado_do(servidor)
+    cliente = dados.ClienteAPI(url, {}, pool=workers, limitador=dados.LimitadorTaxa(taxa=taxa),
+                               base_sleep=base_sleep)
+    linhas: List[Dict[str, Any]] = []
+    coletado: Dict[str, Any] = {}
+    try:
+        etapas = [
+            ("login", lambda: cliente.login(), lambda r: 1),
+            ("listar_pokemons", lambda: dados.listar_pokemons(cliente, per_page=per_page, workers=workers), len),
+            ("listar_combates", lambda: dados.listar_combates(cliente, per_page=per_page, workers=workers), len),
+            ("atributos", lambda: dados.baixar_atributos_para_ids(
+                cliente, pd.unique(coletado["listar_combates"][dados.armazenamento.COLUNAS_ID].to_numpy().ravel()),
+                workers=workers), len),
+        ]
+        for nome, funcao, contar in etapas:
+            falhas_antes = estado.falhas_429 + estado.falhas_5xx
+            resultado, segundos, contadores = _etapa(cliente, funcao)
+            coletado[nome] = resultado
+            n = contar(resultado)
+            linhas.append({
+                "etapa": nome, "segundos": segundos, "linhas": n, "linhas_por_s": n / segundos if segundos else None,
+                **{c: contadores[c] for c in ("requisicoes", "repeticoes", "respostas_429", "erros")},
+                "falhas_injetadas": estado.falhas_429 + estado.falhas_5xx - falhas_antes,
+            })
+    finally:
+        cliente.fechar()
+        servidor.shutdown()
+        servidor.server_close()
+    return linhas, coletado
+
+
+def _iguais(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    for chave in ("listar_pokemons", "listar_combates", "atributos"):
+        x, y = a[chave], b[chave]
+        if chave == "atributos":
+            x, y = x.sort_values("id").reset_index(drop=True), y.sort_values("id").reset_index(drop=True)
+        if not x.equals(y):
+            return False
+    return True
+
+
+def rodar(perfis: List[str], tamanhos_pagina: List[int], workers: int, taxa: float, latencia: float,
+          retry_after: float, base_sleep: float, semente: int) -> pd.DataFrame:
+    resultados = []
+    for per_page in tamanhos_pagina:
+        referencia = None
+        for nome in perfis:
+            inicio = time.perf_counter()
+            linhas, coletado = rodar_perfil(PERFIS[nome], per_page, workers, taxa, latencia,
+                                            retry_after, base_sleep, semente)
+            total = time.perf_counter() - inicio
+            if referencia is None:
+                # O primeiro perfil (normalmente o limpo) é a referência dos dados coletados
+                referencia = coletado
+            igual = _iguais(coletado, referencia)
+            for linha in linhas:
+                resultados.append({"perfil": nome, "per_page": per_page, **linha,
+                                   "total_s": total, "igual_referencia": igual})
+            resumo = pd.DataFrame(linhas)
+            print(f"{nome:<15} per_page={per_page:<5} {total:7.2f} s | "
+                  f"{int(resumo['requisicoes'].sum())} req, {int(resumo['repeticoes'].sum())} repetidas, "
+                  f"{int(resumo['respostas_429'].sum())}×429, {int(resumo['falhas_injetadas'].sum())} falhas injetadas"
+                  f"{'' if igual else ' | DADOS DIFERENTES DA REFERÊNCIA'}")
+    return pd.DataFrame(resultados)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--perfis", nargs="+", default=list(PERFIS), choices=list(PERFIS))
+    parser.add_argument("--per-page", type=int, nargs="+", default=[50, 200], help="tamanhos de página a medir")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--taxa", type=float, default=200.0, help="teto de requisições/s do limitador do cliente")
+    parser.add_argument("--latencia", type=float, default=0.0, help="latência simulada por requisição (s)")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After dos 429 do mock (s)")
+    parser.add_argument("--base-sleep", type=float, default=0.1,
+                        help="espera base do backoff do cliente (s); o dados.py usa 0.6")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", default=None, help="grava os resultados por etapa neste JSON")
+    args = parser.parse_args()
+
+    df = rodar(args.perfis, args.per_page, args.workers, args.taxa, args.latencia, args.retry_after,
+               args.base_sleep, args.semente)
+    print()
+    print(df.drop(columns=["total_s"]).round({"segundos": 3, "linhas_por_s": 0}).to_string(index=False))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "resultados": df.to_dict(orient="records")}, f,
+                      ensure_ascii=False, indent=2)
+        print(f"Resultados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Confere os intervalos de `intervalos.py` (multinomial sobre as categorias de cada taxa) contra o
+bootstrap direto, que reamostra as linhas do log de combates, e mede o tempo dos dois.
+
+Com as sementes fixas o resultado é determinístico. As duas reamostragens usam sorteios
+diferentes, então os limites não batem bit a bit: a diferença de cada limite tem que ficar abaixo
+de `--tolerancia` vezes a largura do intervalo.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.intervalos --combates 50000 --reamostras 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+import armazenamento
+import confrontos
+import intervalos
+import motor
+from benchmarks import sintetico
+
+
+def bootstrap_direto(first: np.ndarray, second: np.ndarray, winner: np.ndarray, indice: motor.IndiceAtributos,
+                     reamostras: int, nivel: float, seed: int):
+    """
+    Limites por tipo e de lendários reamostrando as linhas com reposição (o bootstrap de definição).
+    """
+    rng = np.random.default_rng(seed)
+    tipos = indice.tipos.astype(float)
+    # Contribuição de cada linha para vitórias e participações por tipo, e para os lendários
+    vitorias_linha = tipos[winner]
+    participacoes_linha = tipos[first] + tipos[second]
+    lendario = (indice.conhecido[winner] & indice.lendario[winner]).astype(float)
+    outro = (indice.conhecido[winner] & ~indice.lendario[winner]).astype(float)
+    n = len(first)
+    taxas = np.empty((reamostras, tipos.shape[1]))
+    proporcao = np.empty(reamostras)
+    for r in range(reamostras):
+        # Quantas vezes cada linha saiu na reamostra
+        vezes = np.bincount(rng.integers(0, n, size=n), minlength=n).astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            taxas[r] = (vezes @ vitorias_linha) / (vezes @ participacoes_linha)
+            proporcao[r] = (vezes @ lendario) / (vezes @ lendario + vezes @ outro)
+    return intervalos._quantis(taxas, nivel).T, intervalos._quantis(proporcao, nivel)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--combates", type=int, default=50_000)
+    parser.add_argument("--pokemons", type=int, default=300)
+    parser.add_argument("--reamostras", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerancia", type=float, default=0.15,
+                        help="diferença máxima de cada limite, em frações da largura do intervalo")
+    args = parser.parse_args()
+
+    atributos = armazenamento.tipar_atributos(sintetico.gerar_atributos(args.pokemons, seed=args.seed))
+    indice = motor.IndiceAtributos(atributos)
+    df = sintetico.gerar_combates(args.combates, atributos, seed=args.seed, com_nomes=False)
+    first, second, winner = (df[c].to_numpy(dtype=np.int64) for c in armazenamento.COLUNAS_ID)
+    matriz = confrontos.MatrizConfrontos(indice.tamanho)
+    matriz.atualizar(first, second, winner)
+
+    inicio = time.perf_counter()
+    resultado = intervalos.calcular(matriz, indice, args.reamostras, seed=args.seed)
+    t_multinomial = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    tipos_direto, lendarios_direto = bootstrap_direto(first, second, winner, indice, args.reamostras,
+                                                      intervalos.NIVEL, args.seed + 1)
+    t_direto = time.perf_counter() - inicio
+
+    print(f"{'tipo':>10} {'multinomial':>21} {'direto':>21} {'dif/largura':>12}")
+    piores = []
+    pares = list(zip(resultado["tipos"], resultado["limites_tipos"], tipos_direto))
+    pares.append(("lendários", resultado["limites_lendarios"], lendarios_direto))
+    for nome, (a_min, a_max), (b_min, b_max) in pares:
+        largura = max(b_max - b_min, 1e-12)
+        pior = max(abs(a_min - b_min), abs(a_max - b_max)) / largura
+        piores.append(pior)
+        print(f"{nome:>10} [{a_min:.4f}, {a_max:.4f}]     [{b_min:.4f}, {b_max:.4f}]     {pior:>10.3f}")
+    print(f"Multinomial: {t_multinomial:.3f} s | direto: {t_direto:.3f} s ({args.combates} combates, "
+          f"{args.reamostras} reamostras)")
+    assert max(piores) <= args.tolerancia, "os intervalos da multinomial não batem com o bootstrap direto"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Confere `janelas.JanelaCombates` contra a contagem direta sobre o log de combates, com semente fixa.
+
+O log sintético (com alguns ids nulos) entra em lotes de tamanho aleatório, com o estado gravado e
+relido no meio, e poucos pontos de prefixo, para a compactação acontecer várias vezes. Depois:
+
+- a janela corrente tem que ter as vitórias e participações dos últimos `tamanho` combates válidos;
+- cada ponto da tendência tem que ter as contagens dos `largura_tendencia` combates que terminam
+  nele, e essa largura não pode passar de `tamanho`;
+- o estado incremental tem que dar a mesma série que consumir o log de uma vez.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.janelas --combates 300000 --tamanho 5000 --passo 500 --max-pontos 64
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import janelas
+
+
+def gerar_log(n: int, n_ids: int, rng: np.random.Generator):
+    first = rng.integers(1, n_ids + 1, size=n)
+    second = rng.integers(1, n_ids + 1, size=n)
+    winner = np.where(rng.random(n) < 0.5, first, second)
+    # Uns poucos combates com id nulo: não entram nas janelas
+    nulos = rng.random(n) < 0.001
+    winner[nulos] = -1
+    return np.arange(n, dtype=np.int64), first, second, winner
+
+
+def contagens_diretas(first, second, winner, n_ids: int):
+    vitorias = np.bincount(winner, minlength=n_ids)
+    participacoes = np.bincount(first, minlength=n_ids) + np.bincount(second, minlength=n_ids)
+    return vitorias, participacoes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--combates", type=int, default=300_000)
+    parser.add_argument("--ids", type=int, default=200)
+    parser.add_argument("--tamanho", type=int, default=5_000)
+    parser.add_argument("--passo", type=int, default=500)
+    parser.add_argument("--max-pontos", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    seq, first, second, winner = gerar_log(args.combates, args.ids, rng)
+
+    inicio = time.perf_counter()
+    janela = janelas.JanelaCombates(args.tamanho, args.passo, args.max_pontos)
+    cortes = np.sort(rng.integers(0, args.combates, size=200))
+    with tempfile.TemporaryDirectory(prefix="bench-janelas-") as pasta:
+        caminho = os.path.join(pasta, "janelas.npz")
+        for i, (a, b) in enumerate(zip(np.r_[0, cortes], np.r_[cortes, args.combates])):
+            janela.atualizar(seq[a:b], first[a:b], second[a:b], winner[a:b])
+            if i == len(cortes) // 2:
+                janela.salvar(caminho)
+                janela = janelas.JanelaCombates.carregar(caminho)
+    t_incremental = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    de_uma_vez = janelas.JanelaCombates(args.tamanho, args.passo, args.max_pontos)
+    de_uma_vez.atualizar(seq, first, second, winner)
+    t_uma_vez = time.perf_counter() - inicio
+
+    validos = winner >= 0
+    v_seq, v_first, v_second, v_winner = seq[validos], first[validos], second[validos], winner[validos]
+    n_ids = janela.n_ids
+
+    vitorias, participacoes = contagens_diretas(v_first[-args.tamanho:], v_second[-args.tamanho:],
+                                                v_winner[-args.tamanho:], n_ids)
+    assert np.array_equal(janela.vitorias, vitorias), "janela corrente: vitórias diferentes da contagem direta"
+    assert np.array_equal(janela.participacoes, participacoes), "janela corrente: participações diferentes"
+
+    largura = janela.largura_tendencia
+    assert largura <= args.tamanho, f"cada ponto da tendência cobre {largura} combates, mais que {args.tamanho}"
+    seqs, s_vitorias, s_participacoes = janela._series()
+    # O último ponto é a janela corrente (já conferida); os outros, janelas de `largura` combates
+    for k, fim in enumerate(seqs[:-1]):
+        ate = np.searchsorted(v_seq, fim, side="right")
+        de = ate - largura
+        vitorias, participacoes = contagens_diretas(v_first[de:ate], v_second[de:ate], v_winner[de:ate], n_ids)
+        assert np.array_equal(s_vitorias[k], vitorias), f"ponto {k} (seq {fim}): vitórias diferentes"
+        assert np.array_equal(s_participacoes[k], participacoes), f"ponto {k} (seq {fim}): participações diferentes"
+
+    outra = de_uma_vez._series()
+    assert all(np.array_equal(x, y) for x, y in zip((seqs, s_vitorias, s_participacoes), outra)), \
+        "o estado incremental não bate com o log consumido de uma vez"
+
+    print(f"{args.combates} combates, janela de {args.tamanho}, passo final {janela.passo}, "
+          f"{len(seqs)} pontos de {largura} combates: iguais à contagem direta")
+    print(f"Incremental ({len(cortes) + 1} lotes, com gravação no meio): {t_incremental:.3f} s | "
+          f"de uma vez: {t_uma_vez:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compara o tempo de parede da paginação serial com a concorrente contra o mock local da API.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.paginacao --latencia 0.03 --per-page 50 --workers 8 --taxa 100
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import dados
+import mock_api
+
+
+def _cronometrar(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    # Os prints por página atrapalham a leitura do resultado
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latencia", type=float, default=0.03, help="latência simulada por requisição (s)")
+    parser.add_argument("--per-page", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--taxa", type=float, default=100.0, help="teto de requisições/s do limitador")
+    parser.add_argument("--throttle", type=float, default=0.18, help="sleep entre páginas no modo serial (s)")
+    parser.add_argument("--sem-total", action="store_true", help="força a descoberta de páginas por sondagem")
+    args = parser.parse_args()
+
+    servidor = mock_api.criar_servidor(latencia_s=args.latencia, informar_total=not args.sem_total)
+    url = mock_api.iniciar_em_thread(servidor)
+    try:
+        cliente = dados.ClienteAPI(url, {}, pool=1)
+        cliente.login()
+        serial, t_serial = _cronometrar(
+            dados.listar_combates, cliente, per_page=args.per_page, throttle_s=args.throttle,
+        )
+        cliente.fechar()
+        # Pool do tamanho dos workers: cada thread reaproveita a sua conexão (keep-alive)
+        cliente = dados.ClienteAPI(url, {}, pool=args.workers, limitador=dados.LimitadorTaxa(taxa=args.taxa))
+        cliente.login()
+        concorrente, t_conc = _cronometrar(
+            dados.listar_combates, cliente, per_page=args.per_page, workers=args.workers,
+        )
+        cliente.fechar()
+    finally:
+        servidor.shutdown()
+
+    assert serial.equals(concorrente), "a paginação concorrente mudou o conteúdo ou a ordem dos combates"
+    print(f"Combates: {len(serial)} | páginas de {args.per_page} | latência {args.latencia * 1000:.0f} ms")
+    print(f"Serial (throttle {args.throttle}s):        {t_serial:8.2f} s")
+    print(f"Concorrente ({args.workers} workers, {args.taxa:g} req/s): {t_conc:8.2f} s")
+    print(f"Speedup: {t_serial / t_conc:.1f}x")
+    cliente.metricas.imprimir()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Confere a sincronização incremental de combates (`dados.sincronizar_combates`) contra o mock local
+da API: depois de cada cenário, a loja tem que ter exatamente os combates que a API serve, na
+mesma ordem, e a execução sem novidades tem que custar uma requisição de página.
+
+Cenários, sobre os mesmos arquivos de loja e checkpoint:
+1. sincronização completa de uma parte do log;
+2. combates novos no fim (a última página cresce e surgem páginas novas);
+3. execução interrompida no meio, com lixo de uma gravação parcial no fim da loja, e retomada;
+4. nenhuma novidade;
+5. uma página antiga alterada, só vista com `revalidar=True`.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.sincronizacao --combates 5000 --per-page 50
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import dados
+import mock_api
+
+
+class Interrupcao(Exception):
+    pass
+
+
+def _conferir(cenario: str, loja: str, servidos) -> None:
+    esperado = pd.DataFrame(servidos, columns=dados.COLUNAS_LOJA[1:]).astype("Int64")
+    obtido = pd.read_csv(loja, dtype="Int64").drop(columns="pagina")
+    assert obtido.equals(esperado), f"{cenario}: a loja não bate com os combates da API"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--combates", type=int, default=5000, help="combates servidos no fim (tirados do CSV do repositório)")
+    parser.add_argument("--per-page", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    servidor = mock_api.criar_servidor()
+    url = mock_api.iniciar_em_thread(servidor)
+    estado = mock_api.estado_do(servidor)
+    todos = estado.combates[:args.combates]
+    # Começa no meio de uma página, para a última página conhecida crescer no cenário 2
+    inicial = int(len(todos) * 0.6) // args.per_page * args.per_page + args.per_page // 2
+    cliente = dados.ClienteAPI(url, {}, pool=args.workers)
+    cliente.login()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-sync-") as pasta:
+            loja = os.path.join(pasta, "combates_brutos.csv")
+            checkpoint = os.path.join(pasta, "sync_combates.json")
+
+            def sincronizar(revalidar: bool = False) -> float:
+                inicio = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    dados.sincronizar_combates(cliente, loja, checkpoint, per_page=args.per_page,
+                                               workers=args.workers, revalidar=revalidar, carregar=False)
+                return time.perf_counter() - inicio
+
+            estado.combates = todos[:inicial]
+            t = sincronizar()
+            _conferir("completa", loja, estado.combates)
+            print(f"1. completa ({inicial} combates): {t:.2f} s")
+
+            estado.combates = todos[:(inicial + len(todos)) // 2]
+            t = sincronizar()
+            _conferir("combates novos", loja, estado.combates)
+            print(f"2. combates novos (até {len(estado.combates)}): {t:.2f} s")
+
+            # Cai depois de algumas páginas e deixa meia linha no fim da loja
+            estado.combates = todos
+            requisitar = cliente.requisitar
+            paginas = []
+
+            def requisitar_e_cair(method, caminho, **kwargs):
+                if caminho == "/combats":
+                    paginas.append(1)
+                    if len(paginas) > 3 * args.workers:
+                        raise Interrupcao()
+                return requisitar(method, caminho, **kwargs)
+
+            cliente.requisitar = requisitar_e_cair
+            try:
+                sincronizar()
+                raise AssertionError("retomada: a sincronização deveria ter sido interrompida")
+            except Interrupcao:
+                pass
+            finally:
+                cliente.requisitar = requisitar
+            gravadas = pd.read_csv(loja).shape[0]
+            assert gravadas < len(estado.combates), "retomada: a interrupção veio depois do fim"
+            with open(loja, "a", encoding="utf-8") as f:
+                f.write("999,1,2")
+            t = sincronizar()
+            _conferir("retomada", loja, estado.combates)
+            print(f"3. interrompida com {gravadas} combates e retomada ({len(estado.combates)}): {t:.2f} s")
+
+            antes = cliente.metricas.totais()["requisicoes"]
+            t = sincronizar()
+            requisicoes = cliente.metricas.totais()["requisicoes"] - antes
+            _conferir("sem novidades", loja, estado.combates)
+            assert requisicoes == 1, f"sem novidades: {requisicoes} requisições em vez de 1"
+            print(f"4. sem novidades: {t:.3f} s, {requisicoes} requisição")
+
+            alterado = dict(todos[args.per_page + 1])
+            alterado["winner"] = (alterado["second_pokemon"] if alterado["winner"] == alterado["first_pokemon"]
+                                  else alterado["first_pokemon"])
+            estado.combates = todos[:args.per_page + 1] + [alterado] + todos[args.per_page + 2:]
+            t = sincronizar(revalidar=True)
+            _conferir("revalidação", loja, estado.combates)
+            print(f"5. página antiga alterada, com revalidar: {t:.2f} s")
+    finally:
+        cliente.fechar()
+        servidor.shutdown()
+        servidor.server_close()
+    print("Loja igual aos combates da API em todos os cenários.")
+
+
+if __name__ == "__main__":
+    main()
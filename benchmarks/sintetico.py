@@ -0,0 +1,140 @@
+"""
+Dados sintéticos com o mesmo esquema de combates_com_nomes e atributos_pokemons.csv.
+
+Os ids não aparecem com a mesma frequência: a popularidade segue uma Zipf (`assimetria`, 0 =
+uniforme), como no log real, em que poucos Pokémon concentram muitos combates. O vencedor é
+sorteado pela diferença de velocidade e de força total, então as análises (correlação, tipos,
+força) têm sinal para achar.
+
+Para tamanhos que não cabem em memória com nomes (100 milhões de combates), `gravar_combates`
+gera e grava em lotes pelo `EscritorCombates`, com os nomes como dicionário.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.sintetico --combates 100000000 --pasta /tmp/sintetico
+"""
+import argparse
+import os
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import armazenamento
+
+TIPOS = armazenamento.TIPOS
+COLUNAS_STATS = ["hp", "attack", "defense", "sp_attack", "sp_defense", "speed"]
+LINHAS_POR_LOTE = 2_000_000
+
+
+def gerar_atributos(n_pokemons: int = 800, seed: int = 0) -> pd.DataFrame:
+    """
+    Tabela de atributos como a que dados.py grava (já com forca_total, type1..type3 e tipos_mascara).
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n_pokemons + 1)
+    lendario = rng.random(n_pokemons) < 0.08
+    stats = rng.normal(70, 22, size=(n_pokemons, len(COLUNAS_STATS))) * np.where(lendario, 1.4, 1.0)[:, None]
+    stats = np.clip(stats, 5, 230).round()
+    tipo1 = rng.integers(0, len(TIPOS), size=n_pokemons)
+    # Metade tem um segundo tipo, diferente do primeiro
+    tipo2 = np.where(rng.random(n_pokemons) < 0.5,
+                     (tipo1 + rng.integers(1, len(TIPOS), size=n_pokemons)) % len(TIPOS), -1)
+    nomes_tipo = np.array(TIPOS, dtype=object)
+    type1 = nomes_tipo[tipo1]
+    type2 = np.where(tipo2 >= 0, nomes_tipo[np.maximum(tipo2, 0)], None)
+    df = pd.DataFrame(stats, columns=COLUNAS_STATS)
+    df.insert(0, "id", ids)
+    df.insert(1, "name", [f"Sintetico{i}" for i in ids])
+    df["generation"] = 1 + (ids - 1) * 6 // n_pokemons
+    df["legendary"] = np.where(lendario, "true", "false")
+    df["types"] = [t1 if t2 is None else f"{t1}/{t2}" for t1, t2 in zip(type1, type2)]
+    df["forca_total"] = stats.sum(axis=1)
+    df["type1"] = type1
+    df["type2"] = type2
+    df["type3"] = None
+    df[armazenamento.COLUNA_MASCARA_TIPOS] = (np.uint32(1) << tipo1.astype(np.uint32)) | np.where(
+        tipo2 >= 0, np.uint32(1) << np.maximum(tipo2, 0).astype(np.uint32), np.uint32(0))
+    return df
+
+
+def _popularidade(n: int, assimetria: float, rng: np.random.Generator) -> np.ndarray:
+    # Zipf sobre uma permutação dos ids: quem é popular não depende do id
+    pesos = 1.0 / np.arange(1, n + 1) ** assimetria
+    pesos = pesos[rng.permutation(n)]
+    return pesos / pesos.sum()
+
+
+def iterar_lotes(n: int, atributos: pd.DataFrame, seed: int = 0, assimetria: float = 1.0,
+                 linhas_por_lote: int = LINHAS_POR_LOTE) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    `n` combates em lotes de (first, second, winner) entre os ids de `atributos`.
+    """
+    rng = np.random.default_rng(seed)
+    ids = atributos["id"].to_numpy(dtype=np.int64)
+    probabilidade = _popularidade(len(ids), assimetria, rng)
+    speed = pd.to_numeric(atributos["speed"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    total = pd.to_numeric(atributos["forca_total"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    for inicio in range(0, n, linhas_por_lote):
+        m = min(linhas_por_lote, n - inicio)
+        a = rng.choice(len(ids), size=m, p=probabilidade)
+        b = rng.choice(len(ids), size=m, p=probabilidade)
+        logito = (speed[a] - speed[b]) / 15.0 + (total[a] - total[b]) / 150.0
+        first, second = ids[a], ids[b]
+        yield first, second, np.where(rng.random(m) < 1.0 / (1.0 + np.exp(-logito)), first, second)
+
+
+def gerar_combates(n: int, atributos: pd.DataFrame, seed: int = 0, assimetria: float = 1.0,
+                   com_nomes: bool = True) -> pd.DataFrame:
+    """
+    `n` combates entre ids de `atributos` em memória, com as colunas de nome (ou só os ids).
+    """
+    first, second, winner = (np.concatenate(v) for v in zip(*iterar_lotes(n, atributos, seed, assimetria)))
+    df = pd.DataFrame({"first_pokemon": first, "second_pokemon": second, "winner": winner})
+    if com_nomes:
+        nomes = pd.Series(atributos["name"].to_numpy(), index=atributos["id"].to_numpy())
+        for col_id, col_nome in zip(armazenamento.COLUNAS_ID, armazenamento.COLUNAS_NOME):
+            df[col_nome] = nomes.reindex(df[col_id]).to_numpy()
+    return df
+
+
+def gravar_combates(n: int, atributos: pd.DataFrame, base: str = armazenamento.BASE_COMBATES,
+                    seed: int = 0, assimetria: float = 1.0, linhas_por_lote: int = LINHAS_POR_LOTE) -> str:
+    """
+    Gera e grava `n` combates em `base` (.feather, ou .csv sem pyarrow) lote a lote.
+    """
+    nomes = atributos.set_index("id")["name"]
+    with armazenamento.EscritorCombates(base, nomes=nomes, linhas_por_lote=min(linhas_por_lote, max(n, 1))) as escritor:
+        for lote in iterar_lotes(n, atributos, seed, assimetria, linhas_por_lote):
+            escritor.adicionar(*lote)
+    return escritor.caminho
+
+
+def gravar_conjunto(pasta: str, n_combates: int, n_pokemons: int = 800, seed: int = 0,
+                    assimetria: float = 1.0) -> Tuple[str, str]:
+    """
+    Grava um conjunto completo (atributos_pokemons.csv e combates) em `pasta`.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    atributos = gerar_atributos(n_pokemons, seed)
+    caminho_atributos = os.path.join(pasta, armazenamento.ATRIBUTOS_CSV)
+    atributos.to_csv(caminho_atributos, index=False)
+    caminho = gravar_combates(n_combates, atributos, os.path.join(pasta, armazenamento.BASE_COMBATES),
+                              seed, assimetria)
+    return caminho_atributos, caminho
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--combates", type=int, default=1_000_000)
+    parser.add_argument("--pokemons", type=int, default=800)
+    parser.add_argument("--assimetria", type=float, default=1.0, help="expoente da Zipf dos ids (0 = uniforme)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pasta", default="sintetico")
+    args = parser.parse_args(argv)
+
+    caminho_atributos, caminho = gravar_conjunto(args.pasta, args.combates, args.pokemons, args.seed, args.assimetria)
+    print(f"{args.combates} combates em {caminho} e {args.pokemons} Pokémon em {caminho_atributos}")
+
+
+if __name__ == "__main__":
+    main()
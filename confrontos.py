@@ -0,0 +1,169 @@
+"""
+Confrontos diretos: quantas vezes cada Pokémon venceu cada outro.
+
+`MatrizConfrontos` é uma matriz esparsa id×id de vitórias. Cada lote de combates entra como COO
+(pares vencedor/perdedor, somados com `np.unique`) e é fundido numa lista ordenada de chaves
+`vencedor * tamanho + perdedor`; dela sai o CSR (início da linha de cada vencedor e os perdedores
+em ordem), e a consulta de um par é uma busca binária dentro de uma linha. Os encontros entre x e
+y são as vitórias de x sobre y mais as de y sobre x.
+
+A matriz tipo×tipo (vitórias e taxa de vitória de um tipo contra outro) é derivada da esparsa
+pelos tipos de cada id, então acompanha qualquer atualização sem voltar aos combates.
+"""
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+COLUNAS = ["vencedor", "perdedor", "vitorias"]
+
+
+class MatrizConfrontos:
+    """
+    Vitórias de cada id sobre cada outro, em formato esparso. Atualize com `atualizar` a cada
+    lote; `confronto(x, y)` responde sem varrer os combates.
+    """
+
+    def __init__(self, tamanho: int = 0):
+        self.tamanho = int(tamanho)
+        self.chaves = np.zeros(0, dtype=np.int64)
+        self.vitorias = np.zeros(0, dtype=np.int64)
+        self._csr: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def de_combates(cls, first: np.ndarray, second: np.ndarray, winner: np.ndarray,
+                    tamanho: int = 0) -> "MatrizConfrontos":
+        matriz = cls(tamanho)
+        matriz.atualizar(first, second, winner)
+        return matriz
+
+    @classmethod
+    def de_tabela(cls, df: pd.DataFrame, tamanho: int = 0) -> "MatrizConfrontos":
+        """
+        Reconstrói a matriz a partir da tabela COO de `tabela()` (a que vai para agregados/).
+        """
+        matriz = cls(tamanho)
+        vencedor = df["vencedor"].to_numpy(dtype=np.int64)
+        perdedor = df["perdedor"].to_numpy(dtype=np.int64)
+        matriz._adicionar(vencedor, perdedor, df["vitorias"].to_numpy(dtype=np.int64))
+        return matriz
+
+    @property
+    def nnz(self) -> int:
+        return len(self.chaves)
+
+    def atualizar(self, first: np.ndarray, second: np.ndarray, winner: np.ndarray) -> None:
+        first = np.asarray(first, dtype=np.int64)
+        second = np.asarray(second, dtype=np.int64)
+        winner = np.asarray(winner, dtype=np.int64)
+        # Vencedor que não é nenhum dos dois participantes não entra na matriz
+        valido = (winner == first) | (winner == second)
+        perdedor = np.where(winner == first, second, first)[valido]
+        self._adicionar(winner[valido], perdedor, None)
+
+    def _adicionar(self, vencedor: np.ndarray, perdedor: np.ndarray, pesos: Optional[np.ndarray]) -> None:
+        if not len(vencedor):
+            return
+        maior = int(max(vencedor.max(), perdedor.max())) + 1
+        if maior > self.tamanho:
+            self._redimensionar(maior)
+        chaves = vencedor * self.tamanho + perdedor
+        # Junta as chaves novas com as existentes e soma as repetidas
+        todas = np.concatenate([self.chaves, chaves])
+        pesos = np.ones(len(chaves), dtype=np.int64) if pesos is None else pesos
+        self.chaves, inverso = np.unique(todas, return_inverse=True)
+        self.vitorias = np.bincount(inverso, weights=np.concatenate([self.vitorias, pesos]),
+                                    minlength=len(self.chaves)).astype(np.int64)
+        self._csr = None
+
+    def _redimensionar(self, tamanho: int) -> None:
+        # A ordem (vencedor, perdedor) das chaves não muda com o novo tamanho
+        if self.tamanho:
+            self.chaves = (self.chaves // self.tamanho) * tamanho + self.chaves % self.tamanho
+        self.tamanho = tamanho
+
+    def _linhas(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._csr is None:
+            vencedor = self.chaves // max(self.tamanho, 1)
+            inicio = np.searchsorted(vencedor, np.arange(self.tamanho + 1))
+            self._csr = (inicio, self.chaves % max(self.tamanho, 1))
+        return self._csr
+
+    def vitorias_sobre(self, x: int, y: int) -> int:
+        """
+        Vitórias de `x` sobre `y`.
+        """
+        if not (0 <= x < self.tamanho and 0 <= y < self.tamanho):
+            return 0
+        inicio, perdedores = self._linhas()
+        a, b = inicio[x], inicio[x + 1]
+        j = a + int(np.searchsorted(perdedores[a:b], y))
+        return int(self.vitorias[j]) if j < b and perdedores[j] == y else 0
+
+    def confronto(self, x: int, y: int) -> Tuple[int, int, int]:
+        """
+        (encontros, vitórias de x, vitórias de y) entre `x` e `y`.
+        """
+        vx = self.vitorias_sobre(x, y)
+        if x == y:
+            return vx, vx, vx
+        vy = self.vitorias_sobre(y, x)
+        return vx + vy, vx, vy
+
+    def tabela(self) -> pd.DataFrame:
+        """
+        A matriz em COO: uma linha por par (vencedor, perdedor) com vitórias.
+        """
+        tamanho = max(self.tamanho, 1)
+        return pd.DataFrame({
+            "vencedor": self.chaves // tamanho,
+            "perdedor": self.chaves % tamanho,
+            "vitorias": self.vitorias,
+        }, columns=COLUNAS)
+
+    def densa(self, ids: Sequence[int]) -> np.ndarray:
+        """
+        Submatriz densa de vitórias (linha vence coluna) só entre `ids`, para o heatmap.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        posicao = np.full(self.tamanho, -1, dtype=np.int64)
+        dentro = (ids >= 0) & (ids < self.tamanho)
+        posicao[ids[dentro]] = np.flatnonzero(dentro)
+        tamanho = max(self.tamanho, 1)
+        pv, pp = posicao[self.chaves // tamanho], posicao[self.chaves % tamanho]
+        ok = (pv >= 0) & (pp >= 0)
+        saida = np.zeros((len(ids), len(ids)), dtype=np.int64)
+        np.add.at(saida, (pv[ok], pp[ok]), self.vitorias[ok])
+        return saida
+
+    def por_tipo(self, indice) -> pd.DataFrame:
+        """
+        Matriz tipo×tipo em formato longo: `Vitorias` de Pokémon do `Tipo` sobre os do `Adversario`,
+        `Encontros` entre os dois e `WinRate`. `indice` é um `motor.IndiceAtributos`; ids sem
+        atributos ficam de fora. É Tᵀ·V·T, com V a matriz esparsa id × id de vitórias e T a
+        matriz id × tipo.
+        """
+        nomes = indice.vocab_tipos
+        k = len(nomes)
+        tipos = indice.tipos.astype(float)
+
+        tamanho = max(self.tamanho, 1)
+        vencedor, perdedor = self.chaves // tamanho, self.chaves % tamanho
+        ok = (vencedor < indice.tamanho) & (perdedor < indice.tamanho)
+        vencedor, perdedor, vitorias = vencedor[ok], perdedor[ok], self.vitorias[ok]
+        # V·T coluna a coluna (id × tipo do perdedor), sem montar V densa, e depois Tᵀ·(V·T)
+        contra_tipo = np.column_stack([
+            np.bincount(vencedor, weights=vitorias * tipos[perdedor, m], minlength=indice.tamanho)
+            for m in range(k)
+        ]) if k else np.zeros((indice.tamanho, 0))
+        matriz = tipos.T @ contra_tipo
+        encontros = matriz + matriz.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            taxa = np.where(encontros > 0, matriz / encontros, np.nan)
+        return pd.DataFrame({
+            "Tipo": np.repeat(nomes, k),
+            "Adversario": np.tile(nomes, k),
+            "Vitorias": matriz.ravel().astype(np.int64),
+            "Encontros": encontros.ravel().astype(np.int64),
+            "WinRate": taxa.ravel(),
+        })
@@ -0,0 +1,297 @@
+"""
+Handle compartilhado dos dados do dashboard.
+
+`ConjuntoDados` junta os atributos tipados, os agregados materializados e, sob demanda, os ids
+dos combates como arrays somente-leitura (memory map quando vêm do Feather). O app.py guarda um
+único handle por processo (`st.cache_resource`), chaveado por `assinatura_fontes`: enquanto os
+arquivos de origem não mudam, todas as sessões usam o mesmo objeto sem copiar nada.
+
+Os DataFrames entregues são compartilhados: com o Copy-on-Write do pandas, quem alterar uma
+tabela altera só a sua cópia, nunca a do handle.
+
+Os filtros do dashboard (`Filtro`) usam índices montados uma vez por handle: bitmaps por tipo,
+geração e lendário sobre os ids, e a lista invertida de combates por Pokémon. `tabelas_para`
+reagrega só as linhas que passam no filtro com o mesmo kernel da ingestão; os resultados dos
+últimos filtros ficam no handle.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import agregados
+import armazenamento
+import confrontos
+import forca
+import intervalos
+import janelas
+import modelo
+import motor
+
+
+# Resultados dos últimos filtros guardados no handle: a troca de filtro no dashboard (ou um job
+# que roda várias análises com o mesmo filtro) não reagrega os combates de novo
+FILTROS_EM_CACHE = 8
+
+
+def fontes_padrao() -> List[Optional[str]]:
+    return [
+        armazenamento.caminho_combates(),
+        armazenamento.ATRIBUTOS_CSV,
+        os.path.join(agregados.PASTA_AGREGADOS, "manifesto.json"),
+    ]
+
+
+def assinatura_fontes(caminhos: Optional[List[Optional[str]]] = None, conteudo: bool = False) -> str:
+    """
+    Versão dos dados: hash de caminho, mtime e tamanho de cada fonte (ou do conteúdo, com
+    `conteudo=True`, mais lento mas imune a mtime). Muda sempre que algum arquivo muda.
+    """
+    h = hashlib.sha1()
+    for caminho in caminhos if caminhos is not None else fontes_padrao():
+        h.update(str(caminho).encode("utf-8"))
+        if not caminho or not os.path.exists(caminho):
+            h.update(b"-")
+        elif conteudo:
+            with open(caminho, "rb") as f:
+                for bloco in iter(lambda: f.read(1 << 20), b""):
+                    h.update(bloco)
+        else:
+            st = os.stat(caminho)
+            h.update(f"{st.st_mtime_ns}:{st.st_size}".encode("ascii"))
+    return h.hexdigest()[:16]
+
+
+def _somente_leitura(v: np.ndarray) -> np.ndarray:
+    v.setflags(write=False)
+    return v
+
+
+class Filtro(NamedTuple):
+    """
+    Filtro do dashboard. Um combate entra se algum participante é de uma das `geracoes`, de um
+    dos `tipos` e tem o `lendario` pedido (vazio/None = qualquer); com `pokemon`, só os combates
+    dele, e com `adversario` também, só o confronto entre os dois.
+    """
+    geracoes: Tuple[int, ...] = ()
+    tipos: Tuple[str, ...] = ()
+    lendario: Optional[bool] = None
+    pokemon: Optional[int] = None
+    adversario: Optional[int] = None
+
+    def vazio(self) -> bool:
+        return self == Filtro()
+
+
+class ConjuntoDados:
+    """
+    Dados de uma versão das fontes. Carregue com `ConjuntoDados.carregar()`; não modifique os
+    arrays (são somente-leitura) nem conte com alterações nas tabelas sendo vistas por outros.
+    """
+
+    def __init__(self, versao: str, atributos: pd.DataFrame, tabelas: Dict[str, pd.DataFrame],
+                 base_combates: str = armazenamento.BASE_COMBATES):
+        self.versao = versao
+        self.atributos = atributos
+        self.tabelas = tabelas
+        self.base_combates = base_combates
+        self._combates: Optional[Dict[str, np.ndarray]] = None
+        self._indice: Optional[motor.IndiceAtributos] = None
+        self._indice_combates: Optional[motor.IndiceCombates] = None
+        self._confrontos: Optional[confrontos.MatrizConfrontos] = None
+        self._modelo: Optional[modelo.ModeloVitoria] = None
+        self._intervalos: Optional[Dict[str, pd.DataFrame]] = None
+        self._janelas: Optional[janelas.JanelaCombates] = None
+        self._por_filtro: "OrderedDict[Tuple[str, Filtro], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def carregar(cls, versao: Optional[str] = None,
+                 base_combates: str = armazenamento.BASE_COMBATES) -> "ConjuntoDados":
+        versao = versao if versao is not None else assinatura_fontes()
+        atributos = armazenamento.carregar_atributos()
+        tabelas = agregados.carregar_agregados()
+        if tabelas is None:
+            # Sem agregados materializados (ou velhos): calcula em fluxo a partir do arquivo
+            tabelas = agregados.calcular_agregados_do_arquivo(atributos, base_combates)
+        return cls(versao, atributos, tabelas, base_combates)
+
+    def tabela(self, nome: str) -> pd.DataFrame:
+        return self.tabelas[nome]
+
+    @property
+    def combates(self) -> Dict[str, np.ndarray]:
+        """
+        Ids dos combates (first_pokemon, second_pokemon, winner) como arrays somente-leitura,
+        carregados uma vez no primeiro acesso.
+        """
+        with self._lock:
+            if self._combates is None:
+                df = armazenamento.carregar_combates(self.base_combates, colunas=armazenamento.COLUNAS_ID)
+                if df.isna().any().any():
+                    # Ids nulos (Int32 nullable) não entram em nenhuma contagem
+                    df = df.dropna().astype("int32")
+                self._combates = {c: _somente_leitura(df[c].to_numpy()) for c in armazenamento.COLUNAS_ID}
+            return self._combates
+
+    @property
+    def indice(self) -> motor.IndiceAtributos:
+        with self._lock:
+            if self._indice is None:
+                self._indice = motor.IndiceAtributos(self.atributos)
+            return self._indice
+
+    @property
+    def indice_combates(self) -> motor.IndiceCombates:
+        """
+        Lista invertida dos combates por Pokémon, montada no primeiro filtro.
+        """
+        combates = self.combates
+        tamanho = self.indice.tamanho
+        with self._lock:
+            if self._indice_combates is None:
+                maior = max((int(v.max()) + 1 for v in combates.values() if len(v)), default=0)
+                self._indice_combates = motor.IndiceCombates(
+                    combates["first_pokemon"], combates["second_pokemon"], max(tamanho, maior),
+                )
+            return self._indice_combates
+
+    @property
+    def matriz_confrontos(self) -> confrontos.MatrizConfrontos:
+        """
+        Matriz esparsa de confrontos diretos de todos os combates, para consultas de pares.
+        """
+        with self._lock:
+            if self._confrontos is None:
+                self._confrontos = confrontos.MatrizConfrontos.de_tabela(self.tabelas["confrontos"])
+            return self._confrontos
+
+    @property
+    def janelas(self) -> janelas.JanelaCombates:
+        """
+        Janelas sobre a ordem de chegada dos combates: o estado gravado pela coleta, ou refeito
+        do arquivo se estiver velho.
+        """
+        with self._lock:
+            if self._janelas is None:
+                self._janelas = janelas.carregar_ou_calcular(base=self.base_combates)
+            return self._janelas
+
+    def _memo(self, tipo: str, filtro: Filtro, calcular: Callable[[], Any]) -> Any:
+        """
+        Resultado de `calcular` para (`tipo`, `filtro`), guardado entre os FILTROS_EM_CACHE mais recentes.
+        """
+        chave = (tipo, filtro)
+        with self._lock:
+            if chave in self._por_filtro:
+                self._por_filtro.move_to_end(chave)
+                return self._por_filtro[chave]
+        # Fora do lock: o cálculo usa as propriedades preguiçosas, que também o pegam
+        valor = calcular()
+        with self._lock:
+            self._por_filtro[chave] = valor
+            while len(self._por_filtro) > FILTROS_EM_CACHE:
+                self._por_filtro.popitem(last=False)
+        return valor
+
+    def confrontos_para(self, filtro: Filtro) -> confrontos.MatrizConfrontos:
+        if filtro.vazio():
+            return self.matriz_confrontos
+        return self._memo("confrontos", filtro,
+                          lambda: confrontos.MatrizConfrontos.de_tabela(self.tabelas_para(filtro)["confrontos"]))
+
+    def modelo_para(self, filtro: Filtro) -> modelo.ModeloVitoria:
+        """
+        Modelo de vitória: o de todos os combates vem do cache em disco (`agregados/modelos`);
+        com filtro, é ajustado em memória sobre os confrontos filtrados.
+        """
+        if not filtro.vazio():
+            return self._memo("modelo", filtro,
+                              lambda: modelo.modelo_para(self.confrontos_para(filtro), self.indice, pasta=None))
+        matriz, indice = self.matriz_confrontos, self.indice
+        with self._lock:
+            if self._modelo is None:
+                self._modelo = modelo.modelo_para(matriz, indice)
+            return self._modelo
+
+    def intervalos_para(self, filtro: Filtro) -> Dict[str, pd.DataFrame]:
+        """
+        Intervalos de confiança (bootstrap) das taxas de vitória por tipo e de lendários: os de
+        todos os combates vêm do cache em disco (`agregados/intervalos`), os com filtro da memória.
+        """
+        if not filtro.vazio():
+            return self._memo("intervalos", filtro,
+                              lambda: intervalos.intervalos_para(self.confrontos_para(filtro), self.indice, pasta=None))
+        matriz, indice = self.matriz_confrontos, self.indice
+        with self._lock:
+            if self._intervalos is None:
+                self._intervalos = intervalos.intervalos_para(matriz, indice)
+            return self._intervalos
+
+    def ids_permitidos(self, filtro: Filtro) -> Optional[np.ndarray]:
+        """
+        Máscara (por id) dos Pokémon que passam nos filtros de atributo, ou None se não há nenhum.
+        """
+        if not filtro.geracoes and not filtro.tipos and filtro.lendario is None:
+            return None
+        indice = self.indice
+        mascara = indice.conhecido.copy()
+        vazia = np.zeros(indice.tamanho, dtype=bool)
+        if filtro.geracoes:
+            mascara &= np.logical_or.reduce([indice.por_geracao.get(g, vazia) for g in filtro.geracoes])
+        if filtro.tipos:
+            mascara &= np.logical_or.reduce([indice.por_tipo.get(t, vazia) for t in filtro.tipos])
+        if filtro.lendario is not None:
+            mascara &= indice.lendario == filtro.lendario
+        return mascara
+
+    def linhas(self, filtro: Filtro) -> Optional[np.ndarray]:
+        """
+        Linhas dos combates que passam no filtro (ordenadas), ou None para todas.
+        """
+        linhas = None
+        mascara = self.ids_permitidos(filtro)
+        if mascara is not None:
+            linhas = self.indice_combates.linhas_com(mascara)
+        for pid in (filtro.pokemon, filtro.adversario):
+            if pid is None:
+                continue
+            do_pokemon = self.indice_combates.linhas_de(pid)
+            linhas = do_pokemon if linhas is None else np.intersect1d(linhas, do_pokemon, assume_unique=True)
+        return linhas
+
+    def tabelas_para(self, filtro: Filtro) -> Dict[str, pd.DataFrame]:
+        """
+        Tabelas do dashboard restritas ao filtro. Sem filtro são as materializadas; com filtro,
+        reagregadas das linhas selecionadas. As tabelas só de atributos seguem a máscara de ids.
+        """
+        if filtro.vazio():
+            return self.tabelas
+        return self._memo("tabelas", filtro, lambda: self._reagregar(filtro))
+
+    def _reagregar(self, filtro: Filtro) -> Dict[str, pd.DataFrame]:
+        linhas = self.linhas(filtro)
+        combates = self.combates
+        if linhas is not None:
+            combates = {c: v[linhas] for c, v in combates.items()}
+        ids = (combates["first_pokemon"], combates["second_pokemon"], combates["winner"])
+        tabelas = motor.contar_combates(*ids, self.indice).tabelas(self.indice)
+        matriz = confrontos.MatrizConfrontos.de_combates(*ids, self.indice.tamanho)
+        elo = forca.Elo(self.indice.tamanho)
+        elo.atualizar(*ids)
+        tabelas["confrontos"] = matriz.tabela()
+        tabelas["forca"] = forca.tabela_forca(elo, matriz, tabelas["pokemon"])
+        mascara = self.ids_permitidos(filtro)
+        atributos = self.atributos
+        if mascara is not None:
+            atributos = atributos[mascara[atributos["id"].to_numpy(dtype=np.int64)]]
+        tabelas["tipos_comuns"] = agregados.calcular_tipos_comuns(atributos)
+        tabelas["proporcao_lendarios"] = agregados.calcular_proporcao_lendarios(atributos)
+        return tabelas
+
+    def __repr__(self) -> str:
+        return f"ConjuntoDados(versao={self.versao!r})"
@@ -1,115 +1,419 @@
 import os
+import math
 import time
 import random
 import json
+import hashlib
+import argparse
+import sqlite3
+import threading
 import requests
+import numpy as np
 import pandas as pd
-from typing import Optional, Dict, Any, List, Iterable
+import agregados
+import janelas
+import armazenamento
+import instrumentacao
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Sequence, Tuple, Callable
 
-# Config
-BASE_URL = "http://ec2-52-67-119-247.sa-east-1.compute.amazonaws.com:8000"
-CREDENCIAIS = {
-    "username": os.getenv("API_USER", "kaizen-poke"),
-    "password": os.getenv("API_PASS", ""), #coloque a senha 
-}
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele usa o decodificador do requests
+    orjson = None
 
+# Config (lida pelo ClienteAPI.do_ambiente)
+URL_PADRAO = "http://ec2-52-67-119-247.sa-east-1.compute.amazonaws.com:8000"
+USUARIO_PADRAO = "kaizen-poke"
+# Paginação concorrente: threads simultâneas e teto de requisições/s compartilhado
+WORKERS = int(os.getenv("API_WORKERS", "8"))
+TAXA_MAX_RPS = float(os.getenv("API_TAXA_MAX", "20"))
 
-SESSION = requests.Session()
-SESSION.headers.update({"User-Agent": "kaizen-poke-client/1.1 (+requests)"})
+def decodificar_json(resp: requests.Response) -> Any:
+    """
+    Corpo JSON da resposta, com o orjson (bem mais rápido em páginas grandes) quando instalado.
+    """
+    return orjson.loads(resp.content) if orjson is not None else resp.json()
 
-# Infra HTTP: retry/backoff
-def request_with_retry(
-    method: str,
-    url: str,
-    *,
-    headers: Optional[Dict[str, str]] = None,
-    params: Optional[Dict[str, Any]] = None,
-    json_body: Optional[Dict[str, Any]] = None,
-    timeout: int = 20,
-    max_retries: int = 6,
-    base_sleep: float = 0.6,
-    backoff_factor: float = 1.6,
-) -> requests.Response:
-    for attempt in range(1, max_retries + 1):
-        try:
-            resp = SESSION.request(
-                method=method.upper(),
-                url=url,
-                headers=headers,
-                params=params,
-                json=json_body,
-                timeout=timeout,
-            )
+# Infra HTTP: limitador de taxa compartilhado entre threads
+class LimitadorTaxa:
+    """
+    Token bucket thread-safe: libera até `taxa` requisições por segundo, com rajadas de até `capacidade`.
+    Um 429 em qualquer thread chama `pausar`, e todas as threads esperam o Retry-After juntas.
+    """
+
+    def __init__(self, taxa: float, capacidade: Optional[float] = None):
+        if taxa <= 0:
+            raise ValueError("taxa precisa ser positiva.")
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade) if capacidade is not None else max(1.0, self.taxa)
+        self._fichas = self.capacidade
+        self._ultimo = time.monotonic()
+        self._pausa_ate = 0.0
+        self._lock = threading.Lock()
+
+    def adquirir(self) -> None:
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                if agora < self._pausa_ate:
+                    espera = self._pausa_ate - agora
+                else:
+                    self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.taxa)
+                    self._ultimo = agora
+                    if self._fichas >= 1:
+                        self._fichas -= 1
+                        return
+                    espera = (1 - self._fichas) / self.taxa
+            time.sleep(espera)
+
+    def pausar(self, segundos: float) -> None:
+        with self._lock:
+            fim = time.monotonic() + segundos
+            if fim > self._pausa_ate:
+                self._pausa_ate = fim
+                # Recomeça sem rajada acumulada depois da pausa
+                self._fichas = 0.0
+                self._ultimo = fim
+
+# Infra HTTP: métricas por endpoint
+class MetricasEndpoints:
+    """
+    Contadores thread-safe por endpoint (método + caminho, com ids trocados por {id}): requisições,
+    tentativas repetidas, respostas 429, erros, segundos de rede e bytes (no fio e depois de descomprimir).
+    """
+
+    CAMPOS = ("requisicoes", "repeticoes", "respostas_429", "erros", "segundos", "bytes_rede", "bytes")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_endpoint: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def endpoint(method: str, caminho: str) -> str:
+        partes = ["{id}" if p.isdigit() else p for p in caminho.split("?")[0].split("/")]
+        return f"{method.upper()} {'/'.join(partes)}"
+
+    def registrar(self, endpoint: str, **valores: float) -> None:
+        with self._lock:
+            atual = self._por_endpoint.setdefault(endpoint, dict.fromkeys(self.CAMPOS, 0))
+            for campo, valor in valores.items():
+                atual[campo] += valor
+
+    def totais(self) -> Dict[str, float]:
+        """
+        Soma de cada contador em todos os endpoints.
+        """
+        with self._lock:
+            return {c: sum(v[c] for v in self._por_endpoint.values()) for c in self.CAMPOS}
+
+    def tabela(self) -> pd.DataFrame:
+        with self._lock:
+            df = pd.DataFrame.from_dict(self._por_endpoint, orient="index", columns=list(self.CAMPOS))
+        df.index.name = "endpoint"
+        df["ms_por_requisicao"] = 1000 * df["segundos"] / df["requisicoes"].where(df["requisicoes"] > 0)
+        return df.sort_values("segundos", ascending=False)
+
+    def imprimir(self) -> None:
+        df = self.tabela()
+        if df.empty:
+            return
+        print("\n--- Tempo e volume por endpoint ---")
+        print(df.round({"segundos": 2, "ms_por_requisicao": 1}).to_string())
+
+# Infra HTTP: cliente
+class ClienteAPI:
+    """
+    Cliente da API: uma sessão com pool de conexões do tamanho dos workers (keep-alive entre
+    páginas), respostas comprimidas (gzip), retry/backoff, limitador de taxa opcional e token
+    renovado sozinho (antes de expirar, quando o login informa `expires_in`, ou após um 401).
+    As métricas de cada endpoint ficam em `metricas`.
+    """
+
+    def __init__(
+        self,
+        base_url: str = URL_PADRAO,
+        credenciais: Optional[Dict[str, str]] = None,
+        pool: int = WORKERS,
+        limitador: Optional[LimitadorTaxa] = None,
+        timeout: float = 20,
+        max_retries: int = 6,
+        base_sleep: float = 0.6,
+        backoff_factor: float = 1.6,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.credenciais = credenciais
+        self.limitador = limitador
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_sleep = base_sleep
+        self.backoff_factor = backoff_factor
+        self.metricas = MetricasEndpoints()
+
+        self.sessao = requests.Session()
+        # Uma conexão por worker: sem isso o urllib3 fica em 10 e descarta as que sobram
+        adaptador = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool), pool_block=True)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.headers.update({
+            "User-Agent": "kaizen-poke-client/1.2 (+requests)",
+            "Accept-Encoding": "gzip, deflate",
+        })
+
+        self.token: Optional[str] = None
+        self._expira_em = math.inf
+        self._lock_token = threading.Lock()
+        # Serializa os logins de renovação; `_lock_token` só protege a troca do token
+        self._lock_renovacao = threading.Lock()
+
+    @classmethod
+    def do_ambiente(cls, **kwargs: Any) -> "ClienteAPI":
+        """
+        Cliente configurado por API_BASE_URL, API_USER e API_PASS.
+        """
+        credenciais = {
+            "username": os.getenv("API_USER", USUARIO_PADRAO),
+            "password": os.getenv("API_PASS", ""), #coloque a senha 
+        }
+        return cls(os.getenv("API_BASE_URL", URL_PADRAO), credenciais, **kwargs)
+
+    def _espera(self, attempt: int) -> float:
+        return self.base_sleep * (self.backoff_factor ** (attempt - 1)) + random.uniform(0, 0.4)
+
+    def login(self) -> Optional[str]:
+        resp = self.requisitar("post", "/login", json_body=self.credenciais, autenticar=False)
+        dados = decodificar_json(resp)
+        token = dados.get("access_token") or dados.get("token")
+        with self._lock_token:
+            self.token = token
+            expira = dados.get("expires_in")
+            # Renova com folga de 10% para não mandar um token vencendo no meio de uma rajada
+            self._expira_em = time.monotonic() + 0.9 * float(expira) if isinstance(expira, (int, float)) else math.inf
+        return token
+
+    def _renovar_token(self, usado: Optional[str]) -> None:
+        # Várias threads recebem 401 ao mesmo tempo: só a primeira faz o login de novo. O login roda
+        # com o lock de renovação tomado, e quem esperava por ele já encontra o token trocado
+        with self._lock_renovacao:
+            with self._lock_token:
+                if self.token != usado:
+                    return
+                self._expira_em = -math.inf
+            print("Token expirado: fazendo login de novo.")
+            self.login()
+
+    def requisitar(
+        self,
+        method: str,
+        caminho: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        autenticar: bool = True,
+    ) -> requests.Response:
+        endpoint = MetricasEndpoints.endpoint(method, caminho)
+        url = f"{self.base_url}{caminho}"
+        renovou = False
+        for attempt in range(1, self.max_retries + 1):
+            if attempt > 1:
+                self.metricas.registrar(endpoint, repeticoes=1)
+            try:
+                if self.limitador is not None:
+                    self.limitador.adquirir()
+                h = dict(headers or {})
+                token = None
+                if autenticar:
+                    if time.monotonic() >= self._expira_em:
+                        self._renovar_token(self.token)
+                    token = self.token
+                    if token:
+                        h["Authorization"] = f"Bearer {token}"
+                inicio = time.perf_counter()
+                resp = self.sessao.request(
+                    method=method.upper(),
+                    url=url,
+                    headers=h,
+                    params=params,
+                    json=json_body,
+                    timeout=self.timeout,
+                )
+                bytes_corpo = len(resp.content)
+                self.metricas.registrar(
+                    endpoint, requisicoes=1, segundos=time.perf_counter() - inicio, bytes=bytes_corpo,
+                    bytes_rede=int(resp.headers.get("Content-Length") or bytes_corpo),
+                )
+
+                if resp.status_code == 401 and autenticar and not renovou:
+                    renovou = True
+                    self._renovar_token(token)
+                    continue
 
-            if resp.status_code == 429:
-                retry_after = resp.headers.get("Retry-After")
-                if retry_after:
+                if resp.status_code == 429:
+                    self.metricas.registrar(endpoint, respostas_429=1)
+                    retry_after = resp.headers.get("Retry-After")
                     try:
-                        sleep_s = float(retry_after)
+                        sleep_s = float(retry_after) + random.uniform(0, 0.4) if retry_after else self._espera(attempt)
                     except ValueError:
-                        sleep_s = base_sleep * (backoff_factor ** (attempt - 1))
-                else:
-                    sleep_s = base_sleep * (backoff_factor ** (attempt - 1))
-                sleep_s += random.uniform(0, 0.4)
-                print(f"429 recebido. Aguardando {sleep_s:.1f}s (tentativa {attempt}/{max_retries})...")
-                time.sleep(sleep_s)
-                continue
+                        sleep_s = self._espera(attempt)
+                    print(f"429 recebido. Aguardando {sleep_s:.1f}s (tentativa {attempt}/{self.max_retries})...")
+                    if self.limitador is not None:
+                        self.limitador.pausar(sleep_s)
+                    time.sleep(sleep_s)
+                    continue
 
-            if 500 <= resp.status_code < 600:
-                sleep_s = base_sleep * (backoff_factor ** (attempt - 1)) + random.uniform(0, 0.4)
-                print(f"{resp.status_code} do servidor. Retry em {sleep_s:.1f}s (tentativa {attempt}/{max_retries})...")
-                time.sleep(sleep_s)
-                continue
+                if 500 <= resp.status_code < 600:
+                    sleep_s = self._espera(attempt)
+                    print(f"{resp.status_code} do servidor. Retry em {sleep_s:.1f}s (tentativa {attempt}/{self.max_retries})...")
+                    time.sleep(sleep_s)
+                    continue
 
-            resp.raise_for_status()
-            return resp
+                resp.raise_for_status()
+                return resp
 
-        except requests.exceptions.RequestException as e:
-            if attempt == max_retries:
-                print(f"Falha definitiva ao chamar {url}: {e}")
+            except requests.exceptions.HTTPError:
+                # 4xx (exceto 429): repetir não muda a resposta
+                self.metricas.registrar(endpoint, erros=1)
                 raise
-            sleep_s = base_sleep * (backoff_factor ** (attempt - 1)) + random.uniform(0, 0.4)
-            print(f"Erro de rede '{e}'. Retry em {sleep_s:.1f}s (tentativa {attempt}/{max_retries})...")
-            time.sleep(sleep_s)
+            except requests.exceptions.RequestException as e:
+                self.metricas.registrar(endpoint, erros=1)
+                if attempt == self.max_retries:
+                    print(f"Falha definitiva ao chamar {url}: {e}")
+                    raise
+                sleep_s = self._espera(attempt)
+                print(f"Erro de rede '{e}'. Retry em {sleep_s:.1f}s (tentativa {attempt}/{self.max_retries})...")
+                time.sleep(sleep_s)
+
+        raise RuntimeError("Falha após todas as tentativas.")
 
-    raise RuntimeError("Falha após todas as tentativas.")
+    def get_json(self, caminho: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return decodificar_json(self.requisitar("get", caminho, params=params))
+
+    def fechar(self) -> None:
+        self.sessao.close()
 
 # Endpoints
-def fazer_login(url: str, creds: Dict[str, str]) -> Optional[str]:
+def fazer_login(cliente: ClienteAPI) -> Optional[str]:
     print("--- 1) Login ---")
-    resp = request_with_retry("post", f"{url}/login", json_body=creds)
-    dados = resp.json()
-    token = dados.get("access_token") or dados.get("token")
+    token = cliente.login()
     print("Login OK" if token else " Token não encontrado")
     return token
 
-def buscar_health(url: str, token: Optional[str]) -> None:
-    headers = {"Authorization": f"Bearer {token}"} if token else None
-    resp = request_with_retry("get", f"{url}/health", headers=headers)
-    print("Saúde:", resp.json())
+def buscar_health(cliente: ClienteAPI) -> None:
+    print("Saúde:", cliente.get_json("/health"))
+
+# Paginação concorrente
+def _itens_da_pagina(payload: Dict[str, Any], chaves: Sequence[str]) -> List[Dict[str, Any]]:
+    for chave in chaves:
+        if payload.get(chave):
+            return payload[chave]
+    return []
+
+def _total_paginas(payload: Dict[str, Any], per_page: int) -> Optional[int]:
+    """
+    Descobre quantas páginas existem a partir dos metadados da primeira resposta, se a API informar.
+    """
+    for chave in ("total_pages", "pages", "num_pages"):
+        valor = payload.get(chave)
+        if isinstance(valor, int):
+            return valor
+    for chave in ("total", "count", "total_count"):
+        valor = payload.get(chave)
+        if isinstance(valor, int):
+            return math.ceil(valor / per_page)
+    return None
+
+def paginar_concorrente(
+    cliente: ClienteAPI,
+    caminho: str,
+    chaves: Sequence[str],
+    start_page: int = 1,
+    per_page: int = 50,
+    workers: int = 8,
+    ao_receber: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Busca as páginas de `caminho` em paralelo e devolve os itens na ordem das páginas.
+    Se a primeira resposta trouxer o total, busca exatamente as páginas restantes; senão,
+    sonda janelas de `workers` páginas até achar uma página vazia.
+    Com `ao_receber`, cada página é entregue a ele (em ordem) e descartada: nada é acumulado, e
+    as janelas têm no máximo 4×`workers` páginas para a memória não crescer com o total.
+    """
+    def buscar(page: int) -> Dict[str, Any]:
+        params = {"page": page, "per_page": per_page}
+        return cliente.get_json(caminho, params=params)
+
+    paginas: List[List[Dict[str, Any]]] = []
+    def receber(page: int, lista: List[Dict[str, Any]]) -> None:
+        if ao_receber is not None:
+            ao_receber(lista)
+        else:
+            paginas.append(lista)
+        print(f"• Página {page} (+{len(lista)})")
+
+    primeira = buscar(start_page)
+    lista = _itens_da_pagina(primeira, chaves)
+    if not lista:
+        return []
+    receber(start_page, lista)
+
+    total = _total_paginas(primeira, per_page)
+    proxima = start_page + 1
+    limite_janela = workers * 4 if ao_receber is not None else None
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            if total is not None:
+                fim_janela = total if limite_janela is None else min(total, proxima + limite_janela - 1)
+                janela = list(range(proxima, fim_janela + 1))
+            else:
+                janela = list(range(proxima, proxima + workers))
+            if not janela:
+                break
+            # pool.map devolve na ordem de submissão, então a ordem das páginas é preservada
+            fim = False
+            for page, payload in zip(janela, pool.map(buscar, janela)):
+                lista = _itens_da_pagina(payload, chaves)
+                if not lista:
+                    fim = True
+                    continue
+                if fim:
+                    # Página depois de uma vazia: a API mudou durante a listagem, ignora o resto
+                    continue
+                receber(page, lista)
+            if fim or (total is not None and janela[-1] >= total):
+                break
+            proxima = janela[-1] + 1
+    return [item for lista in paginas for item in lista]
 
 def listar_pokemons(
-    url: str,
-    token: str,
+    cliente: ClienteAPI,
     start_page: int = 1,
     per_page: int = 50,
     throttle_s: float = 0.12,
+    workers: int = 1,
 ) -> pd.DataFrame:
+    """
+    Com workers=1 percorre as páginas em série (com throttle); com workers>1 usa a paginação concorrente.
+    """
     print("\n--- 2) Listando pokémons (para mapear id->name) ---")
-    headers = {"Authorization": f"Bearer {token}"}
-    page = start_page
-    rows: List[Dict[str, Any]] = []
-    while True:
-        params = {"page": page, "per_page": per_page}
-        resp = request_with_retry("get", f"{url}/pokemon", headers=headers, params=params)
-        payload = resp.json()
-        lista = payload.get("pokemons") or payload.get("results") or []
-        if not lista:
-            break
-        rows.extend(lista)
-        print(f"• Página {page} (+{len(lista)})")
-        page += 1
-        time.sleep(throttle_s)
+    if workers > 1:
+        rows = paginar_concorrente(
+            cliente, "/pokemon", ("pokemons", "results"),
+            start_page=start_page, per_page=per_page, workers=workers,
+        )
+    else:
+        page = start_page
+        rows: List[Dict[str, Any]] = []
+        while True:
+            params = {"page": page, "per_page": per_page}
+            payload = cliente.get_json("/pokemon", params=params)
+            lista = payload.get("pokemons") or payload.get("results") or []
+            if not lista:
+                break
+            rows.extend(lista)
+            print(f"• Página {page} (+{len(lista)})")
+            page += 1
+            time.sleep(throttle_s)
     df = pd.DataFrame(rows)
     # Garante colunas mínimas
     keep = [c for c in ["id", "name"] if c in df.columns]
@@ -117,183 +421,609 @@ def listar_pokemons(
         print(" A listagem não trouxe 'id' e 'name'. Os nomes faltantes serão preenchidos via /pokemon/{id}.")
     return df[keep] if keep else df
 
+def _ids_da_pagina(lista: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ids de uma página de combates como arrays (-1 onde a API mandou nulo ou algo que não é um id).
+    Ids em texto ou float ("12", 12.0) são aceitos, como no pd.to_numeric da versão em DataFrame.
+    """
+    def coluna(chave: str) -> np.ndarray:
+        valores = pd.to_numeric(pd.Series([c.get(chave) for c in lista], dtype=object), errors="coerce")
+        valores = valores.to_numpy(dtype=float, na_value=np.nan)
+        return np.where(valores == np.round(valores), valores, -1).astype(np.int64)
+    return coluna("first_pokemon"), coluna("second_pokemon"), coluna("winner")
+
 def listar_combates(
-    url: str,
-    token: str,
+    cliente: ClienteAPI,
     start_page: int = 1,
     per_page: int = 50,
     throttle_s: float = 0.18,
-) -> pd.DataFrame:
+    workers: int = 1,
+    escritor: Optional[armazenamento.EscritorCombates] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Com workers=1 percorre as páginas em série (com throttle); com workers>1 usa a paginação concorrente.
+    Com `escritor`, cada página vai direto para ele como arrays de ids e a função devolve None:
+    a memória não depende do número de combates. Sem ele, devolve o DataFrame com tudo.
+    """
     print("\n--- 3) Listando combates ---")
-    headers = {"Authorization": f"Bearer {token}"}
-    page = start_page
     rows: List[Dict[str, Any]] = []
-    while True:
+    def receber(lista: List[Dict[str, Any]]) -> None:
+        if escritor is not None:
+            escritor.adicionar(*_ids_da_pagina(lista))
+        else:
+            rows.extend(lista)
+
+    if workers > 1:
+        paginar_concorrente(
+            cliente, "/combats", ("combats", "results"),
+            start_page=start_page, per_page=per_page, workers=workers, ao_receber=receber,
+        )
+    else:
+        page = start_page
+        while True:
+            params = {"page": page, "per_page": per_page}
+            payload = cliente.get_json("/combats", params=params)
+            combates = payload.get("combats") or payload.get("results") or []
+            if not combates:
+                break
+            receber(combates)
+            print(f"• Página {page} (+{len(combates)})")
+            page += 1
+            time.sleep(throttle_s)
+    return None if escritor is not None else pd.DataFrame(rows)
+
+# Sincronização incremental de combates
+CHECKPOINT_SYNC = "sync_combates.json"
+LOJA_COMBATES = "combates_brutos.csv"
+COLUNAS_LOJA = ["pagina", "first_pokemon", "second_pokemon", "winner"]
+
+def _hash_pagina(lista: List[Dict[str, Any]]) -> str:
+    return hashlib.sha256(json.dumps(lista, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _ler_checkpoint(caminho: str) -> Dict[str, Any]:
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+def _salvar_checkpoint(caminho: str, checkpoint: Dict[str, Any]) -> None:
+    # Escrita atômica: uma interrupção no meio nunca deixa um checkpoint corrompido
+    tmp = caminho + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, caminho)
+
+def _linhas_loja(pagina: int, lista: List[Dict[str, Any]]) -> str:
+    def valor(v: Any) -> str:
+        return "" if v is None else str(v)
+    return "".join(
+        f"{pagina},{valor(c.get('first_pokemon'))},{valor(c.get('second_pokemon'))},{valor(c.get('winner'))}\n"
+        for c in lista
+    )
+
+def _gravar_pagina(loja: str, checkpoint: Dict[str, Any], pagina: int, lista: List[Dict[str, Any]],
+                   etag: Optional[str]) -> None:
+    """
+    Grava (ou regrava, se for a última) uma página no fim da loja e atualiza o checkpoint em memória.
+    """
+    info = checkpoint["paginas"].get(str(pagina))
+    with open(loja, "r+b") as f:
+        # Só a última página pode ser regravada aqui: truncar no início dela descarta a versão antiga
+        offset = info["offset"] if info else checkpoint["tamanho_loja"]
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(_linhas_loja(pagina, lista).encode("utf-8"))
+        checkpoint["tamanho_loja"] = f.tell()
+    checkpoint["paginas"][str(pagina)] = {
+        "offset": offset, "linhas": len(lista), "hash": _hash_pagina(lista), "etag": etag,
+    }
+
+def _reescrever_loja(loja: str, checkpoint: Dict[str, Any], novas: Dict[int, Tuple[List[Dict[str, Any]], Optional[str]]]) -> None:
+    """
+    Reescreve a loja inteira trocando as páginas em `novas` (páginas antigas que mudaram na API).
+    """
+    atuais = pd.read_csv(loja, dtype="Int64")
+    grupos = {int(p): g for p, g in atuais.groupby("pagina")}
+    tmp = loja + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(COLUNAS_LOJA) + "\n")
+        for pagina in sorted(int(p) for p in checkpoint["paginas"]):
+            info = checkpoint["paginas"][str(pagina)]
+            offset = f.tell()
+            if pagina in novas:
+                lista, etag = novas[pagina]
+                info.update(linhas=len(lista), hash=_hash_pagina(lista), etag=etag)
+            else:
+                grupo = grupos.get(pagina)
+                lista = [] if grupo is None else grupo.drop(columns="pagina").astype(object).where(grupo.notna(), None).to_dict("records")
+            f.write(_linhas_loja(pagina, lista))
+            info["offset"] = offset
+        checkpoint["tamanho_loja"] = f.tell()
+    os.replace(tmp, loja)
+
+def sincronizar_combates(
+    cliente: ClienteAPI,
+    loja: str = LOJA_COMBATES,
+    checkpoint_path: str = CHECKPOINT_SYNC,
+    per_page: int = 50,
+    workers: int = 8,
+    revalidar: bool = False,
+    carregar: bool = True,
+) -> Optional[pd.DataFrame]:
+    """
+    Sincroniza os combates numa loja local (CSV com a página de origem) guiada por um checkpoint com
+    offset, hash e ETag de cada página. Só busca a última página conhecida e as seguintes; com
+    `revalidar=True` também confere as páginas antigas (If-None-Match) e regrava as que mudaram.
+    Cada página é gravada e checkpointada antes da próxima, então uma execução interrompida continua
+    de onde parou. Com `carregar=False` não lê a loja de volta (use `copiar_loja`) e devolve None.
+    """
+    print("\n--- 3) Sincronizando combates (incremental) ---")
+    checkpoint = _ler_checkpoint(checkpoint_path)
+
+    if checkpoint.get("per_page") != per_page or not os.path.exists(loja):
+        if checkpoint:
+            print(" Checkpoint incompatível ou loja ausente: sincronização completa.")
+        with open(loja, "w", encoding="utf-8", newline="") as f:
+            f.write(",".join(COLUNAS_LOJA) + "\n")
+        checkpoint = {"per_page": per_page, "paginas": {}, "tamanho_loja": os.path.getsize(loja)}
+        _salvar_checkpoint(checkpoint_path, checkpoint)
+    elif os.path.getsize(loja) > checkpoint["tamanho_loja"]:
+        # Execução anterior caiu no meio de uma gravação: descarta o que não foi checkpointado
+        with open(loja, "r+b") as f:
+            f.truncate(checkpoint["tamanho_loja"])
+
+    def buscar(page: int) -> Tuple[int, List[Dict[str, Any]], Optional[str]]:
+        info = checkpoint["paginas"].get(str(page))
+        h = {}
+        if info and info.get("etag"):
+            h["If-None-Match"] = info["etag"]
         params = {"page": page, "per_page": per_page}
-        resp = request_with_retry("get", f"{url}/combats", headers=headers, params=params)
-        payload = resp.json()
-        combates = payload.get("combats") or payload.get("results") or []
-        if not combates:
-            break
-        rows.extend(combates)
-        print(f"• Página {page} (+{len(combates)})")
-        page += 1
-        time.sleep(throttle_s)
-    return pd.DataFrame(rows)
-
-def atributos_pokemon(url: str, token: str, pokemon_id: int) -> Dict[str, Any]:
-    headers = {"Authorization": f"Bearer {token}"}
-    resp = request_with_retry("get", f"{url}/pokemon/{pokemon_id}", headers=headers)
-    return resp.json()
+        resp = cliente.requisitar("get", "/combats", headers=h, params=params)
+        if resp.status_code == 304:
+            return 304, [], info.get("etag")
+        payload = decodificar_json(resp)
+        lista = payload.get("combats") or payload.get("results") or []
+        return resp.status_code, lista, resp.headers.get("ETag")
+
+    paginas = sorted(int(p) for p in checkpoint["paginas"])
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        if revalidar:
+            completas = [p for p in paginas if checkpoint["paginas"][str(p)]["linhas"] == per_page]
+            mudaram: Dict[int, Tuple[List[Dict[str, Any]], Optional[str]]] = {}
+            for page, (status, lista, etag) in zip(completas, pool.map(buscar, completas)):
+                if status != 304 and lista and _hash_pagina(lista) != checkpoint["paginas"][str(page)]["hash"]:
+                    mudaram[page] = (lista, etag)
+            if mudaram:
+                print(f"• {len(mudaram)} página(s) antiga(s) mudaram: regravando a loja")
+                _reescrever_loja(loja, checkpoint, mudaram)
+                _salvar_checkpoint(checkpoint_path, checkpoint)
+
+        # A última página conhecida pode ter crescido; se estava cheia, começa pela seguinte
+        if paginas:
+            ultima = paginas[-1]
+            proxima = ultima if checkpoint["paginas"][str(ultima)]["linhas"] < per_page else ultima + 1
+        else:
+            proxima = 1
+        novas = 0
+        fim = False
+        # A primeira janela é só a página inicial: numa noite sem combates novos, uma requisição basta
+        tamanho = 1
+        while not fim:
+            janela = list(range(proxima, proxima + tamanho))
+            tamanho = max(1, workers)
+            for page, (status, lista, etag) in zip(janela, pool.map(buscar, janela)):
+                if fim:
+                    continue
+                info = checkpoint["paginas"].get(str(page))
+                if status == 304 or (info and lista and _hash_pagina(lista) == info["hash"]):
+                    fim = info["linhas"] < per_page
+                    continue
+                if not lista:
+                    fim = True
+                    continue
+                novas += len(lista) - (info["linhas"] if info else 0)
+                _gravar_pagina(loja, checkpoint, page, lista, etag)
+                _salvar_checkpoint(checkpoint_path, checkpoint)
+                print(f"• Página {page} (+{len(lista)})")
+                fim = len(lista) < per_page
+            proxima = janela[-1] + 1
+
+    print(f"Sincronização concluída: {novas} combate(s) novo(s).")
+    if not carregar:
+        return None
+    df = pd.read_csv(loja, dtype="Int64")
+    return df.drop(columns="pagina")
+
+def copiar_loja(loja: str, escritor: armazenamento.EscritorCombates,
+                linhas_por_lote: int = armazenamento.LINHAS_POR_LOTE) -> None:
+    """
+    Passa os combates da loja incremental para o `escritor`, um lote por vez.
+    """
+    for lote in pd.read_csv(loja, usecols=armazenamento.COLUNAS_ID, dtype="Int64", chunksize=linhas_por_lote):
+        escritor.adicionar(*(lote[c].fillna(-1).to_numpy(dtype=np.int64) for c in armazenamento.COLUNAS_ID))
+
+def atributos_pokemon(cliente: ClienteAPI, pokemon_id: int) -> Dict[str, Any]:
+    return cliente.get_json(f"/pokemon/{pokemon_id}")
+
+# Cache persistente de atributos
+CACHE_ATRIBUTOS = "cache_atributos.sqlite"
+TTL_ATRIBUTOS_S = 30 * 24 * 3600
+
+class CacheAtributos:
+    """
+    Cache em SQLite das respostas de /pokemon/{id}, por id. Entradas mais velhas que `ttl_s`
+    contam como ausentes e são baixadas de novo. Ids que a API respondeu com 404 ficam gravados
+    como `None`, para não serem pedidos de novo a cada execução.
+    """
+
+    def __init__(self, caminho: str = CACHE_ATRIBUTOS, ttl_s: float = TTL_ATRIBUTOS_S):
+        self.ttl_s = ttl_s
+        self._conn = sqlite3.connect(caminho)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS atributos (id INTEGER PRIMARY KEY, dados TEXT, baixado_em REAL NOT NULL)"
+        )
+
+    def obter(self, ids: Iterable[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+        limite = time.time() - self.ttl_s
+        ids = list(ids)
+        encontrados: Dict[int, Optional[Dict[str, Any]]] = {}
+        # Lotes para não estourar o limite de parâmetros do SQLite
+        for i in range(0, len(ids), 500):
+            lote = ids[i:i + 500]
+            marcadores = ",".join("?" * len(lote))
+            cursor = self._conn.execute(
+                f"SELECT id, dados FROM atributos WHERE baixado_em >= ? AND id IN ({marcadores})",
+                [limite, *lote],
+            )
+            encontrados.update({pid: json.loads(dados) if dados is not None else None for pid, dados in cursor})
+        return encontrados
+
+    def salvar(self, registros: Dict[int, Optional[Dict[str, Any]]]) -> None:
+        agora = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO atributos (id, dados, baixado_em) VALUES (?, ?, ?)",
+                [(pid, json.dumps(dados) if dados is not None else None, agora) for pid, dados in registros.items()],
+            )
+
+    def fechar(self) -> None:
+        self._conn.close()
 
 # Enriquecimento
-def enriquecer_combates_com_nomes(combates: pd.DataFrame, pokemons_df: pd.DataFrame) -> pd.DataFrame:
+class QualidadeCombates:
+    """
+    Contadores de qualidade dos combates, somados lote a lote (id negativo = nulo na API): linhas
+    com id nulo, auto-confrontos (first == second), vencedores que não estão em nenhum dos dois
+    lados e as aparições de cada id, para apontar no fim os ids sem nome.
+    """
+
+    def __init__(self):
+        self.linhas = 0
+        self.ids_nulos = 0
+        self.auto_confrontos = 0
+        self.vencedor_fora = 0
+        self._aparicoes = np.zeros(0, dtype=np.int64)
+
+    def atualizar(self, first: np.ndarray, second: np.ndarray, winner: np.ndarray) -> None:
+        first, second, winner = (np.asarray(v, dtype=np.int64) for v in (first, second, winner))
+        nulo = (first < 0) | (second < 0) | (winner < 0)
+        completo = ~nulo
+        self.linhas += len(first)
+        self.ids_nulos += int(nulo.sum())
+        self.auto_confrontos += int((first == second)[completo].sum())
+        self.vencedor_fora += int(((winner != first) & (winner != second))[completo].sum())
+        ids = np.concatenate([first, second, winner])
+        ids = ids[ids >= 0]
+        if len(ids):
+            tamanho = max(len(self._aparicoes), int(ids.max()) + 1)
+            self._aparicoes = np.pad(self._aparicoes, (0, tamanho - len(self._aparicoes))) + np.bincount(ids, minlength=tamanho)
+
+    def ids_vistos(self) -> np.ndarray:
+        return np.flatnonzero(self._aparicoes)
+
+    def relatorio(self, ids_com_nome: Iterable[int], max_exemplos: int = 20) -> Dict[str, Any]:
+        """
+        Resumo para o relatório da coleta; `ids_com_nome` são os ids que a listagem ou os
+        atributos conseguiram nomear.
+        """
+        desconhecidos = np.setdiff1d(self.ids_vistos(), np.fromiter(ids_com_nome, dtype=np.int64))
+        return {
+            "linhas": self.linhas,
+            "linhas_com_id_nulo": self.ids_nulos,
+            "auto_confrontos": self.auto_confrontos,
+            "vencedor_fora_dos_participantes": self.vencedor_fora,
+            "ids_sem_nome": int(len(desconhecidos)),
+            "aparicoes_ids_sem_nome": int(self._aparicoes[desconhecidos].sum()),
+            "exemplos_ids_sem_nome": desconhecidos[:max_exemplos].tolist(),
+        }
+
+def _ids_da_coluna(col: pd.Series) -> np.ndarray:
+    """
+    Coluna de ids como int64 (-1 onde é nulo ou não numérico), sem copiar se já for inteira.
+    """
+    if pd.api.types.is_integer_dtype(col.dtype) and not col.hasnans:
+        return col.to_numpy(dtype=np.int64, copy=False)
+    valores = pd.to_numeric(col, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return np.where(np.isnan(valores), -1, valores).astype(np.int64)
+
+def _coluna_id(ids: np.ndarray) -> Any:
+    # Mesmo esquema de armazenamento.tipar_combates: nullable só se houver nulo
+    nulo = ids < 0
+    if nulo.any():
+        return pd.arrays.IntegerArray(np.where(nulo, 0, ids).astype(np.int32), nulo)
+    return pd.to_numeric(ids, downcast="integer")
+
+def tabela_de_nomes(pokemons_df: pd.DataFrame, atributos_df: Optional[pd.DataFrame] = None) -> Tuple[np.ndarray, pd.Index, int]:
     """
-    Adiciona colunas de nome aos combates usando a listagem de pokemons.
-    Se faltar nome para algum id, fica NaN (e pode ser preenchido depois via atributos).
+    Código do nome de cada id (posição no array; -1 sem nome), as categorias (nomes únicos,
+    ordenados) e quantos ids só tiveram nome pelos atributos. A listagem tem prioridade.
     """
-    pok = pokemons_df.copy()
-    if "nome" in pok.columns and "name" not in pok.columns:
-        pok = pok.rename(columns={"nome": "name"})
-    if "id" not in pok.columns or "name" not in pok.columns:
+    fontes = []
+    for origem, df in (("listagem", pokemons_df), ("atributos", atributos_df)):
+        if df is None:
+            continue
+        if "nome" in df.columns and "name" not in df.columns:
+            df = df.rename(columns={"nome": "name"})
+        if {"id", "name"}.issubset(df.columns):
+            fontes.append(df[["id", "name"]].assign(origem=origem))
+    if not fontes:
         raise ValueError("pokemons_df precisa ter colunas 'id' e 'name' (ou 'nome').")
+    nomes = pd.concat(fontes, ignore_index=True).dropna()
+    nomes = nomes.assign(id=pd.to_numeric(nomes["id"], errors="coerce")).dropna()
+    nomes = nomes[nomes["id"] >= 0].drop_duplicates("id")
+    # A listagem vem primeiro no concat: as linhas dos atributos que restam são ids que só eles nomearam
+    via_atributos = int((nomes["origem"] == "atributos").sum())
+    ids = nomes["id"].to_numpy(dtype=np.int64)
+    rotulos = nomes["name"].astype(str).to_numpy()
+    categorias = pd.Index(np.unique(rotulos))
+    codigos = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int32)
+    codigos[ids] = categorias.get_indexer(rotulos)
+    return codigos, categorias, via_atributos
 
-    # 2) Garante que o índice do mapa seja inteiro
-    pok["id"] = pok["id"].astype(int)
-    mapa_pokemons = pok.set_index("id")["name"].to_dict()
-
-    # 3) Cópia dos combates e normalização de tipos
-    df = combates.copy()
-    # nomes das colunas que o endpoint retorna
-    id_cols = {
-        "first_pokemon": "first_pokemon_name",
-        "second_pokemon": "second_pokemon_name",
-        "winner": "winner_name",
-    }
+def enriquecer_combates(
+    combates: pd.DataFrame,
+    pokemons_df: pd.DataFrame,
+    atributos_df: Optional[pd.DataFrame] = None,
+    compacto: bool = False,
+    *,
+    tabela: Optional[Tuple[np.ndarray, pd.Index, int]] = None,
+    qualidade: Optional[QualidadeCombates] = None,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Combates tipados com os nomes dos três ids e o relatório de qualidade, numa etapa só.
 
-    # Verifica se as colunas existem
-    for c in id_cols:
-        if c not in df.columns:
-            raise ValueError(f"Coluna esperada nos combates não encontrada: '{c}'")
+    Os nomes vêm da listagem (`pokemons_df`) e, para ids que faltarem nela, dos atributos. Cada
+    coluna de nome é um categórico montado direto dos códigos (um gather por coluna, sem map
+    nem cópia do frame de entrada). Com `compacto=True` os nomes não são gravados: só os ids,
+    e o dashboard os deriva dos atributos.
 
-    # Converte para int (trata NaN/strings)
-    for c in id_cols:
-        df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")  # permite NA
+    Para enriquecer em lotes, passe a `tabela` de `tabela_de_nomes` e a mesma `qualidade` em todas
+    as chamadas: o relatório devolvido acumula os lotes já vistos.
+    """
+    faltando = [c for c in armazenamento.COLUNAS_ID if c not in combates.columns]
+    if faltando:
+        raise ValueError(f"Colunas esperadas nos combates não encontradas: {faltando}")
+    ids = {c: _ids_da_coluna(combates[c]) for c in armazenamento.COLUNAS_ID}
+
+    if qualidade is None:
+        qualidade = QualidadeCombates()
+    qualidade.atualizar(*ids.values())
+    codigos, categorias, via_atributos = tabela if tabela is not None else tabela_de_nomes(pokemons_df, atributos_df)
 
-    # 4) Faz o map com cuidado — usar .map funciona melhor com ints normais
-    # transformar o mapa para usar chaves inteiras
-    mapa = {int(k): v for k, v in mapa_pokemons.items()}
+    saida: Dict[str, Any] = {c: _coluna_id(v) for c, v in ids.items()}
+    if not compacto:
+        for c, col_nome in zip(armazenamento.COLUNAS_ID, armazenamento.COLUNAS_NOME):
+            v = ids[c]
+            dentro = (v >= 0) & (v < len(codigos))
+            codigo = np.full(len(v), -1, dtype=np.int32)
+            codigo[dentro] = codigos[v[dentro]]
+            saida[col_nome] = pd.Categorical.from_codes(codigo, categories=categorias)
 
-    df[id_cols["first_pokemon"]] = df["first_pokemon"].map(mapa)
-    df[id_cols["second_pokemon"]] = df["second_pokemon"].map(mapa)
-    df[id_cols["winner"]] = df["winner"].map(mapa)
+    relatorio = qualidade.relatorio(np.flatnonzero(codigos >= 0))
+    relatorio["nomes_via_atributos"] = via_atributos
+    return pd.DataFrame(saida, index=combates.index), relatorio
 
-    # 5) Logs úteis para debug
-    for newcol in id_cols.values():
-        n_missing = df[newcol].isna().sum()
-        total = len(df)
-        print(f"Coluna '{newcol}': {total - n_missing}/{total} nomes preenchidos, {n_missing} faltando.")
+def enriquecer_arquivo(
+    pokemons_df: pd.DataFrame,
+    atributos_df: Optional[pd.DataFrame] = None,
+    compacto: bool = False,
+    csv: bool = False,
+    base: str = armazenamento.BASE_COMBATES,
+) -> Dict[str, Any]:
+    """
+    Passa `enriquecer_combates` pelo arquivo de combates gravado, lote a lote, e devolve o relatório
+    de qualidade do arquivo inteiro. Os nomes entram no arquivo principal (a não ser com `compacto`)
+    e, com `csv=True`, na exportação CSV feita na mesma passada.
+    """
+    tabela = tabela_de_nomes(pokemons_df, atributos_df)
+    qualidade = QualidadeCombates()
+    relatorio = qualidade.relatorio(np.flatnonzero(tabela[0] >= 0))
+    relatorio["nomes_via_atributos"] = tabela[2]
 
-    # mostra alguns IDs que não foram encontrados
-    for idcol, namecol in id_cols.items():
-        missing_ids = df.loc[df[namecol].isna(), idcol].dropna().unique()
-        if len(missing_ids):
-            print(f"IDs faltantes em '{idcol}' (exemplos): {missing_ids[:10]}")
+    def lotes() -> Iterator[pd.DataFrame]:
+        nonlocal relatorio
+        for lote in armazenamento.iterar_combates(base):
+            saida, relatorio = enriquecer_combates(lote, pokemons_df, atributos_df, compacto,
+                                                   tabela=tabela, qualidade=qualidade)
+            if armazenamento.COLUNA_SEQ in lote.columns:
+                saida.insert(len(armazenamento.COLUNAS_ID), armazenamento.COLUNA_SEQ, lote[armazenamento.COLUNA_SEQ])
+            yield saida
 
-    return df
+    # Sem destino (compacto e sem CSV) a passada só mede a qualidade
+    armazenamento.gravar_lotes(lotes(), base, principal=not compacto, csv=csv)
+    return relatorio
 
 def baixar_atributos_para_ids(
-    url: str,
-    token: str,
+    cliente: ClienteAPI,
     ids: Iterable[int],
     throttle_s: float = 0.20,
+    workers: int = 1,
+    cache: Optional[CacheAtributos] = None,
 ) -> pd.DataFrame:
     """
     Baixa atributos detalhados para um conjunto de IDs (únicos), com throttle e retry.
+    Com `cache`, só os ids ausentes ou vencidos vão para a rede; com workers>1 eles são baixados
+    em paralelo sob o limitador do `cliente`.
     """
-    registros: List[Dict[str, Any]] = []
-    for i, pid in enumerate(sorted(set(int(x) for x in ids))):
+    ids_ordenados = sorted(set(int(x) for x in ids))
+    por_id: Dict[int, Optional[Dict[str, Any]]] = cache.obter(ids_ordenados) if cache is not None else {}
+    faltantes = [pid for pid in ids_ordenados if pid not in por_id]
+    if cache is not None:
+        print(f"Cache de atributos: {len(por_id)} em cache, {len(faltantes)} a baixar.")
+
+    # Resultado de cada busca: (baixou?, dados). Um 404 conta como baixado, com dados None
+    def buscar(pid: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
         try:
-            dados = atributos_pokemon(url, token, pid)
-            registros.append(dados)
-            if "name" in dados:
-                print(f"✓ {pid} - {dados['name']}")
-            else:
-                print(f"✓ {pid}")
+            dados = atributos_pokemon(cliente, pid)
+        except requests.exceptions.HTTPError as e:
+            print(f"✗ Falha ao buscar atributos do {pid}: {e}")
+            return e.response is not None and e.response.status_code == 404, None
         except Exception as e:
             print(f"✗ Falha ao buscar atributos do {pid}: {e}")
-        time.sleep(throttle_s)
-    return pd.DataFrame(registros)
-
-def preencher_nomes_faltantes_via_atributos(combates_enriquecidos: pd.DataFrame, atributos_df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Caso a listagem não tenha trazido 'name', preenche nomes a partir do dataframe de atributos.
-    """
-    if not {"id", "name"}.issubset(atributos_df.columns):
-        return combates_enriquecidos
-    mapa = atributos_df.drop_duplicates("id").set_index("id")["name"]
-    out = combates_enriquecidos.copy()
-    for col_id, col_name in [
-        ("first_pokemon", "first_pokemon_name"),
-        ("second_pokemon", "second_pokemon_name"),
-        ("winner", "winner_name"),
-    ]:
-        if col_name not in out.columns:
-            out[col_name] = out[col_id].map(mapa)
+            return False, None
+        if "name" in dados:
+            print(f"✓ {pid} - {dados['name']}")
         else:
-            out[col_name] = out[col_name].fillna(out[col_id].map(mapa))
-    return out
+            print(f"✓ {pid}")
+        return True, dados
+
+    baixados: Dict[int, Optional[Dict[str, Any]]] = {}
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for pid, (ok, dados) in zip(faltantes, pool.map(buscar, faltantes)):
+                if ok:
+                    baixados[pid] = dados
+    else:
+        for pid in faltantes:
+            ok, dados = buscar(pid)
+            if ok:
+                baixados[pid] = dados
+            time.sleep(throttle_s)
 
-def add_col(atributos_df,combates_df):
+    if cache is not None and baixados:
+        cache.salvar(baixados)
+    por_id.update(baixados)
+    return pd.DataFrame([por_id[pid] for pid in ids_ordenados if por_id.get(pid) is not None])
+
+def add_col(atributos_df,combates_df=None):
 
     atributos_nulos = atributos_df.isnull().sum()
-    combates_nulos = combates_df.isnull().sum()
     print(atributos_nulos)
-    print(combates_nulos)
+    if combates_df is not None:
+        combates_nulos = combates_df.isnull().sum()
+        print(combates_nulos)
 
     colunas = ['hp', 'attack', 'defense', 'sp_attack', 'sp_defense', 'speed']
     atributos_df['forca_total'] = atributos_df[colunas].sum(axis=1)
 
-    padrao_regex = r'[,/]'
-    split_types = atributos_df['types'].str.split(padrao_regex, expand=True)
-    novos_nomes = {i: f'type{i + 1}' for i in split_types.columns}
-    split_types = split_types.rename(columns=novos_nomes)
-    atributos_df = pd.concat([atributos_df, split_types], axis=1)
+    # Tipos normalizados aqui, uma vez: sem espaços, sem repetição, type1..type3 fixos e a máscara
+    # de bits sobre armazenamento.TIPOS que as análises por tipo usam
+    tipos, desconhecidos = armazenamento.codificar_tipos(atributos_df['types'])
+    if len(desconhecidos):
+        print(f" Tipos fora do vocabulário (ficam fora da máscara): {desconhecidos.to_dict()}")
+    atributos_df = atributos_df.drop(columns=[c for c in tipos.columns if c in atributos_df.columns])
+    atributos_df = pd.concat([atributos_df, tipos], axis=1)
 
     return atributos_df
 
 if __name__ == "__main__":
-    token = fazer_login(BASE_URL, CREDENCIAIS)
-    if not token:
-        raise SystemExit("Não foi possível autenticar.")
-    buscar_health(BASE_URL, token)
+    parser = argparse.ArgumentParser(description="Coleta combates e atributos da API e gera os CSVs do dashboard.")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"sincroniza só as páginas novas usando {CHECKPOINT_SYNC} e {LOJA_COMBATES}")
+    parser.add_argument("--revalidar", action="store_true",
+                        help="no modo incremental, confere também as páginas antigas (If-None-Match)")
+    parser.add_argument("--csv", action="store_true",
+                        help="exporta combates_com_nomes.csv além do combates_com_nomes.feather")
+    parser.add_argument("--ttl-atributos-dias", type=float, default=TTL_ATRIBUTOS_S / 86400,
+                        help=f"validade das entradas de {CACHE_ATRIBUTOS} (0 força baixar tudo)")
+    parser.add_argument("--compacto", action="store_true",
+                        help="grava só os ids dos combates, sem as colunas de nome (o dashboard usa os dos atributos)")
+    parser.add_argument("--relatorio", default="relatorio_coleta.json",
+                        help="JSON com tempo, requisições, bytes e linhas de cada etapa")
+    parser.add_argument("--prometheus", default=None,
+                        help="grava também o relatório no formato de texto do Prometheus neste caminho")
+    parser.add_argument("--profile", nargs="?", const="perfis", default=None, metavar="PASTA",
+                        help="roda cada etapa sob o cProfile e grava os .prof em PASTA (padrão: perfis)")
+    args = parser.parse_args()
+
+    # Um único limitador para todas as threads: o 429 de uma pausa as outras
+    cliente = ClienteAPI.do_ambiente(pool=WORKERS, limitador=LimitadorTaxa(taxa=TAXA_MAX_RPS))
+    inst = instrumentacao.Instrumentacao(cliente.metricas, pasta_perfis=args.profile)
+    try:
+        with inst.etapa("login"):
+            if not fazer_login(cliente):
+                raise SystemExit("Não foi possível autenticar.")
+            buscar_health(cliente)
 
-    # 1) Traz lista de pokémons (id, name) — Evita N requisições
-    df_pokemons = listar_pokemons(BASE_URL, token, per_page=50, throttle_s=0.12)
+        # 1) Traz lista de pokémons (id, name) — Evita N requisições
+        with inst.etapa("listar_pokemons") as etapa:
+            df_pokemons = listar_pokemons(cliente, per_page=50, workers=WORKERS)
+            etapa.linhas = len(df_pokemons)
+
+        # 2) Traz os combates direto para o arquivo, em lotes de tamanho fixo: tudo de novo ou só o que
+        # mudou desde o último checkpoint. A memória não cresce com o número de combates.
+        with inst.etapa("listar_combates") as etapa:
+            with armazenamento.EscritorCombates() as escritor:
+                if args.incremental:
+                    sincronizar_combates(cliente, per_page=50, workers=WORKERS, revalidar=args.revalidar, carregar=False)
+                    copiar_loja(LOJA_COMBATES, escritor)
+                else:
+                    listar_combates(cliente, per_page=50, workers=WORKERS, escritor=escritor)
+            caminho_combates = escritor.caminho
+            etapa.linhas = escritor.linhas
+            etapa.extras["nulos"] = escritor.nulos
+        print(f" {escritor.linhas} combates gravados em {caminho_combates} ({escritor.nulos} com id nulo)")
 
-    # 2) Traz todos os combates
-    df_combates = listar_combates(BASE_URL, token, per_page=50, throttle_s=0.18)
+        # 3) IDs únicos que aparecem nos combates, anotados pelo escritor
+        with inst.etapa("ids_unicos") as etapa:
+            ids_unicos = escritor.ids_vistos()
+            etapa.linhas = len(ids_unicos)
 
-    # 3) Troca IDs por nomes
-    df_combates_nomes = enriquecer_combates_com_nomes(df_combates, df_pokemons)
+        # 4) Baixa atributos detalhados de TODOS esses pokémons
+        # Atributos quase nunca mudam: o cache em disco evita a rede numa execução "quente"
+        with inst.etapa("atributos") as etapa:
+            cache_atributos = CacheAtributos(ttl_s=args.ttl_atributos_dias * 86400)
+            df_atributos = baixar_atributos_para_ids(cliente, ids_unicos, workers=WORKERS, cache=cache_atributos)
+            cache_atributos.fechar()
+            etapa.linhas = len(df_atributos)
+        cliente.metricas.imprimir()
+        cliente.fechar()
 
-    # 4) Gera conjunto de IDs únicos que aparecem nos combates
-    ids_unicos = pd.unique(pd.concat([
-        df_combates["first_pokemon"].astype(int),
-        df_combates["second_pokemon"].astype(int),
-        df_combates["winner"].astype(int),
-    ], ignore_index=True))
+        # 5) Nomes e qualidade numa passada pelo arquivo gravado: os nomes vêm da listagem e, para os
+        # ids que faltarem nela, dos atributos (com --compacto o arquivo fica só com os ids). O mesmo
+        # passo exporta o CSV com --csv e conta nulos, autoconfrontos, vencedores fora dos
+        # participantes e ids sem nome
+        with inst.etapa("enriquecer") as etapa:
+            relatorio_qualidade = enriquecer_arquivo(df_pokemons, df_atributos, compacto=args.compacto, csv=args.csv)
+            etapa.linhas = relatorio_qualidade["linhas"]
+            etapa.extras["qualidade"] = relatorio_qualidade
+        print("\n--- Qualidade dos combates ---")
+        for chave, valor in relatorio_qualidade.items():
+            print(f" {chave}: {valor}")
 
-    # 5) Baixa atributos detalhados de TODOS esses pokémons
-    df_atributos = baixar_atributos_para_ids(BASE_URL, token, ids_unicos, throttle_s=0.20)
+        #6) Adicionar colunas
+        with inst.etapa("add_col") as etapa:
+            df_atributos = add_col(df_atributos)
+            etapa.linhas = len(df_atributos)
 
-    # 6) Caso algum nome tenha faltado, preenche via atributos
-    df_combates_nomes = preencher_nomes_faltantes_via_atributos(df_combates_nomes, df_atributos)
+        # 7) Salva atributos
+        with inst.etapa("salvar") as etapa:
+            df_atributos.to_csv("atributos_pokemons.csv", index=False)
+            etapa.linhas = len(df_atributos)
+        print(f" Arquivos salvos: {caminho_combates} e atributos_pokemons.csv")
 
-    #7) Adicionar colunas
-    df_atributos = add_col(df_atributos,df_combates_nomes)
+        # 8) Materializa os agregados que o dashboard lê, lendo os combates em lotes
+        with inst.etapa("agregados") as etapa:
+            etapa.extras["tabelas"] = len(agregados.materializar())
 
-    # 8) Salva CSVs
-    df_combates_nomes.to_csv("combates_com_nomes.csv", index=False)
-    df_atributos.to_csv("atributos_pokemons.csv", index=False)
-    print(" Arquivos salvos: combates_com_nomes.csv e atributos_pokemons.csv")
+        # 9) Janelas sobre a ordem de chegada: na coleta incremental só os combates novos entram.
+        # A coleta completa (ou --revalidar, que pode mudar páginas antigas) refaz o estado
+        with inst.etapa("janelas") as etapa:
+            _, etapa.linhas = janelas.materializar(reiniciar=not args.incremental or args.revalidar)
+    finally:
+        # O relatório sai mesmo quando uma etapa falha: a etapa fica com status "erro"
+        inst.imprimir()
+        inst.salvar_json(args.relatorio)
+        if args.prometheus:
+            inst.salvar_prometheus(args.prometheus)
+        print(f" Relatório da execução em {args.relatorio}")
@@ -0,0 +1,149 @@
+"""
+Força dos Pokémon a partir do histórico de combates: Elo e Bradley-Terry.
+
+Contar vitórias favorece quem lutou mais; as duas medidas aqui levam em conta contra quem.
+
+- `Elo` percorre os combates na ordem do log. Para caber em dezenas de milhões de combates, as
+  atualizações são aplicadas por período de rating (`periodo` combates de cada vez, todos
+  avaliados com os ratings do início do período e somados com `np.bincount`). Com `periodo=1`
+  é o Elo sequencial clássico; o padrão deixa cada id aparecer ~uma vez por período.
+- `bradley_terry` ajusta P(i vence j) = p_i / (p_i + p_j) sobre a matriz de confrontos por
+  máxima verossimilhança (Newton em log p), com `prior` jogos virtuais (meio a meio) contra um
+  adversário de força 1 para quem nunca perdeu ou nunca venceu não ir ao infinito. Aceita o
+  resultado anterior como ponto de partida, então uma atualização converge em poucas iterações.
+
+As duas ficam na escala do Elo (1500 de média, 400 pontos = chance de 10:1).
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import confrontos
+
+ELO_INICIAL = 1500.0
+ELO_K = 24.0
+ESCALA = 400.0
+
+
+def _estender(v: np.ndarray, tamanho: int, valor: float) -> np.ndarray:
+    return v if len(v) >= tamanho else np.concatenate([v, np.full(tamanho - len(v), valor, dtype=v.dtype)])
+
+
+class Elo:
+    """
+    Ratings Elo corridos. Chame `atualizar` com os combates na ordem em que aconteceram; lotes
+    novos continuam de onde os anteriores pararam.
+    """
+
+    def __init__(self, tamanho: int = 0, k: float = ELO_K, periodo: Optional[int] = None):
+        self.k = k
+        self.periodo = periodo
+        self.ratings = np.full(tamanho, ELO_INICIAL)
+        self.combates = np.zeros(tamanho, dtype=np.int64)
+
+    @classmethod
+    def de_tabela(cls, df: pd.DataFrame, k: float = ELO_K, periodo: Optional[int] = None) -> "Elo":
+        """
+        Retoma os ratings de uma tabela `forca` já materializada (colunas id, elo, combates).
+        """
+        ids = df["id"].to_numpy(dtype=np.int64)
+        elo = cls(int(ids.max()) + 1 if len(ids) else 0, k, periodo)
+        elo.ratings[ids] = df["elo"].to_numpy(dtype=float)
+        elo.combates[ids] = df["combates"].to_numpy(dtype=np.int64)
+        return elo
+
+    def atualizar(self, first: np.ndarray, second: np.ndarray, winner: np.ndarray) -> None:
+        first = np.asarray(first, dtype=np.int64)
+        second = np.asarray(second, dtype=np.int64)
+        winner = np.asarray(winner, dtype=np.int64)
+        valido = (winner == first) | (winner == second)
+        first, second, p1_venceu = first[valido], second[valido], (winner == first)[valido]
+        if not len(first):
+            return
+        tamanho = max(len(self.ratings), int(max(first.max(), second.max())) + 1)
+        self.ratings = _estender(self.ratings, tamanho, ELO_INICIAL)
+        self.combates = _estender(self.combates, tamanho, 0)
+
+        periodo = self.periodo or max(tamanho // 2, 1)
+        resultado = p1_venceu.astype(float)
+        for inicio in range(0, len(first), periodo):
+            f, s = first[inicio:inicio + periodo], second[inicio:inicio + periodo]
+            esperado = 1.0 / (1.0 + 10.0 ** ((self.ratings[s] - self.ratings[f]) / ESCALA))
+            delta = self.k * (resultado[inicio:inicio + periodo] - esperado)
+            self.ratings += np.bincount(f, delta, tamanho) - np.bincount(s, delta, tamanho)
+        self.combates += np.bincount(first, minlength=tamanho) + np.bincount(second, minlength=tamanho)
+
+
+def bradley_terry(matriz: confrontos.MatrizConfrontos, inicial: Optional[np.ndarray] = None,
+                  prior: float = 1.0, tol: float = 1e-8, max_iter: int = 100) -> Tuple[np.ndarray, int]:
+    """
+    Forças p (uma por id, NaN para quem não tem combates) e o número de iterações usadas.
+    """
+    tamanho = max(matriz.tamanho, 1)
+    vencedor, perdedor = matriz.chaves // tamanho, matriz.chaves % tamanho
+    # Combate contra si mesmo não diz nada sobre a força
+    diferentes = vencedor != perdedor
+    vencedor, perdedor, vitorias = vencedor[diferentes], perdedor[diferentes], matriz.vitorias[diferentes]
+
+    ativo = (np.bincount(vencedor, vitorias, tamanho) + np.bincount(perdedor, vitorias, tamanho)) > 0
+    ids = np.flatnonzero(ativo)
+    posicao = np.full(tamanho, -1, dtype=np.int64)
+    posicao[ids] = np.arange(len(ids))
+    pv, pp = posicao[vencedor], posicao[perdedor]
+    n = len(ids)
+    if not n:
+        return np.full(tamanho, np.nan), 0
+    ganhos = np.bincount(pv, vitorias, n) + prior / 2
+
+    theta = np.zeros(n)
+    if inicial is not None:
+        anterior = _estender(np.asarray(inicial, dtype=float), tamanho, np.nan)[ids]
+        usar = np.isfinite(anterior) & (anterior > 0)
+        theta[usar] = np.log(anterior[usar])
+
+    iteracoes = 0
+    for iteracoes in range(1, max_iter + 1):
+        # Newton em log p: o MM clássico leva milhares de passos quando as forças são muito
+        # desiguais; a hessiana é densa só no número de ids (centenas)
+        chance = 1.0 / (1.0 + np.exp(theta[pp] - theta[pv]))
+        chance_prior = 1.0 / (1.0 + np.exp(-theta))
+        gradiente = ganhos - np.bincount(pv, vitorias * chance, n) \
+            - np.bincount(pp, vitorias * (1.0 - chance), n) - prior * chance_prior
+        q = vitorias * chance * (1.0 - chance)
+        hessiana = np.bincount(pv * n + pp, q, n * n).reshape(n, n)
+        hessiana = hessiana + hessiana.T
+        hessiana[np.diag_indices(n)] -= hessiana.sum(axis=1) + prior * chance_prior * (1.0 - chance_prior)
+        passo = np.linalg.solve(hessiana, gradiente)
+        # Limita o passo para as primeiras iterações, longe do ótimo, não oscilarem
+        passo = np.clip(passo, -2.0, 2.0)
+        theta -= passo
+        if np.abs(passo).max() < tol:
+            break
+
+    p = np.full(tamanho, np.nan)
+    p[ids] = np.exp(theta)
+    return p, iteracoes
+
+
+def escala_elo(p: np.ndarray) -> np.ndarray:
+    return ELO_INICIAL + ESCALA * np.log10(p)
+
+
+def tabela_forca(elo: Elo, matriz: confrontos.MatrizConfrontos, df_pokemon: pd.DataFrame,
+                 inicial: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Tabela `forca` do dashboard: para cada Pokémon da tabela `pokemon` (id, name), combates,
+    Elo e Bradley-Terry na escala do Elo, da maior força BT para a menor.
+    """
+    ids = df_pokemon["id"].to_numpy(dtype=np.int64)
+    p, _ = bradley_terry(matriz, inicial)
+    tamanho = max(len(elo.ratings), len(p), int(ids.max()) + 1 if len(ids) else 0)
+    df = pd.DataFrame({
+        "id": ids,
+        "name": df_pokemon["name"].to_numpy(),
+        "combates": _estender(elo.combates, tamanho, 0)[ids],
+        "elo": _estender(elo.ratings, tamanho, ELO_INICIAL)[ids],
+        "bradley_terry": escala_elo(_estender(p, tamanho, np.nan))[ids],
+    })
+    return df.sort_values("bradley_terry", ascending=False, kind="stable").reset_index(drop=True)
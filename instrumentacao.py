@@ -0,0 +1,170 @@
+"""
+Instrumentação das etapas da coleta (`dados.py`).
+
+Cada etapa roda dentro de `Instrumentacao.etapa(nome)` e fica registrada com tempo de parede,
+tempo de CPU, requisições, repetições, respostas 429, erros, bytes (no fio e descomprimidos) e
+linhas produzidas. Os contadores de rede são a diferença dos totais de `MetricasEndpoints` do
+cliente entre o início e o fim da etapa, então as etapas precisam rodar uma de cada vez.
+
+No fim da execução o relatório vai para um JSON (para comparar durações entre noites) e,
+opcionalmente, para texto no formato do Prometheus (node_exporter textfile collector). Com
+`pasta_perfis`, cada etapa roda sob o cProfile e o `.prof` fica gravado ao lado.
+"""
+import contextlib
+import cProfile
+import datetime
+import json
+import os
+import platform
+import pstats
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+CAMPOS_REDE = ("requisicoes", "repeticoes", "respostas_429", "erros", "bytes_rede", "bytes")
+
+
+class Etapa:
+    """
+    Registro de uma etapa. Durante a etapa, preencha `linhas` (e o que mais quiser em `extras`).
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.segundos = 0.0
+        self.cpu_segundos = 0.0
+        self.linhas: Optional[int] = None
+        self.status = "ok"
+        self.rede: Dict[str, float] = dict.fromkeys(CAMPOS_REDE, 0)
+        self.perfil: Optional[str] = None
+        self.extras: Dict[str, Any] = {}
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "etapa": self.nome, "status": self.status, "segundos": round(self.segundos, 4),
+            "cpu_segundos": round(self.cpu_segundos, 4), "linhas": self.linhas,
+            **{c: int(v) for c, v in self.rede.items()}, "perfil": self.perfil, **self.extras,
+        }
+
+
+class Instrumentacao:
+    """
+    Coleta os registros das etapas de uma execução. `metricas` é o `MetricasEndpoints` do cliente
+    (ou None para etapas sem rede).
+    """
+
+    def __init__(self, metricas=None, pasta_perfis: Optional[str] = None):
+        self.metricas = metricas
+        self.pasta_perfis = pasta_perfis
+        self.etapas: List[Etapa] = []
+        self.inicio = datetime.datetime.now(datetime.timezone.utc)
+        self._inicio_relogio = time.perf_counter()
+        self.status = "ok"
+
+    def _totais(self) -> Dict[str, float]:
+        return self.metricas.totais() if self.metricas is not None else dict.fromkeys(CAMPOS_REDE, 0)
+
+    @contextlib.contextmanager
+    def etapa(self, nome: str) -> Iterator[Etapa]:
+        registro = Etapa(nome)
+        self.etapas.append(registro)
+        antes = self._totais()
+        perfil = cProfile.Profile() if self.pasta_perfis else None
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        if perfil is not None:
+            perfil.enable()
+        try:
+            yield registro
+        except BaseException:
+            registro.status = self.status = "erro"
+            raise
+        finally:
+            if perfil is not None:
+                perfil.disable()
+            registro.segundos = time.perf_counter() - inicio
+            registro.cpu_segundos = time.process_time() - inicio_cpu
+            depois = self._totais()
+            registro.rede = {c: depois.get(c, 0) - antes.get(c, 0) for c in CAMPOS_REDE}
+            if perfil is not None:
+                registro.perfil = self._salvar_perfil(perfil, len(self.etapas), nome)
+
+    def _salvar_perfil(self, perfil: cProfile.Profile, numero: int, nome: str) -> str:
+        os.makedirs(self.pasta_perfis, exist_ok=True)
+        seguro = "".join(c if c.isalnum() else "_" for c in nome).strip("_")
+        caminho = os.path.join(self.pasta_perfis, f"{numero:02d}_{seguro}.prof")
+        perfil.dump_stats(caminho)
+        return caminho
+
+    def relatorio(self) -> Dict[str, Any]:
+        endpoints = []
+        if self.metricas is not None:
+            tabela = self.metricas.tabela().reset_index()
+            endpoints = json.loads(tabela.to_json(orient="records"))
+        return {
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "status": self.status,
+            "segundos": round(time.perf_counter() - self._inicio_relogio, 4),
+            "python": platform.python_version(),
+            "etapas": [e.como_dict() for e in self.etapas],
+            "endpoints": endpoints,
+        }
+
+    def salvar_json(self, caminho: str) -> None:
+        _gravar_atomico(caminho, json.dumps(self.relatorio(), ensure_ascii=False, indent=2))
+
+    def prometheus(self, prefixo: str = "pokemon_ingest") -> str:
+        """
+        Relatório no formato de texto do Prometheus: uma série por etapa e métrica, mais a
+        duração total, o status e o horário de término da execução.
+        """
+        relatorio = self.relatorio()
+        metricas = [
+            ("etapa_segundos", "Tempo de parede da etapa.", "segundos"),
+            ("etapa_cpu_segundos", "Tempo de CPU do processo na etapa.", "cpu_segundos"),
+            ("etapa_linhas", "Linhas produzidas pela etapa.", "linhas"),
+            *((f"etapa_{c}", f"Total de {c.replace('_', ' ')} na etapa.", c) for c in CAMPOS_REDE),
+        ]
+        linhas = []
+        for nome, ajuda, campo in metricas:
+            linhas += [f"# HELP {prefixo}_{nome} {ajuda}", f"# TYPE {prefixo}_{nome} gauge"]
+            for etapa in relatorio["etapas"]:
+                if etapa[campo] is not None:
+                    linhas.append(f'{prefixo}_{nome}{{etapa="{etapa["etapa"]}"}} {etapa[campo]}')
+        linhas += [
+            f"# HELP {prefixo}_segundos Duração total da execução.", f"# TYPE {prefixo}_segundos gauge",
+            f"{prefixo}_segundos {relatorio['segundos']}",
+            f"# HELP {prefixo}_sucesso 1 se a execução terminou sem erro.", f"# TYPE {prefixo}_sucesso gauge",
+            f"{prefixo}_sucesso {int(relatorio['status'] == 'ok')}",
+            f"# HELP {prefixo}_fim_timestamp_segundos Horário (Unix) do fim da execução.",
+            f"# TYPE {prefixo}_fim_timestamp_segundos gauge",
+            f"{prefixo}_fim_timestamp_segundos {time.time():.0f}",
+        ]
+        return "\n".join(linhas) + "\n"
+
+    def salvar_prometheus(self, caminho: str) -> None:
+        # O textfile collector pode ler no meio da escrita: grava ao lado e troca de uma vez
+        _gravar_atomico(caminho, self.prometheus())
+
+    def imprimir(self, top_perfil: int = 8, etapas_perfil: int = 3) -> None:
+        """
+        Resumo das etapas e, com perfis, as `top_perfil` funções das `etapas_perfil` etapas mais lentas.
+        """
+        print("\n--- Etapas ---")
+        for etapa in self.etapas:
+            linhas = "" if etapa.linhas is None else f" | {etapa.linhas} linhas"
+            print(f"{etapa.nome:<28} {etapa.segundos:8.2f} s | {int(etapa.rede['requisicoes'])} req"
+                  f" ({int(etapa.rede['repeticoes'])} repetidas, {int(etapa.rede['respostas_429'])}×429)"
+                  f" | {etapa.rede['bytes_rede'] / 1e6:.1f} MB{linhas}"
+                  f"{'' if etapa.status == 'ok' else ' | ERRO'}")
+        com_perfil = sorted((e for e in self.etapas if e.perfil), key=lambda e: e.segundos, reverse=True)
+        for etapa in com_perfil[:etapas_perfil]:
+            if top_perfil:
+                print(f"\n--- Perfil: {etapa.nome} ({etapa.perfil}) ---")
+                pstats.Stats(etapa.perfil).sort_stats("cumulative").print_stats(top_perfil)
+
+
+def _gravar_atomico(caminho: str, texto: str) -> None:
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(texto)
+    os.replace(temporario, caminho)
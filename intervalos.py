@@ -0,0 +1,153 @@
+"""
+Intervalos de confiança por bootstrap para as taxas de vitória do dashboard.
+
+Reamostrar os combates com reposição e recalcular a taxa de um tipo só depende, para esse tipo,
+de quantos combates caem em cada uma de quatro categorias: os dois lados têm o tipo, só o
+vencedor tem, só o perdedor tem, nenhum tem. Agrupar categorias de uma multinomial dá outra
+multinomial, então cada reamostra é um sorteio multinomial de 4 contagens com n = total de
+combates e as massas tiradas da matriz de confrontos (produtos pela matriz id × tipo). O mesmo
+vale para a proporção de vitórias de lendários (vencedor lendário, não lendário, sem atributos).
+A distribuição de cada taxa é exatamente a do bootstrap sobre o log inteiro, e o custo não
+depende do número de combates: milhares de reamostras saem em milissegundos.
+
+`intervalos_para` guarda o resultado em `agregados/intervalos/<hash>.npz`, com o hash da matriz
+de confrontos, dos atributos e dos parâmetros; a semente torna o resultado reprodutível.
+"""
+import hashlib
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+import confrontos
+
+PASTA_INTERVALOS = os.path.join("agregados", "intervalos")
+REAMOSTRAS = 2000
+NIVEL = 0.95
+# Muda quando as categorias ou os quantis mudam, para não reaproveitar resultados de outra versão
+VERSAO_INTERVALOS = "1"
+
+
+def massas_tipos(matriz: confrontos.MatrizConfrontos, indice) -> np.ndarray:
+    """
+    Combates por tipo (linhas de `indice.vocab_tipos`) nas categorias: os dois lados têm o tipo,
+    só o vencedor, só o perdedor, nenhum. `indice` é um `motor.IndiceAtributos`.
+    """
+    tamanho = max(matriz.tamanho, 1)
+    vencedor, perdedor = matriz.chaves // tamanho, matriz.chaves % tamanho
+    ok = (vencedor < indice.tamanho) & (perdedor < indice.tamanho)
+    total = matriz.vitorias.sum()
+    vencedor, perdedor, vitorias = vencedor[ok], perdedor[ok], matriz.vitorias[ok].astype(float)
+    tipos = indice.tipos.astype(float)
+    ambos = np.array([vitorias @ (tipos[vencedor, t] * tipos[perdedor, t]) for t in range(tipos.shape[1])])
+    como_vencedor = np.bincount(vencedor, weights=vitorias, minlength=indice.tamanho) @ tipos
+    como_perdedor = np.bincount(perdedor, weights=vitorias, minlength=indice.tamanho) @ tipos
+    massas = np.column_stack([ambos, como_vencedor - ambos, como_perdedor - ambos, np.zeros(len(ambos))])
+    massas[:, 3] = total - massas[:, :3].sum(axis=1)
+    return np.rint(massas).astype(np.int64)
+
+
+def massas_lendarios(matriz: confrontos.MatrizConfrontos, indice) -> np.ndarray:
+    """
+    Combates vencidos por lendários, por não lendários (com atributos) e pelos demais.
+    """
+    tamanho = max(matriz.tamanho, 1)
+    vencedor = matriz.chaves // tamanho
+    dentro = vencedor < indice.tamanho
+    conhecido = np.zeros(len(vencedor), dtype=bool)
+    conhecido[dentro] = indice.conhecido[vencedor[dentro]]
+    lendario = np.zeros(len(vencedor), dtype=bool)
+    lendario[dentro] = indice.lendario[vencedor[dentro]]
+    lendarios = int(matriz.vitorias[conhecido & lendario].sum())
+    outros = int(matriz.vitorias[conhecido & ~lendario].sum())
+    return np.array([lendarios, outros, int(matriz.vitorias.sum()) - lendarios - outros], dtype=np.int64)
+
+
+def _reamostrar(massas: np.ndarray, reamostras: int, rng: np.random.Generator) -> np.ndarray:
+    # Uma multinomial por linha de `massas` (todas somam o total de combates), numa chamada só:
+    # (reamostras, linhas, categorias)
+    total = int(massas.sum(axis=-1).max(initial=0))
+    if not total:
+        return np.zeros((reamostras,) + massas.shape, dtype=np.int64)
+    return rng.multinomial(total, massas / total, size=(reamostras,) + massas.shape[:-1])
+
+
+def _quantis(amostras: np.ndarray, nivel: float) -> np.ndarray:
+    cauda = (1 - nivel) / 2 * 100
+    # Colunas sem nenhuma reamostra válida (tipo ou classe sem combates na visão filtrada) ficam NaN:
+    # o nanpercentile só vê as que têm dados, e não avisa "All-NaN slice"
+    limites = np.full((2,) + amostras.shape[1:], np.nan)
+    com_dados = ~np.isnan(amostras).all(axis=0)
+    if com_dados.any():
+        limites[:, com_dados] = np.nanpercentile(amostras[:, com_dados], [cauda, 100 - cauda], axis=0)
+    return limites
+
+
+def calcular(matriz: confrontos.MatrizConfrontos, indice, reamostras: int = REAMOSTRAS,
+             nivel: float = NIVEL, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Limites (inferior, superior) da taxa de vitória de cada tipo e da proporção de vitórias de
+    lendários, por bootstrap percentil com `reamostras` reamostras.
+    """
+    rng = np.random.default_rng(seed)
+    c = _reamostrar(massas_tipos(matriz, indice), reamostras, rng)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        taxas = (c[..., 0] + c[..., 1]) / (2 * c[..., 0] + c[..., 1] + c[..., 2])
+    limites_tipos = _quantis(taxas, nivel)
+
+    c = _reamostrar(massas_lendarios(matriz, indice), reamostras, rng)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        proporcao = c[:, 0] / (c[:, 0] + c[:, 1])
+    limites_lendarios = _quantis(proporcao, nivel)
+    return {
+        "tipos": np.array(indice.vocab_tipos, dtype=str),
+        "limites_tipos": limites_tipos.T,
+        "limites_lendarios": limites_lendarios,
+    }
+
+
+def tabelas(resultado: Dict[str, np.ndarray]) -> Dict[str, pd.DataFrame]:
+    """
+    Os limites como tabelas para juntar às de `agregados`: por `Tipo` e por `Categoria`.
+    """
+    limites = resultado["limites_tipos"]
+    df_tipos = pd.DataFrame({"Tipo": resultado["tipos"].astype(object),
+                             "WinRateMin": limites[:, 0], "WinRateMax": limites[:, 1]})
+    baixo, alto = resultado["limites_lendarios"] * 100
+    df_lendarios = pd.DataFrame({
+        "Categoria": ["Lendário", "Não Lendário"],
+        "Proporção Min (%)": [baixo, 100 - alto],
+        "Proporção Max (%)": [alto, 100 - baixo],
+    }).round(2)
+    return {"tipos": df_tipos, "vitorias_lendarios": df_lendarios}
+
+
+def hash_dados(matriz: confrontos.MatrizConfrontos, indice, reamostras: int, nivel: float, seed: int) -> str:
+    h = hashlib.sha1(f"{VERSAO_INTERVALOS}-{reamostras}-{nivel}-{seed}".encode("ascii"))
+    for v in (matriz.chaves, matriz.vitorias, np.array([matriz.tamanho]), indice.conhecido, indice.lendario,
+              indice.tipos, np.array(indice.vocab_tipos, dtype=str)):
+        h.update(np.ascontiguousarray(v).tobytes())
+    return h.hexdigest()[:16]
+
+
+def intervalos_para(matriz: confrontos.MatrizConfrontos, indice, reamostras: int = REAMOSTRAS,
+                    nivel: float = NIVEL, seed: int = 0,
+                    pasta: Optional[str] = PASTA_INTERVALOS) -> Dict[str, pd.DataFrame]:
+    """
+    Tabelas de intervalos dos dados de `matriz` e `indice`: lidas de `pasta` se já foram
+    calculadas para o mesmo hash, senão calculadas e gravadas. Com `pasta=None`, só calcula.
+    """
+    if pasta is None:
+        return tabelas(calcular(matriz, indice, reamostras, nivel, seed))
+    caminho = os.path.join(pasta, f"{hash_dados(matriz, indice, reamostras, nivel, seed)}.npz")
+    if os.path.exists(caminho):
+        with np.load(caminho) as arq:
+            return tabelas({k: arq[k] for k in arq.files})
+    resultado = calcular(matriz, indice, reamostras, nivel, seed)
+    os.makedirs(pasta, exist_ok=True)
+    # Grava ao lado e troca: outro processo do dashboard pode estar lendo
+    temporario = f"{caminho}.tmp.npz"
+    np.savez(temporario, **resultado)
+    os.replace(temporario, caminho)
+    return tabelas(resultado)
@@ -0,0 +1,319 @@
+"""
+Visões por janela sobre a ordem de chegada dos combates.
+
+A coleta grava em cada combate o `seq`, a posição no log da API (ordem das páginas).
+`JanelaCombates` consome os combates nessa ordem e cada atualização só trabalha sobre os novos:
+
+- um buffer circular guarda os últimos `tamanho` combates; vitórias e participações de cada id
+  na janela corrente somam o que entra e subtraem o que sai do buffer;
+- a cada `passo` combates ficam guardadas as somas acumuladas (prefixos) de vitórias e
+  participações por id. A janela que termina num ponto é a diferença entre dois prefixos, então
+  as linhas de tendência saem de uma subtração de matrizes, sem voltar aos combates. Passando de
+  `max_pontos` pontos, o passo dobra e um ponto a cada dois é descartado; quando dobrar de novo
+  passaria de `tamanho`, saem os pontos mais antigos. A memória não cresce com o log e cada ponto
+  da tendência continua cobrindo uma janela perto de `tamanho` (`largura_tendencia` combates).
+
+O estado fica em `agregados/janelas.npz`. Na coleta incremental, `materializar` lê só as linhas
+do arquivo depois das que já foram consumidas.
+"""
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import armazenamento
+import motor
+
+ARQUIVO_JANELAS = os.path.join("agregados", "janelas.npz")
+TAMANHO_JANELA = 5_000
+PASSO = 500
+MAX_PONTOS = 2_048
+# Pontos de prefixo calculados de uma vez por pedaço de combates (limita a matriz temporária)
+PONTOS_POR_PEDACO = 256
+
+
+class JanelaCombates:
+    """
+    Vitórias e participações por id nos últimos `tamanho` combates e a série dessas janelas ao
+    longo do log. Chame `atualizar` com os combates novos, em ordem de `seq`.
+    """
+
+    def __init__(self, tamanho: int = TAMANHO_JANELA, passo: int = PASSO, max_pontos: int = MAX_PONTOS):
+        self.tamanho = int(tamanho)
+        self.passo = int(passo)
+        self.max_pontos = int(max_pontos)
+        self.ultimo_seq = -1
+        self.combates = 0
+        # Linhas do arquivo já consumidas (inclui as descartadas por id nulo), para `materializar`
+        self.linhas_lidas = 0
+        self._buffer = np.zeros((len(armazenamento.COLUNAS_ID), self.tamanho), dtype=np.int32)
+        self._posicao = 0
+        self.vitorias = np.zeros(0, dtype=np.int64)
+        self.participacoes = np.zeros(0, dtype=np.int64)
+        self._acum_vitorias = np.zeros(0, dtype=np.int64)
+        self._acum_participacoes = np.zeros(0, dtype=np.int64)
+        # Ponto j: prefixo depois de j * passo combates; `pontos_seq[j]` é o seq do último deles
+        self.pontos_vitorias = np.zeros((1, 0), dtype=np.int64)
+        self.pontos_participacoes = np.zeros((1, 0), dtype=np.int64)
+        self.pontos_seq = np.array([-1], dtype=np.int64)
+
+    @property
+    def n_ids(self) -> int:
+        return len(self.vitorias)
+
+    def _crescer(self, n_ids: int) -> None:
+        if n_ids <= self.n_ids:
+            return
+        extra = n_ids - self.n_ids
+        for nome in ("vitorias", "participacoes", "_acum_vitorias", "_acum_participacoes"):
+            setattr(self, nome, np.pad(getattr(self, nome), (0, extra)))
+        self.pontos_vitorias = np.pad(self.pontos_vitorias, ((0, 0), (0, extra)))
+        self.pontos_participacoes = np.pad(self.pontos_participacoes, ((0, 0), (0, extra)))
+
+    def atualizar(self, seq: np.ndarray, first: np.ndarray, second: np.ndarray, winner: np.ndarray) -> int:
+        """
+        Consome os combates com `seq` maior que o último visto (ids negativos = nulos, ignorados).
+        Devolve quantos entraram.
+        """
+        seq = np.asarray(seq, dtype=np.int64)
+        ids = np.vstack([first, second, winner]).astype(np.int64)
+        novos = (seq > self.ultimo_seq) & (ids >= 0).all(axis=0)
+        seq, ids = seq[novos], ids[:, novos]
+        if not len(seq):
+            return 0
+        if (np.diff(seq) < 0).any():
+            ordem = np.argsort(seq, kind="stable")
+            seq, ids = seq[ordem], ids[:, ordem]
+        self._crescer(int(ids.max()) + 1)
+        self._atualizar_janela(ids)
+        self._atualizar_pontos(seq, ids)
+        self.ultimo_seq = int(seq[-1])
+        return len(seq)
+
+    def _contar(self, ids: np.ndarray, sinal: int) -> None:
+        first, second, winner = ids
+        self.vitorias += sinal * np.bincount(winner, minlength=self.n_ids)
+        self.participacoes += sinal * (np.bincount(first, minlength=self.n_ids)
+                                       + np.bincount(second, minlength=self.n_ids))
+
+    def _atualizar_janela(self, ids: np.ndarray) -> None:
+        m = ids.shape[1]
+        if m >= self.tamanho:
+            # A janela inteira é trocada: recontar o buffer novo custa o mesmo que os combates novos
+            self._buffer[:] = ids[:, -self.tamanho:]
+            self._posicao = 0
+            self.vitorias[:] = 0
+            self.participacoes[:] = 0
+            self._contar(self._buffer.astype(np.int64), 1)
+            return
+        posicoes = (self._posicao + np.arange(m)) % self.tamanho
+        ocupadas = min(self.combates, self.tamanho)
+        # As posições sobrescritas que já tinham combate são os mais antigos: saem da janela
+        self._contar(self._buffer[:, posicoes[posicoes < ocupadas]].astype(np.int64), -1)
+        self._buffer[:, posicoes] = ids
+        self._contar(ids, 1)
+        self._posicao = (self._posicao + m) % self.tamanho
+
+    def _atualizar_pontos(self, seq: np.ndarray, ids: np.ndarray) -> None:
+        inicio = 0
+        while inicio < len(seq):
+            deslocamento = self.combates % self.passo
+            fim = min(len(seq), inicio + self.passo * PONTOS_POR_PEDACO - deslocamento)
+            first, second, winner = ids[:, inicio:fim]
+            n = fim - inicio
+            # Segmento de cada combate: 0 até o próximo ponto, 1 até o seguinte...
+            segmento = (deslocamento + np.arange(n)) // self.passo
+            n_seg = int(segmento[-1]) + 1
+            chave = segmento * self.n_ids
+            vitorias = np.bincount(chave + winner, minlength=n_seg * self.n_ids).reshape(n_seg, -1)
+            participacoes = (np.bincount(chave + first, minlength=n_seg * self.n_ids)
+                             + np.bincount(chave + second, minlength=n_seg * self.n_ids)).reshape(n_seg, -1)
+            acum_vitorias = self._acum_vitorias + np.cumsum(vitorias, axis=0)
+            acum_participacoes = self._acum_participacoes + np.cumsum(participacoes, axis=0)
+            completos = (deslocamento + n) // self.passo
+            if completos:
+                ultimos = np.arange(1, completos + 1) * self.passo - deslocamento - 1
+                self.pontos_vitorias = np.vstack([self.pontos_vitorias, acum_vitorias[:completos]])
+                self.pontos_participacoes = np.vstack([self.pontos_participacoes, acum_participacoes[:completos]])
+                self.pontos_seq = np.concatenate([self.pontos_seq, seq[inicio + ultimos]])
+            self._acum_vitorias = acum_vitorias[-1]
+            self._acum_participacoes = acum_participacoes[-1]
+            self.combates += n
+            inicio = fim
+            while len(self.pontos_seq) > self.max_pontos:
+                self._compactar()
+
+    def _compactar(self) -> None:
+        if 2 * self.passo > self.tamanho:
+            # Um passo maior que a janela faria cada ponto cobrir mais que `tamanho` combates:
+            # mantém o passo e descarta os pontos mais antigos
+            excesso = len(self.pontos_seq) - self.max_pontos
+            self.pontos_vitorias = self.pontos_vitorias[excesso:]
+            self.pontos_participacoes = self.pontos_participacoes[excesso:]
+            self.pontos_seq = self.pontos_seq[excesso:]
+            return
+        # Os pontos pares são os prefixos a cada 2 * passo combates
+        self.pontos_vitorias = self.pontos_vitorias[::2]
+        self.pontos_participacoes = self.pontos_participacoes[::2]
+        self.pontos_seq = self.pontos_seq[::2]
+        self.passo *= 2
+
+    # --- Consultas ---
+
+    def _conhecidos(self, v: np.ndarray, indice) -> np.ndarray:
+        # Recorta (ou estende) para os ids do índice e zera os que não têm atributos
+        v = v[..., :indice.tamanho]
+        if v.shape[-1] < indice.tamanho:
+            largura = [(0, 0)] * (v.ndim - 1) + [(0, indice.tamanho - v.shape[-1])]
+            v = np.pad(v, largura)
+        return v * indice.conhecido
+
+    def tabela_pokemon(self, indice) -> pd.DataFrame:
+        """
+        Vitórias, combates e taxa de vitória de cada id na janela corrente (ids com nome).
+        """
+        ids = np.flatnonzero(self.participacoes)
+        nomes = [indice.nomes[i] if i < indice.tamanho else None for i in ids]
+        df = pd.DataFrame({'id': ids, 'name': nomes, 'vitorias': self.vitorias[ids],
+                           'participacoes': self.participacoes[ids]})
+        df['WinRate'] = df['vitorias'] / df['participacoes']
+        return df.dropna(subset=['name']).reset_index(drop=True)
+
+    def tabela_tipos(self, indice) -> pd.DataFrame:
+        """
+        Taxa de vitória por tipo na janela corrente, no formato da tabela `tipos` dos agregados.
+        """
+        return motor.tipos_de_contagens(self._conhecidos(self.vitorias, indice),
+                                        self._conhecidos(self.participacoes, indice), indice)
+
+    def _largura(self) -> int:
+        # Janela da tendência em pontos: o maior múltiplo do passo que cabe em `tamanho`
+        return max(1, min(self.tamanho // self.passo, len(self.pontos_seq) - 1))
+
+    @property
+    def largura_tendencia(self) -> int:
+        """
+        Combates em cada janela da tendência (o último ponto é a janela corrente, de `tamanho`).
+        """
+        return self._largura() * self.passo
+
+    def _series(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (seq do fim de cada janela, vitórias, participações): as janelas dos pontos de prefixo e,
+        no fim, a janela corrente exata.
+        """
+        w = self._largura()
+        seqs = self.pontos_seq[w:]
+        vitorias = self.pontos_vitorias[w:] - self.pontos_vitorias[:-w]
+        participacoes = self.pontos_participacoes[w:] - self.pontos_participacoes[:-w]
+        if self.combates and (not len(seqs) or seqs[-1] != self.ultimo_seq):
+            seqs = np.append(seqs, self.ultimo_seq)
+            vitorias = np.vstack([vitorias, self.vitorias])
+            participacoes = np.vstack([participacoes, self.participacoes])
+        return seqs, vitorias, participacoes
+
+    def tendencia_tipos(self, indice) -> pd.DataFrame:
+        """
+        Taxa de vitória de cada tipo em janelas ao longo do log (formato longo: seq, Tipo, WinRate,
+        TotalMatches). Cada série é um produto das contagens por id pela matriz id × tipo.
+        """
+        seqs, vitorias, participacoes = self._series()
+        wins = self._conhecidos(vitorias, indice) @ indice.tipos
+        matches = self._conhecidos(participacoes, indice) @ indice.tipos
+        with np.errstate(invalid='ignore', divide='ignore'):
+            taxa = np.where(matches > 0, wins / np.maximum(matches, 1), np.nan)
+        k = len(indice.vocab_tipos)
+        df = pd.DataFrame({
+            'seq': np.repeat(seqs, k),
+            'Tipo': np.tile(np.array(indice.vocab_tipos, dtype=object), len(seqs)),
+            'WinRate': taxa.ravel(),
+            'TotalMatches': matches.ravel(),
+        })
+        return df.dropna(subset=['WinRate']).reset_index(drop=True)
+
+    def tendencia_pokemon(self, pokemon: int) -> pd.DataFrame:
+        """
+        Taxa de vitória de um id em janelas ao longo do log (seq, WinRate, Combates).
+        """
+        if pokemon >= self.n_ids:
+            return pd.DataFrame(columns=['seq', 'WinRate', 'Combates'])
+        seqs, vitorias, participacoes = self._series()
+        combates = participacoes[:, pokemon]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            taxa = np.where(combates > 0, vitorias[:, pokemon] / np.maximum(combates, 1), np.nan)
+        df = pd.DataFrame({'seq': seqs, 'WinRate': taxa, 'Combates': combates})
+        return df.dropna(subset=['WinRate']).reset_index(drop=True)
+
+    # --- Persistência ---
+
+    def salvar(self, caminho: str = ARQUIVO_JANELAS) -> None:
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        temporario = f"{caminho}.tmp.npz"
+        escalares = np.array([self.tamanho, self.passo, self.max_pontos, self.ultimo_seq, self.combates,
+                              self.linhas_lidas, self._posicao], dtype=np.int64)
+        np.savez(temporario, escalares=escalares, buffer=self._buffer, vitorias=self.vitorias,
+                 participacoes=self.participacoes, acum_vitorias=self._acum_vitorias,
+                 acum_participacoes=self._acum_participacoes, pontos_vitorias=self.pontos_vitorias,
+                 pontos_participacoes=self.pontos_participacoes, pontos_seq=self.pontos_seq)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str = ARQUIVO_JANELAS) -> "JanelaCombates":
+        with np.load(caminho) as arq:
+            tamanho, passo, max_pontos, ultimo_seq, combates, linhas_lidas, posicao = arq["escalares"].tolist()
+            janela = cls(tamanho, passo, max_pontos)
+            janela.ultimo_seq, janela.combates, janela.linhas_lidas, janela._posicao = \
+                ultimo_seq, combates, linhas_lidas, posicao
+            janela._buffer = arq["buffer"]
+            janela.vitorias = arq["vitorias"]
+            janela.participacoes = arq["participacoes"]
+            janela._acum_vitorias = arq["acum_vitorias"]
+            janela._acum_participacoes = arq["acum_participacoes"]
+            janela.pontos_vitorias = arq["pontos_vitorias"]
+            janela.pontos_participacoes = arq["pontos_participacoes"]
+            janela.pontos_seq = arq["pontos_seq"]
+        return janela
+
+
+def materializar(caminho: str = ARQUIVO_JANELAS, base: str = armazenamento.BASE_COMBATES,
+                 reiniciar: bool = False) -> Tuple[JanelaCombates, int]:
+    """
+    Atualiza o estado gravado em `caminho` com as linhas novas do arquivo de combates (ou refaz
+    do zero, com `reiniciar` ou se o arquivo encolheu) e grava. Devolve (janela, combates novos).
+    """
+    janela: Optional[JanelaCombates] = None
+    if not reiniciar and os.path.exists(caminho):
+        janela = JanelaCombates.carregar(caminho)
+        # Arquivo reescrito com menos linhas do que já foram lidas: o estado não vale mais
+        if armazenamento.linhas_combates(base) < janela.linhas_lidas:
+            janela = None
+    colunas = armazenamento.colunas_combates(base)
+    com_seq = armazenamento.COLUNA_SEQ in colunas
+    if janela is None:
+        janela = JanelaCombates()
+    novos = 0
+    lidas = 0
+    ler = armazenamento.COLUNAS_ID + ([armazenamento.COLUNA_SEQ] if com_seq else [])
+    for lote in armazenamento.iterar_combates(base, colunas=ler, a_partir_de=janela.linhas_lidas):
+        # Arquivos gravados antes do seq: a posição da linha é a ordem de chegada
+        seq = (lote[armazenamento.COLUNA_SEQ].to_numpy(dtype=np.int64) if com_seq
+               else np.arange(janela.linhas_lidas + lidas, janela.linhas_lidas + lidas + len(lote)))
+        ids = (lote[c].fillna(-1).to_numpy(dtype=np.int64) for c in armazenamento.COLUNAS_ID)
+        novos += janela.atualizar(seq, *ids)
+        lidas += len(lote)
+    janela.linhas_lidas += lidas
+    janela.salvar(caminho)
+    return janela, novos
+
+
+def carregar_ou_calcular(caminho: str = ARQUIVO_JANELAS,
+                         base: str = armazenamento.BASE_COMBATES) -> JanelaCombates:
+    """
+    Estado das janelas para o dashboard: o gravado pela coleta, se for mais novo que os combates;
+    senão refeito a partir do arquivo.
+    """
+    fonte = armazenamento.caminho_combates(base)
+    if os.path.exists(caminho) and (fonte is None or os.path.getmtime(fonte) <= os.path.getmtime(caminho)):
+        return JanelaCombates.carregar(caminho)
+    return materializar(caminho, base, reiniciar=True)[0]
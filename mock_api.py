@@ -0,0 +1,343 @@
+"""
+Servidor HTTP local que imita a API de combates, servindo os CSVs do repositório.
+
+Falhas podem ser injetadas para testar o retry/backoff do cliente: uma fração das requisições
+recebe 429 (com Retry-After) ou 5xx, e `--limite-rps` devolve 429 acima de uma taxa. O sorteio de
+cada falha é um hash de (semente, requisição, quantas vezes ela já chegou), não a ordem de
+chegada: com a mesma semente, a mesma sequência de requisições recebe as mesmas falhas, com
+qualquer número de threads no cliente.
+
+Uso:
+    python mock_api.py --porta 8765 --latencia 0.05
+    python mock_api.py --taxa-429 0.05 --taxa-5xx 0.02 --semente 1
+    API_BASE_URL=http://127.0.0.1:8765 python dados.py
+"""
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+TOKEN_MOCK = "token-mock"
+CAMPOS_API_ATRIBUTOS = ["id", "name", "hp", "attack", "defense", "sp_attack", "sp_defense",
+                        "speed", "generation", "legendary", "types"]
+
+
+def _carregar_combates(caminho: str) -> List[Dict[str, int]]:
+    with open(caminho, newline="", encoding="utf-8") as f:
+        return [
+            {"first_pokemon": int(r["first_pokemon"]),
+             "second_pokemon": int(r["second_pokemon"]),
+             "winner": int(r["winner"])}
+            for r in csv.DictReader(f)
+        ]
+
+
+def _carregar_atributos(caminho: str) -> Dict[int, Dict[str, Any]]:
+    atributos: Dict[int, Dict[str, Any]] = {}
+    with open(caminho, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            registro: Dict[str, Any] = {c: r[c] for c in CAMPOS_API_ATRIBUTOS if c in r}
+            registro["id"] = int(registro["id"])
+            for c in ("hp", "attack", "defense", "sp_attack", "sp_defense", "speed"):
+                if registro.get(c) not in (None, ""):
+                    registro[c] = int(float(registro[c]))
+            atributos[registro["id"]] = registro
+    return atributos
+
+
+class EstadoMock:
+    """
+    Dados servidos e comportamento configurável do servidor (latência, tamanho máximo de página,
+    gzip quando o cliente aceita, e validade dos tokens: com `validade_token_s`, cada login emite
+    um token novo que expira e o login informa `expires_in`). `taxa_429` e `taxa_5xx` são as
+    frações de requisições (exceto /health) que falham; `limite_rps` responde 429 acima dessa taxa.
+    """
+
+    def __init__(
+        self,
+        combates: List[Dict[str, int]],
+        atributos: Dict[int, Dict[str, Any]],
+        latencia_s: float = 0.0,
+        max_per_page: int = 1000,
+        informar_total: bool = True,
+        comprimir: bool = True,
+        validade_token_s: Optional[float] = None,
+        taxa_429: float = 0.0,
+        taxa_5xx: float = 0.0,
+        retry_after_s: float = 0.5,
+        limite_rps: Optional[float] = None,
+        semente: int = 0,
+    ):
+        self.combates = combates
+        self.atributos = atributos
+        self.pokemons = [{"id": pid, "name": a["name"]} for pid, a in sorted(atributos.items())]
+        self.latencia_s = latencia_s
+        self.max_per_page = max_per_page
+        self.informar_total = informar_total
+        self.comprimir = comprimir
+        self.validade_token_s = validade_token_s
+        self.taxa_429 = taxa_429
+        self.taxa_5xx = taxa_5xx
+        self.retry_after_s = retry_after_s
+        self.limite_rps = limite_rps
+        self.semente = semente
+        self.requisicoes = 0
+        self.logins = 0
+        self.falhas_429 = 0
+        self.falhas_5xx = 0
+        self._tokens: Dict[str, float] = {}
+        self._ocorrencias: Dict[str, int] = {}
+        # Balde de fichas do limite_rps: capacidade de 1 s de requisições
+        self._fichas = limite_rps or 0.0
+        self._ultima_ficha = time.monotonic()
+        self._lock = threading.Lock()
+
+    def contar(self) -> None:
+        with self._lock:
+            self.requisicoes += 1
+
+    def falha(self, requisicao: str) -> Optional[int]:
+        """
+        Status da falha injetada nesta chegada de `requisicao` (método e caminho com a query), ou
+        None. O sorteio depende só da semente, da requisição e de quantas vezes ela já chegou.
+        """
+        with self._lock:
+            ocorrencia = self._ocorrencias.get(requisicao, 0)
+            self._ocorrencias[requisicao] = ocorrencia + 1
+            if self.limite_rps:
+                agora = time.monotonic()
+                self._fichas = min(self.limite_rps, self._fichas + (agora - self._ultima_ficha) * self.limite_rps)
+                self._ultima_ficha = agora
+                if self._fichas < 1:
+                    self.falhas_429 += 1
+                    return 429
+                self._fichas -= 1
+            if not (self.taxa_429 or self.taxa_5xx):
+                return None
+            resumo = hashlib.sha1(f"{self.semente}:{requisicao}:{ocorrencia}".encode("utf-8")).digest()
+            sorteio = int.from_bytes(resumo[:8], "big") / 2**64
+            if sorteio < self.taxa_429:
+                self.falhas_429 += 1
+                return 429
+            if sorteio < self.taxa_429 + self.taxa_5xx:
+                self.falhas_5xx += 1
+                # Alterna entre os 5xx que um proxy na frente da API devolve
+                return (500, 502, 503)[resumo[8] % 3]
+            return None
+
+    def emitir_token(self) -> str:
+        with self._lock:
+            self.logins += 1
+            if self.validade_token_s is None:
+                return TOKEN_MOCK
+            token = f"{TOKEN_MOCK}-{self.logins}"
+            self._tokens[token] = time.monotonic() + self.validade_token_s
+            return token
+
+    def token_valido(self, token: str) -> bool:
+        if self.validade_token_s is None:
+            return token == TOKEN_MOCK
+        with self._lock:
+            return time.monotonic() < self._tokens.get(token, -math.inf)
+
+    def pagina(self, itens: List[Dict[str, Any]], page: int, per_page: int) -> Tuple[List[Dict[str, Any]], int]:
+        per_page = max(1, min(per_page, self.max_per_page))
+        inicio = (max(page, 1) - 1) * per_page
+        return itens[inicio:inicio + per_page], per_page
+
+
+class _Handler(BaseHTTPRequestHandler):
+    estado: EstadoMock  # preenchido por criar_servidor
+    protocol_version = "HTTP/1.1"
+    # Cabeçalhos e corpo saem em escritas separadas: com Nagle, o keep-alive esperaria o ACK atrasado
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:  # silencia o log por requisição
+        pass
+
+    def _responder(self, status: int, corpo: Dict[str, Any], etag: bool = False) -> None:
+        dados = json.dumps(corpo).encode("utf-8")
+        if etag:
+            valor = '"' + hashlib.sha1(dados).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == valor:
+                self.send_response(304)
+                self.send_header("ETag", valor)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if self.estado.comprimir and "gzip" in self.headers.get("Accept-Encoding", ""):
+            dados = gzip.compress(dados, compresslevel=5)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(dados)))
+        if etag:
+            self.send_header("ETag", valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _falhou(self) -> bool:
+        # Responde a falha injetada, se houver; /health nunca falha (é o teste de vida)
+        if urlparse(self.path).path.rstrip("/") == "/health":
+            return False
+        status = self.estado.falha(f"{self.command} {self.path}")
+        if status is None:
+            return False
+        if status == 429:
+            dados = json.dumps({"detail": "Too Many Requests"}).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Retry-After", f"{self.estado.retry_after_s:g}")
+        else:
+            dados = json.dumps({"detail": "Erro simulado"}).encode("utf-8")
+            self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+        return True
+
+    def _autorizado(self) -> bool:
+        autorizacao = self.headers.get("Authorization", "")
+        return autorizacao.startswith("Bearer ") and self.estado.token_valido(autorizacao[len("Bearer "):])
+
+    def _paginado(self, chave: str, itens: List[Dict[str, Any]], query: Dict[str, List[str]]) -> None:
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", ["50"])[0])
+        lista, per_page = self.estado.pagina(itens, page, per_page)
+        corpo: Dict[str, Any] = {chave: lista, "page": page, "per_page": per_page}
+        if self.estado.informar_total:
+            corpo["total"] = len(itens)
+            corpo["total_pages"] = math.ceil(len(itens) / per_page)
+        self._responder(200, corpo, etag=True)
+
+    def do_POST(self) -> None:
+        self.estado.contar()
+        time.sleep(self.estado.latencia_s)
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if tamanho:
+            self.rfile.read(tamanho)
+        if self._falhou():
+            return
+        if urlparse(self.path).path == "/login":
+            corpo: Dict[str, Any] = {"access_token": self.estado.emitir_token()}
+            if self.estado.validade_token_s is not None:
+                corpo["expires_in"] = self.estado.validade_token_s
+            self._responder(200, corpo)
+        else:
+            self._responder(404, {"detail": "Not Found"})
+
+    def do_GET(self) -> None:
+        self.estado.contar()
+        time.sleep(self.estado.latencia_s)
+        if self._falhou():
+            return
+        partes = urlparse(self.path)
+        caminho = partes.path.rstrip("/")
+        query = parse_qs(partes.query)
+        if caminho == "/health":
+            self._responder(200, {"status": "ok"})
+            return
+        if not self._autorizado():
+            self._responder(401, {"detail": "Not authenticated"})
+            return
+        if caminho == "/combats":
+            self._paginado("combats", self.estado.combates, query)
+        elif caminho == "/pokemon":
+            self._paginado("pokemons", self.estado.pokemons, query)
+        elif caminho.startswith("/pokemon/"):
+            try:
+                registro = self.estado.atributos.get(int(caminho.rsplit("/", 1)[1]))
+            except ValueError:
+                registro = None
+            if registro is None:
+                self._responder(404, {"detail": "Pokemon not found"})
+            else:
+                self._responder(200, registro)
+        else:
+            self._responder(404, {"detail": "Not Found"})
+
+
+def criar_servidor(
+    porta: int = 0,
+    latencia_s: float = 0.0,
+    max_per_page: int = 1000,
+    informar_total: bool = True,
+    comprimir: bool = True,
+    validade_token_s: Optional[float] = None,
+    taxa_429: float = 0.0,
+    taxa_5xx: float = 0.0,
+    retry_after_s: float = 0.5,
+    limite_rps: Optional[float] = None,
+    semente: int = 0,
+    combates_csv: str = "combates_com_nomes.csv",
+    atributos_csv: str = "atributos_pokemons.csv",
+    host: str = "127.0.0.1",
+) -> ThreadingHTTPServer:
+    """
+    Cria (sem iniciar) o servidor. `porta=0` escolhe uma porta livre; veja `server.server_address`.
+    """
+    estado = EstadoMock(
+        _carregar_combates(combates_csv),
+        _carregar_atributos(atributos_csv),
+        latencia_s=latencia_s,
+        max_per_page=max_per_page,
+        informar_total=informar_total,
+        comprimir=comprimir,
+        validade_token_s=validade_token_s,
+        taxa_429=taxa_429,
+        taxa_5xx=taxa_5xx,
+        retry_after_s=retry_after_s,
+        limite_rps=limite_rps,
+        semente=semente,
+    )
+    handler = type("HandlerMock", (_Handler,), {"estado": estado})
+    servidor = ThreadingHTTPServer((host, porta), handler)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def iniciar_em_thread(servidor: ThreadingHTTPServer) -> str:
+    """
+    Sobe o servidor numa thread daemon e devolve a URL base.
+    """
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    host, porta = servidor.server_address[:2]
+    return f"http://{host}:{porta}"
+
+
+def estado_do(servidor: ThreadingHTTPServer) -> EstadoMock:
+    return servidor.RequestHandlerClass.estado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API local de combates Pokémon para testes offline.")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.0, help="atraso por requisição, em segundos")
+    parser.add_argument("--max-per-page", type=int, default=1000)
+    parser.add_argument("--sem-total", action="store_true", help="não informa total/total_pages nas listagens")
+    parser.add_argument("--sem-gzip", action="store_true", help="responde sempre sem compressão")
+    parser.add_argument("--validade-token", type=float, default=None,
+                        help="segundos até o token expirar (padrão: não expira)")
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="fração de requisições respondidas com 429")
+    parser.add_argument("--taxa-5xx", type=float, default=0.0, help="fração de requisições respondidas com 500/502/503")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After dos 429, em segundos")
+    parser.add_argument("--limite-rps", type=float, default=None, help="responde 429 acima desta taxa de requisições/s")
+    parser.add_argument("--semente", type=int, default=0, help="semente do sorteio das falhas")
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.porta, args.latencia, args.max_per_page, not args.sem_total,
+                              comprimir=not args.sem_gzip, validade_token_s=args.validade_token,
+                              taxa_429=args.taxa_429, taxa_5xx=args.taxa_5xx, retry_after_s=args.retry_after,
+                              limite_rps=args.limite_rps, semente=args.semente)
+    print(f"Mock da API em http://127.0.0.1:{servidor.server_address[1]} (Ctrl+C para sair)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,159 @@
+"""
+Modelo de probabilidade de vitória entre dois Pokémon.
+
+Regressão logística sobre a diferença de atributos (hp..speed e lendário, padronizados) e de
+tipos (one-hot sobre os tipos já sem espaços): P(a vence b) = σ(β·(x_a - x_b)). Como o modelo é
+linear na diferença, cada Pokémon tem um escore s = X·β, e a matriz de todos os pares (~800×800)
+sai de uma vez como σ(s_a - s_b).
+
+O ajuste usa a matriz de confrontos (cada par vencedor/perdedor com peso = vitórias) em vez da
+tabela de combates, então custa o mesmo para 50 mil ou 100 milhões de combates. A ordem
+first/second não fica na matriz, então o modelo não tem termo de vantagem de posição.
+
+`modelo_para` guarda coeficientes e matriz em `agregados/modelos/<hash>.npz`, com o hash da
+matriz de confrontos e dos atributos: com os mesmos dados, o dashboard só lê o arquivo.
+"""
+import hashlib
+import os
+from typing import List, Optional
+
+import numpy as np
+
+import confrontos
+
+PASTA_MODELOS = os.path.join("agregados", "modelos")
+FEATURES_STATS = ["hp", "attack", "defense", "sp_attack", "sp_defense", "speed", "legendary"]
+# Muda quando as features ou o ajuste mudam, para não reaproveitar modelos de outra versão
+VERSAO_MODELO = "1"
+
+
+def _sigmoide(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+class ModeloVitoria:
+    """
+    Coeficientes ajustados e a matriz de probabilidades de todos os pares de `ids`.
+    """
+
+    def __init__(self, ids: np.ndarray, features: List[str], coeficientes: np.ndarray,
+                 escores: np.ndarray, acuracia: float, n_combates: int,
+                 probabilidades: Optional[np.ndarray] = None):
+        self.ids = ids
+        self.features = features
+        self.coeficientes = coeficientes
+        self.escores = escores
+        self.acuracia = acuracia
+        self.n_combates = n_combates
+        self._probabilidades = probabilidades
+        self._posicao = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int64)
+        self._posicao[ids] = np.arange(len(ids))
+
+    def prever(self, a, b) -> np.ndarray:
+        """
+        P(a vence b) para arrays de ids (NaN se algum dos dois não tem atributos).
+        """
+        pa, pb = self._posicoes(a), self._posicoes(b)
+        p = _sigmoide(self.escores[pa] - self.escores[pb])
+        return np.where((pa >= 0) & (pb >= 0), p, np.nan)
+
+    def _posicoes(self, ids) -> np.ndarray:
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        dentro = (ids >= 0) & (ids < len(self._posicao))
+        posicoes = np.full(len(ids), -1, dtype=np.int64)
+        posicoes[dentro] = self._posicao[ids[dentro]]
+        return posicoes
+
+    def probabilidades(self) -> np.ndarray:
+        """
+        Matriz len(ids)×len(ids) com P(linha vence coluna), numa chamada vetorizada.
+        """
+        if self._probabilidades is None:
+            self._probabilidades = _sigmoide(self.escores[:, None] - self.escores[None, :]).astype(np.float32)
+        return self._probabilidades
+
+    def salvar(self, caminho: str) -> None:
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        temporario = f"{caminho}.tmp.npz"
+        np.savez(temporario, ids=self.ids, features=np.array(self.features), coeficientes=self.coeficientes,
+                 escores=self.escores, acuracia=self.acuracia, n_combates=self.n_combates,
+                 probabilidades=self.probabilidades())
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "ModeloVitoria":
+        with np.load(caminho) as arq:
+            return cls(arq["ids"], arq["features"].tolist(), arq["coeficientes"], arq["escores"],
+                       float(arq["acuracia"]), int(arq["n_combates"]), arq["probabilidades"])
+
+
+def _features_por_id(indice):
+    """
+    Matriz de features por id com atributos (stats padronizados e one-hot de tipos).
+    """
+    ids = np.flatnonzero(indice.conhecido)
+    stats = indice.stats[ids]
+    desvio = stats.std(axis=0)
+    stats = (stats - stats.mean(axis=0)) / np.where(desvio > 0, desvio, 1.0)
+
+    nomes = indice.vocab_tipos
+    one_hot = indice.tipos[ids].astype(float)
+    features = [f"{c}_diff" for c in FEATURES_STATS] + [f"tipo_{t}" for t in nomes]
+    return ids, np.hstack([stats, one_hot]), features
+
+
+def ajustar(matriz: confrontos.MatrizConfrontos, indice, regularizacao: float = 1.0,
+            tol: float = 1e-8, max_iter: int = 50) -> ModeloVitoria:
+    """
+    Ajusta a logística por Newton (IRLS) com penalidade L2 `regularizacao`, tudo vetorizado.
+    `indice` é um `motor.IndiceAtributos`.
+    """
+    ids, x, features = _features_por_id(indice)
+    posicao = np.full(max(matriz.tamanho, indice.tamanho), -1, dtype=np.int64)
+    posicao[ids] = np.arange(len(ids))
+    tamanho = max(matriz.tamanho, 1)
+    pv, pp = posicao[matriz.chaves // tamanho], posicao[matriz.chaves % tamanho]
+    # Só pares diferentes e com atributos dos dois lados, como nos merges da correlação
+    ok = (pv >= 0) & (pp >= 0) & (pv != pp)
+    pv, pp, peso = pv[ok], pp[ok], matriz.vitorias[ok].astype(float)
+    diferencas = x[pv] - x[pp]
+
+    beta = np.zeros(x.shape[1])
+    for _ in range(max_iter):
+        p = _sigmoide(diferencas @ beta)
+        gradiente = diferencas.T @ (peso * (1.0 - p)) - regularizacao * beta
+        hessiana = (diferencas * (peso * p * (1.0 - p))[:, None]).T @ diferencas
+        hessiana[np.diag_indices_from(hessiana)] += regularizacao
+        passo = np.linalg.solve(hessiana, gradiente)
+        beta += passo
+        if np.abs(passo).max() < tol:
+            break
+
+    escores = x @ beta
+    acertos = peso[(diferencas @ beta) > 0].sum()
+    return ModeloVitoria(ids, features, beta, escores,
+                         float(acertos / peso.sum()) if peso.sum() else float("nan"), int(peso.sum()))
+
+
+def hash_dados(matriz: confrontos.MatrizConfrontos, indice) -> str:
+    h = hashlib.sha1(VERSAO_MODELO.encode("ascii"))
+    for v in (matriz.tabela().to_numpy(dtype=np.int64), indice.conhecido, indice.stats, indice.tipos,
+              np.array(indice.vocab_tipos, dtype=str)):
+        h.update(np.ascontiguousarray(v).tobytes())
+    return h.hexdigest()[:16]
+
+
+def modelo_para(matriz: confrontos.MatrizConfrontos, indice,
+                pasta: Optional[str] = PASTA_MODELOS) -> ModeloVitoria:
+    """
+    Modelo dos dados de `matriz` e `indice`: lido de `pasta` se já foi ajustado para o mesmo hash,
+    senão ajustado e gravado. Com `pasta=None`, só ajusta (filtros do dashboard).
+    """
+    if pasta is None:
+        return ajustar(matriz, indice)
+    caminho = os.path.join(pasta, f"{hash_dados(matriz, indice)}.npz")
+    if os.path.exists(caminho):
+        return ModeloVitoria.carregar(caminho)
+    modelo = ajustar(matriz, indice)
+    modelo.salvar(caminho)
+    return modelo
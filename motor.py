@@ -0,0 +1,327 @@
+"""
+Motor de agregação em fluxo sobre a tabela de combates.
+
+Lê os combates em lotes limitados e mantém só contadores corridos (participações e vitórias por
+id, e soma, soma de quadrados e produtos cruzados das diferenças de atributos para a correlação).
+A memória de pico depende do tamanho do lote e do número de ids, não do tamanho do arquivo, e o
+resultado é o mesmo de `agregados.calcular_agregados`.
+
+`IndiceAtributos` guarda os atributos em arrays indexados pelo id, e `contar_combates` é o kernel
+que faz a única passada pelos ids de um lote; todas as tabelas saem de `ContagensCombates`, seja
+com um lote só (em memória) ou somando lotes (em fluxo). O acumulador também mantém a matriz
+esparsa de confrontos diretos (`confrontos.MatrizConfrontos`) e os ratings Elo (`forca.Elo`),
+atualizados lote a lote.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import armazenamento
+import confrontos
+import forca
+
+COLUNAS_STATS = ['hp', 'attack', 'defense', 'sp_attack', 'sp_defense', 'speed', 'legendary']
+FEATURES = ['p1_wins', 'hp_diff', 'attack_diff', 'defense_diff', 'sp_attack_diff', 'sp_defense_diff',
+            'speed_diff', 'legendary_diff']
+
+
+class IndiceAtributos:
+    """
+    Atributos em arrays NumPy indexados diretamente pelo id (os ids são inteiros pequenos e densos),
+    para trocar os `pd.merge` por gathers como `stats[first_pokemon]`.
+
+    - `conhecido[id]`: o id existe na tabela de atributos (os merges eram inner joins)
+    - `nomes[id]`: nome do Pokémon (None para ids fora da tabela)
+    - `stats[id]`: hp..speed e legendary (0/1), na ordem de COLUNAS_STATS
+    - `tipos[id, j]`: o id tem o tipo `vocab_tipos[j]` (matriz multi-rótulo, sem espaços nem repetição)
+    - `por_tipo[tipo]` e `por_geracao[g]`: bitmaps (máscaras bool por id) para os filtros do dashboard
+    """
+
+    def __init__(self, df_atributos: pd.DataFrame):
+        """
+        `df_atributos` precisa estar no esquema de `armazenamento.tipar_atributos` (legendary bool).
+        """
+        ids = df_atributos['id'].to_numpy(dtype=np.int64)
+        self.tamanho = int(ids.max()) + 1
+
+        self.conhecido = np.zeros(self.tamanho, dtype=bool)
+        self.conhecido[ids] = True
+        self.nomes = np.full(self.tamanho, None, dtype=object)
+        self.nomes[ids] = df_atributos['name'].astype(object).to_numpy()
+
+        self.stats = np.zeros((self.tamanho, len(COLUNAS_STATS)))
+        self.stats[ids] = df_atributos[COLUNAS_STATS].to_numpy(dtype=float)
+        self.lendario = self.stats[:, -1].astype(bool)
+
+        # Só os tipos canônicos que aparecem, em ordem alfabética
+        matriz = armazenamento.matriz_tipos(df_atributos)
+        ordem = sorted(np.flatnonzero(matriz.any(axis=0)), key=lambda j: armazenamento.TIPOS[j])
+        self.vocab_tipos = [armazenamento.TIPOS[j] for j in ordem]
+        self.tipos = np.zeros((self.tamanho, len(ordem)), dtype=bool)
+        self.tipos[ids] = matriz[:, ordem]
+
+        self.por_tipo: Dict[str, np.ndarray] = {t: self.tipos[:, j] for j, t in enumerate(self.vocab_tipos)}
+        self.por_geracao: Dict[int, np.ndarray] = {}
+        if 'generation' in df_atributos.columns:
+            geracoes = df_atributos['generation']
+            for g in sorted(geracoes.dropna().unique()):
+                mascara = np.zeros(self.tamanho, dtype=bool)
+                mascara[ids[(geracoes == g).fillna(False).to_numpy()]] = True
+                self.por_geracao[int(g)] = mascara
+
+    def conhecidos(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Máscara dos ids que existem na tabela de atributos (ids fora do intervalo contam como ausentes).
+        """
+        dentro = (ids >= 0) & (ids < self.tamanho)
+        return dentro & self.conhecido[np.where(dentro, ids, 0)]
+
+    def contar(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Contagem por id, só dos ids conhecidos, num vetor de tamanho `tamanho`.
+        """
+        return np.bincount(ids[self.conhecidos(ids)], minlength=self.tamanho)
+
+
+def momentos_correlacao(first: np.ndarray, second: np.ndarray, winner: np.ndarray,
+                        indice: IndiceAtributos) -> Tuple[int, np.ndarray, np.ndarray]:
+    """
+    n, Σx e Σxxᵀ das features da correlação, só dos combates com os dois ids conhecidos.
+    """
+    validos = indice.conhecidos(first) & indice.conhecidos(second)
+    first, second, winner = first[validos], second[validos], winner[validos]
+    x = np.empty((len(first), len(FEATURES)))
+    x[:, 0] = winner == first
+    x[:, 1:] = indice.stats[first] - indice.stats[second]
+    return len(x), x.sum(axis=0), x.T @ x
+
+
+def correlacao_de_momentos(n: int, soma: np.ndarray, produtos: np.ndarray) -> pd.DataFrame:
+    """
+    Matriz de Pearson a partir dos momentos (o mesmo que `DataFrame.corr()` sobre as features).
+    """
+    if n < 2:
+        return pd.DataFrame(np.nan, index=FEATURES, columns=FEATURES)
+    cov = (produtos - np.outer(soma, soma) / n) / (n - 1)
+    desvio = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(desvio, desvio)
+    np.fill_diagonal(corr, 1.0)
+    return pd.DataFrame(corr, index=FEATURES, columns=FEATURES)
+
+
+def tipos_de_contagens(vitorias: np.ndarray, participacoes: np.ndarray, indice: IndiceAtributos) -> pd.DataFrame:
+    """
+    Taxa de vitória por tipo a partir das vitórias e participações por id (ids conhecidos): um
+    produto de cada vetor pela matriz id × tipo.
+    """
+    wins = vitorias.astype(np.int64) @ indice.tipos
+    matches = participacoes.astype(np.int64) @ indice.tipos
+    df = pd.DataFrame({'Tipo': indice.vocab_tipos, 'TotalWins': wins, 'TotalMatches': matches})
+    # Tipo sem nenhuma vitória ou participação não aparecia no value_counts e saía no dropna
+    df = df[(df['TotalWins'] > 0) & (df['TotalMatches'] > 0)].reset_index(drop=True)
+    df['WinRate'] = df['TotalWins'] / df['TotalMatches']
+    return df.sort_values(by='WinRate', ascending=False)
+
+
+def vitorias_lendarios_de_contagens(vitorias: np.ndarray, indice: IndiceAtributos) -> pd.DataFrame:
+    contagem = pd.Series({
+        True: int(vitorias[indice.lendario].sum()),
+        False: int(vitorias[~indice.lendario].sum()),
+    })
+    contagem = contagem[contagem > 0].sort_values(ascending=False)
+    df = pd.DataFrame({
+        'Categoria': ['Lendário' if x else 'Não Lendário' for x in contagem.index],
+        'Vitórias': contagem.values,
+    })
+    df['Proporção (%)'] = (df['Vitórias'] / df['Vitórias'].sum() * 100).round(2)
+    return df
+
+
+def _estender(v: np.ndarray, tamanho: int) -> np.ndarray:
+    return v if len(v) >= tamanho else np.pad(v, (0, tamanho - len(v)))
+
+
+class ContagensCombates:
+    """
+    Saída do kernel: contagens por id (como primeiro, como segundo, vitórias) e momentos da
+    correlação. Todas as tabelas do dashboard saem daqui, e contagens de lotes diferentes se somam.
+    """
+
+    def __init__(self, primeiro: np.ndarray, segundo: np.ndarray, vitorias: np.ndarray,
+                 n: int, soma: np.ndarray, produtos: np.ndarray):
+        self.primeiro = primeiro
+        self.segundo = segundo
+        self.vitorias = vitorias
+        self.n = n
+        self.soma = soma
+        self.produtos = produtos
+
+    @classmethod
+    def vazia(cls, tamanho: int) -> "ContagensCombates":
+        zeros = np.zeros(tamanho, dtype=np.int64)
+        return cls(zeros, zeros.copy(), zeros.copy(), 0,
+                   np.zeros(len(FEATURES)), np.zeros((len(FEATURES), len(FEATURES))))
+
+    def __add__(self, outra: "ContagensCombates") -> "ContagensCombates":
+        tamanho = max(len(self.primeiro), len(outra.primeiro))
+        return ContagensCombates(
+            _estender(self.primeiro, tamanho) + _estender(outra.primeiro, tamanho),
+            _estender(self.segundo, tamanho) + _estender(outra.segundo, tamanho),
+            _estender(self.vitorias, tamanho) + _estender(outra.vitorias, tamanho),
+            self.n + outra.n, self.soma + outra.soma, self.produtos + outra.produtos,
+        )
+
+    @property
+    def participacoes(self) -> np.ndarray:
+        return self.primeiro + self.segundo
+
+    @property
+    def derrotas(self) -> np.ndarray:
+        return self.participacoes - self.vitorias
+
+    def tabelas(self, indice: IndiceAtributos, nomes_extras: Optional[Dict[int, str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Tabelas que dependem dos combates (as só de atributos ficam em `agregados`).
+        `nomes_extras` dá nome a ids que não estão na tabela de atributos.
+        """
+        # Tipos e lendários só contam ids com atributos, como nos merges antigos
+        conhecido = _estender(indice.conhecido, len(self.primeiro))[:len(self.primeiro)]
+        vitorias_conhecidas = (self.vitorias * conhecido)[:indice.tamanho]
+        participacoes_conhecidas = (self.participacoes * conhecido)[:indice.tamanho]
+        return {
+            "pokemon": self._por_pokemon(indice, nomes_extras or {}),
+            "tipos": tipos_de_contagens(vitorias_conhecidas, participacoes_conhecidas, indice),
+            "vitorias_lendarios": vitorias_lendarios_de_contagens(vitorias_conhecidas, indice),
+            "correlacao": correlacao_de_momentos(self.n, self.soma, self.produtos),
+        }
+
+    def _por_pokemon(self, indice: IndiceAtributos, nomes_extras: Dict[int, str]) -> pd.DataFrame:
+        participacoes = self.participacoes
+        ids = np.flatnonzero(participacoes)
+        nomes = [indice.nomes[i] if i < indice.tamanho and indice.nomes[i] is not None else nomes_extras.get(int(i))
+                 for i in ids]
+        df = pd.DataFrame({
+            'id': ids,
+            'name': nomes,
+            'participacoes': participacoes[ids],
+            'vitorias': self.vitorias[ids],
+            'derrotas': self.derrotas[ids],
+        })
+        # Ids sem nome ficam de fora, como no value_counts por nome
+        return df.dropna(subset=['name']).reset_index(drop=True)
+
+
+def contar_combates(first: np.ndarray, second: np.ndarray, winner: np.ndarray,
+                    indice: IndiceAtributos) -> ContagensCombates:
+    """
+    Kernel de agregação: uma passada pelos arrays de ids produz participações, vitórias e
+    derrotas por id (bincount) e os momentos da correlação (gather no índice). Tipos e
+    lendários são derivados depois das contagens por id, sem voltar aos combates.
+    """
+    maior = int(max(first.max(), second.max(), winner.max())) + 1 if len(first) else 0
+    tamanho = max(indice.tamanho, maior)
+    n, soma, produtos = momentos_correlacao(first, second, winner, indice)
+    return ContagensCombates(
+        np.bincount(first, minlength=tamanho),
+        np.bincount(second, minlength=tamanho),
+        np.bincount(winner, minlength=tamanho),
+        n, soma, produtos,
+    )
+
+
+def ids_do_lote(lote: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ids = lote[armazenamento.COLUNAS_ID]
+    if ids.isna().any().any():
+        ids = ids.dropna()
+    return tuple(ids[c].to_numpy(dtype=np.int64) for c in armazenamento.COLUNAS_ID)
+
+
+class AcumuladorCombates:
+    """
+    Agregados corridos dos combates. Chame `atualizar` para cada lote e `resultado` no fim.
+    """
+
+    def __init__(self, df_atributos: pd.DataFrame, indice: Optional[IndiceAtributos] = None):
+        self.indice = indice if indice is not None else IndiceAtributos(df_atributos)
+        self.contagens = ContagensCombates.vazia(self.indice.tamanho)
+        self.confrontos = confrontos.MatrizConfrontos(self.indice.tamanho)
+        self.elo = forca.Elo(self.indice.tamanho)
+        # Nomes de ids que não estão nos atributos, achados nas colunas de nome dos combates
+        self.nomes_extras: Dict[int, str] = {}
+        # Linhas recebidas, contando as com id nulo
+        self.linhas = 0
+
+    def atualizar(self, lote: pd.DataFrame) -> None:
+        self.linhas += len(lote)
+        first, second, winner = ids_do_lote(lote)
+        self.contagens = self.contagens + contar_combates(first, second, winner, self.indice)
+        self.confrontos.atualizar(first, second, winner)
+        self.elo.atualizar(first, second, winner)
+
+        for col_id, col_nome in zip(armazenamento.COLUNAS_ID, armazenamento.COLUNAS_NOME):
+            if col_nome not in lote.columns:
+                continue
+            # Só varre os nomes se houver id desconhecido e ainda sem nome (em geral, nenhum)
+            desconhecidos = ~self.indice.conhecidos(lote[col_id].fillna(-1).to_numpy(dtype=np.int64))
+            if not desconhecidos.any():
+                continue
+            pares = lote.loc[desconhecidos, [col_id, col_nome]].dropna().drop_duplicates(col_id)
+            for pid, nome in zip(pares[col_id].astype(np.int64), pares[col_nome].astype(str)):
+                self.nomes_extras.setdefault(int(pid), nome)
+
+    def resultado(self) -> Dict[str, pd.DataFrame]:
+        tabelas = self.contagens.tabelas(self.indice, self.nomes_extras)
+        tabelas["confrontos"] = self.confrontos.tabela()
+        tabelas["forca"] = forca.tabela_forca(self.elo, self.confrontos, tabelas["pokemon"])
+        return tabelas
+
+
+class IndiceCombates:
+    """
+    Índice invertido dos combates por Pokémon, em formato CSR: as linhas em que o id aparece
+    (como primeiro ou segundo) são `linhas[inicio[id]:inicio[id + 1]]`, em ordem crescente.
+    Um filtro junta as listas dos ids que interessam e toca só nesses combates.
+    """
+
+    def __init__(self, first: np.ndarray, second: np.ndarray, tamanho: int):
+        n = len(first)
+        ids = np.concatenate([first, second]).astype(np.int64)
+        linhas = np.tile(np.arange(n, dtype=np.int64 if n > np.iinfo(np.int32).max else np.int32), 2)
+        ordem = np.lexsort((linhas, ids))
+        self.linhas = linhas[ordem]
+        contagem = np.bincount(ids, minlength=tamanho)
+        self.inicio = np.concatenate([[0], np.cumsum(contagem)])
+
+    def linhas_de(self, pid: int) -> np.ndarray:
+        if pid < 0 or pid + 1 >= len(self.inicio):
+            return self.linhas[:0]
+        # Um combate do Pokémon contra ele mesmo aparece duas vezes
+        return np.unique(self.linhas[self.inicio[pid]:self.inicio[pid + 1]])
+
+    def linhas_com(self, ids_permitidos: np.ndarray) -> np.ndarray:
+        """
+        Linhas (ordenadas, sem repetição) dos combates com pelo menos um participante permitido.
+        """
+        ids = np.flatnonzero(ids_permitidos[:len(self.inicio) - 1])
+        if not len(ids):
+            return self.linhas[:0]
+        partes = [self.linhas[self.inicio[i]:self.inicio[i + 1]] for i in ids]
+        return np.unique(np.concatenate(partes))
+
+
+def agregar_arquivo(
+    df_atributos: pd.DataFrame,
+    base: str = armazenamento.BASE_COMBATES,
+    linhas_por_lote: Optional[int] = None,
+) -> Tuple[Dict[str, pd.DataFrame], int]:
+    """
+    Agrega a tabela de combates salva em `base` (.feather ou .csv) lendo um lote por vez.
+    Devolve as tabelas dependentes dos combates e o número de linhas lidas.
+    """
+    kwargs = {} if linhas_por_lote is None else {"linhas_por_lote": linhas_por_lote}
+    acumulador = AcumuladorCombates(df_atributos)
+    for lote in armazenamento.iterar_combates(base, **kwargs):
+        acumulador.atualizar(lote)
+    return acumulador.resultado(), acumulador.linhas
@@ -0,0 +1,191 @@
+"""
+Relatório estático do dashboard, sem servidor Streamlit.
+
+Calcula todas as análises de analises.py uma vez, grava as tabelas em CSV e um `index.html`
+autocontido (Plotly embutido, abre sem internet). As figuras são montadas em paralelo num pool
+de processos; cada uma recebe só a sua tabela, já pronta.
+
+O manifesto guarda o hash do conteúdo dos combates e dos atributos: se nada mudou desde o último
+relatório, a execução termina sem recalcular (`--forcar` refaz).
+
+Uso:
+    python relatorio.py --saida relatorio
+"""
+import argparse
+import datetime
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import analises
+import armazenamento
+import conjunto
+
+PASTA_RELATORIO = "relatorio"
+# Muda quando as seções ou o HTML mudam, para o relatório antigo não ser reaproveitado
+VERSAO_RELATORIO = "4"
+
+
+class Secao(NamedTuple):
+    titulo: str
+    tabela: str
+    figura: Optional[str]
+    texto: str = ""
+
+
+# Mesma ordem e títulos do app.py
+SECOES = [
+    Secao("Análise 1: Top 5 Pokémons com Mais Vitórias", "dados_mais_vitorias", "figura_mais_vitorias"),
+    Secao("Análise 1B: Top 5 Pokémons com Mais Derrotas", "dados_mais_derrotas", "figura_mais_derrotas"),
+    Secao("Análise 2: Quais Atributos Mais Influenciam a Vitória?", "dados_modelo", "figura_modelo",
+          "Cada barra é o peso de uma diferença de atributo (padronizada) no modelo de regressão "
+          "logística que estima a chance de vitória."),
+    Secao("Análise 3: Taxa de Vitória por Tipo (Q1 e Q2)", "calcular_taxa_vitoria_tipo", "figura_taxa_vitoria_tipo",
+          "Tipos com desempenho consistentemente superior. As barras de erro são o intervalo de "
+          "confiança de 95% (bootstrap sobre os combates)."),
+    Secao("Análise 4: Tipos de Pokémon Mais Comuns", "analisar_tipos_comuns", "figura_tipos_comuns"),
+    Secao("Análise 5: Proporção de Pokémon Lendários", "analisar_proporcao_lendarios", "figura_proporcao_lendarios"),
+    Secao("Análise 6: Porcentagem de Vitórias Pokémons Lendários", "analisar_vitorias_lendarios",
+          "figura_vitorias_lendarios"),
+    Secao("Análise 7: Confrontos Diretos", "dados_confrontos_tipos", "figura_confrontos_tipos"),
+    Secao("Análise 8: Ranking de Força (Bradley-Terry e Elo)", "dados_forca", "figura_forca",
+          "A força leva em conta os adversários enfrentados: vencer um Pokémon forte vale mais "
+          "do que vencer um fraco."),
+    Secao("Análise 9: Tendências na Ordem de Chegada", "dados_tendencia_tipos", "figura_tendencia_tipos",
+          "Taxa de vitória de cada tipo em janelas dos combates anteriores, na ordem em que chegaram "
+          "da API."),
+]
+
+
+def calcular_tabelas(dados: conjunto.ConjuntoDados,
+                     filtro: Optional[conjunto.Filtro] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Tabela de cada seção e as legendas extras (a acurácia do modelo).
+    """
+    tabelas: Dict[str, Any] = {}
+    legendas: Dict[str, str] = {}
+    for secao in SECOES:
+        resultado = getattr(analises, secao.tabela)(dados, filtro)
+        if secao.tabela == "dados_modelo":
+            resultado, acuracia = resultado
+            if acuracia == acuracia:
+                legendas[secao.tabela] = f"O modelo acerta o vencedor em {acuracia:.1%} dos combates."
+        tabelas[secao.tabela] = resultado
+    return tabelas, legendas
+
+
+def _figura_html(nome_figura: str, df) -> str:
+    # Roda nos processos do pool: só a div, o plotly.js entra uma vez no cabeçalho
+    figura = getattr(analises, nome_figura)(df)
+    return figura.to_html(full_html=False, include_plotlyjs=False)
+
+
+def montar_figuras(tabelas: Dict[str, Any], workers: int) -> Dict[str, str]:
+    """
+    HTML de cada figura, em paralelo com `workers` processos (1 = no próprio processo).
+    """
+    tarefas = [(s.tabela, s.figura) for s in SECOES if s.figura and not tabelas[s.tabela].empty]
+    if workers <= 1:
+        return {tabela: _figura_html(figura, tabelas[tabela]) for tabela, figura in tarefas}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {tabela: pool.submit(_figura_html, figura, tabelas[tabela]) for tabela, figura in tarefas}
+        return {tabela: futuro.result() for tabela, futuro in futuros.items()}
+
+
+def gravar_tabelas(tabelas: Dict[str, Any], pasta: str) -> List[str]:
+    os.makedirs(pasta, exist_ok=True)
+    caminhos = []
+    for nome, df in tabelas.items():
+        caminho = os.path.join(pasta, f"{nome}.csv")
+        # A matriz tipo×tipo tem o tipo no índice
+        df.to_csv(caminho, index=(nome == "dados_confrontos_tipos"))
+        caminhos.append(caminho)
+    return caminhos
+
+
+def montar_html(tabelas: Dict[str, Any], figuras: Dict[str, str], legendas: Dict[str, str], versao: str) -> str:
+    from plotly.offline import get_plotlyjs
+
+    gerado = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    partes = [
+        "<!DOCTYPE html>", '<html lang="pt-BR"><head><meta charset="utf-8">',
+        "<title>Análise de Combates Pokémon</title>",
+        "<style>body{font-family:sans-serif;max-width:1100px;margin:auto;padding:1em}"
+        "table{border-collapse:collapse}td,th{padding:2px 8px;border-bottom:1px solid #ddd}</style>",
+        f'<script type="text/javascript">{get_plotlyjs()}</script>',
+        "</head><body>",
+        "<h1>Análise de Combates Pokémon</h1>",
+        f"<p>Gerado em {gerado} (dados {html.escape(versao)}).</p>",
+    ]
+    for secao in SECOES:
+        partes.append(f"<h2>{html.escape(secao.titulo)}</h2>")
+        if secao.texto:
+            partes.append(f"<p>{html.escape(secao.texto)}</p>")
+        if secao.tabela in figuras:
+            partes.append(figuras[secao.tabela])
+        else:
+            partes.append("<p><em>Sem dados para esta análise.</em></p>")
+        if secao.tabela in legendas:
+            partes.append(f"<p><small>{html.escape(legendas[secao.tabela])}</small></p>")
+        if secao.tabela == "dados_forca" and not tabelas[secao.tabela].empty:
+            partes.append(tabelas[secao.tabela].round({"Bradley-Terry": 0, "Elo": 0}).to_html(index=False))
+    partes.append("</body></html>")
+    return "\n".join(partes)
+
+
+def _ler_manifesto(pasta: str) -> Dict[str, Any]:
+    caminho = os.path.join(pasta, "manifesto.json")
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def hash_dados() -> str:
+    """
+    Hash do conteúdo dos combates e dos atributos (não do mtime: a coleta noturna regrava os
+    arquivos mesmo sem combates novos).
+    """
+    fontes = [armazenamento.caminho_combates(), armazenamento.ATRIBUTOS_CSV]
+    return f"{VERSAO_RELATORIO}-{conjunto.assinatura_fontes(fontes, conteudo=True)}"
+
+
+def gerar(pasta: str = PASTA_RELATORIO, workers: Optional[int] = None, forcar: bool = False) -> bool:
+    """
+    Gera o relatório em `pasta`. Devolve False se ele já estava atualizado (nada foi refeito).
+    """
+    inicio = time.perf_counter()
+    versao = hash_dados()
+    if not forcar and _ler_manifesto(pasta).get("versao") == versao \
+            and os.path.exists(os.path.join(pasta, "index.html")):
+        print(f"Relatório em {pasta}/ já corresponde aos dados ({versao}); nada a fazer.")
+        return False
+
+    dados = conjunto.ConjuntoDados.carregar(versao)
+    tabelas, legendas = calcular_tabelas(dados)
+    workers = workers if workers is not None else min(len(SECOES), os.cpu_count() or 1)
+    figuras = montar_figuras(tabelas, workers)
+
+    os.makedirs(pasta, exist_ok=True)
+    gravar_tabelas(tabelas, os.path.join(pasta, "tabelas"))
+    caminho_html = os.path.join(pasta, "index.html")
+    with open(caminho_html + ".tmp", "w", encoding="utf-8") as f:
+        f.write(montar_html(tabelas, figuras, legendas, versao))
+    os.replace(caminho_html + ".tmp", caminho_html)
+    # O manifesto vai por último: com ele, o relatório da versão está completo
+    with open(os.path.join(pasta, "manifesto.json"), "w", encoding="utf-8") as f:
+        json.dump({"versao": versao, "gerado_em": time.time(), "secoes": [s.tabela for s in SECOES]}, f)
+    print(f"Relatório gravado em {caminho_html} ({time.perf_counter() - inicio:.1f} s, {workers} processo(s)).")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o relatório HTML estático das análises, sem o Streamlit.")
+    parser.add_argument("--saida", default=PASTA_RELATORIO, help="pasta do index.html, das tabelas e do manifesto")
+    parser.add_argument("--workers", type=int, default=None, help="processos para montar as figuras (padrão: CPUs)")
+    parser.add_argument("--forcar", action="store_true", help="refaz mesmo se os dados não mudaram")
+    args = parser.parse_args()
+    gerar(args.saida, args.workers, args.forcar)